@@ -0,0 +1,124 @@
+"""
+Maintenance of the per-user ActivityBitmap.
+
+The bitmap is created lazily from the daily rollups the first time it is
+needed and then kept up to date by the SkillProgress signals. Marking a
+day is a single UPDATE that sets the bit in SQL (``SetBit``); SQLite has
+no bit functions on blobs, so ``set_bit`` is registered on its
+connections.
+"""
+from django.db import transaction
+from django.db.models import BinaryField, DateField, F, Func, Value
+from django.utils import timezone
+
+from .models import ActivityBitmap, DailyStudyRollup, DaysBetween, SkillProgress
+
+
+def set_bit(bits, offset, value):
+    """`bits` (little-endian) with bit `offset` set to `value`; PostgreSQL's set_bit() for SQLite."""
+    if bits is None or offset is None or offset < 0:
+        return bits
+    number = int.from_bytes(bytes(bits), 'little')
+    number = number | (1 << offset) if value else number & ~(1 << offset)
+    return number.to_bytes((number.bit_length() + 7) // 8, 'little')
+
+
+def register_functions(connection):
+    if connection.vendor == 'sqlite':
+        connection.connection.create_function('set_bit', 3, set_bit, deterministic=True)
+
+
+class SetBit(Func):
+    """`bits` with bit `offset` set, growing the bytes as needed."""
+    function = 'set_bit'
+    template = '%(function)s(%(expressions)s, 1)'
+    output_field = BinaryField()
+
+    def __init__(self, bits, offset, **extra):
+        super().__init__(bits, offset, **extra)
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        bits, offset = self.source_expressions
+        bits_sql, bits_params = compiler.compile(bits)
+        offset_sql, offset_params = compiler.compile(offset)
+        # set_bit() only addresses existing bytes: pad with zeros first
+        padded = (
+            f"({bits_sql} || decode(repeat('00', GREATEST({offset_sql} / 8 + 1 - length({bits_sql}), 0)), 'hex'))"
+        )
+        return (
+            f'set_bit({padded}, {offset_sql}, 1)',
+            (*bits_params, *offset_params, *bits_params, *offset_params),
+        )
+
+
+def build_activity_bitmap(user):
+    """Build (or rebuild) the bitmap from the user's rollup history."""
+    active_dates = DailyStudyRollup.objects.filter(user=user) \
+        .values_list('date', flat=True) \
+        .distinct() \
+        .order_by()
+
+    bitmap = ActivityBitmap(user=user, start_date=user.date_joined.date())
+    for day in active_dates:
+        bitmap.mark(day)
+    return bitmap
+
+
+def get_activity_bitmap(user):
+    bitmap = ActivityBitmap.objects.filter(user=user).first()
+    if bitmap is None:
+        bitmap = build_activity_bitmap(user)
+        ActivityBitmap.objects.bulk_create([bitmap], ignore_conflicts=True)
+    return bitmap
+
+
+def mark_activity_day(user_id, day):
+    """Set `day` after progress was logged on it."""
+    marked = ActivityBitmap.objects.filter(user_id=user_id, start_date__lte=day).update(
+        bits=SetBit('bits', DaysBetween(Value(day, output_field=DateField()), F('start_date'))),
+        updated_at=timezone.now(),
+    )
+    if marked:
+        return
+
+    # No bitmap, or `day` is before its start and the bits must be shifted
+    mark_activity_days(user_id, [day])
+
+
+def mark_activity_days(user_id, days):
+    """Set every day in `days`, with one read and one write."""
+    with transaction.atomic():
+        bitmap = ActivityBitmap.objects.select_for_update().filter(user_id=user_id).first()
+        # Missing bitmaps are built lazily from the rollups, which already
+        # reflect this change
+        if bitmap is None:
+            return
+        for day in days:
+            bitmap.mark(day)
+        bitmap.save(update_fields=['start_date', 'bits', 'updated_at'])
+
+
+def sync_activity_day(user_id, day):
+    """Set or clear `day` depending on whether any progress is logged on it."""
+    with transaction.atomic():
+        bitmap = ActivityBitmap.objects.select_for_update().filter(user_id=user_id).first()
+        if bitmap is None:
+            return
+
+        if SkillProgress.objects.filter(user_id=user_id, date=day).exists():
+            bitmap.mark(day)
+        else:
+            bitmap.unmark(day)
+        bitmap.save(update_fields=['start_date', 'bits', 'updated_at'])
+
+
+def rebuild_activity_bitmaps(users):
+    rebuilt = 0
+    for user in users:
+        bitmap = build_activity_bitmap(user)
+        ActivityBitmap.objects.update_or_create(
+            user=user,
+            defaults={'start_date': bitmap.start_date, 'bits': bitmap.bits},
+        )
+        rebuilt += 1
+    return rebuilt
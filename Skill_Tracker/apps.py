@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class SkillTrackerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Skill_Tracker'
+
+    def ready(self):
+        from . import signals  # noqa: F401
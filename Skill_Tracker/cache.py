@@ -0,0 +1,85 @@
+"""
+Per-user dashboard cache.
+
+Cached dashboard contexts are keyed by the user's cache version and the
+current date. Saving or deleting any of the user's skills, goals, progress
+entries or notes bumps the version (see signals.py), and the date in the
+key drops yesterday's entry at midnight, so a stale dashboard is never
+served. A version is a random token rather than a counter: incr() is a
+read-then-write on the file-based cache, so two concurrent bumps could
+both write the same next value, while two fresh tokens never collide.
+
+Hit and miss counts are only kept with DASHBOARD_CACHE_STATS (on under
+DEBUG).
+"""
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+DASHBOARD_TIMEOUT = 60 * 60 * 24
+HITS_KEY = 'dashboard:stats:hits'
+MISSES_KEY = 'dashboard:stats:misses'
+
+
+def _version_key(user_id):
+    return f'dashboard:version:{user_id}'
+
+
+def get_dashboard_version(user_id):
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        # Concurrent requests agree on whichever token was added first
+        version = uuid4().hex
+        cache.add(_version_key(user_id), version, timeout=None)
+        version = cache.get(_version_key(user_id), version)
+    return version
+
+
+def bump_dashboard_version(user_id):
+    cache.set(_version_key(user_id), uuid4().hex, timeout=None)
+
+
+def dashboard_cache_key(user_id, today, section):
+    return f'dashboard:{section}:{user_id}:{get_dashboard_version(user_id)}:{today.isoformat()}'
+
+
+def _count(key):
+    # Off by default: with the file-based cache each count is a file write
+    if not settings.DASHBOARD_CACHE_STATS:
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def get_dashboard_context(user, today, build, section='context'):
+    """
+    Cached dashboard context for `user`, calling `build(user, today)` on a
+    miss. `section` separates independently cached parts (e.g. card pages).
+    """
+    key = dashboard_cache_key(user.id, today, section)
+    context = cache.get(key)
+    if context is not None:
+        _count(HITS_KEY)
+        return context
+
+    _count(MISSES_KEY)
+    context = build(user, today)
+    cache.set(key, context, DASHBOARD_TIMEOUT)
+    return context
+
+
+def get_dashboard_cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+        'enabled': settings.DASHBOARD_CACHE_STATS,
+    }
@@ -0,0 +1,264 @@
+"""
+Chart specs for the dashboard.
+
+Each builder returns a compact, JSON-serialisable ``{'data': [...],
+'layout': {...}}`` dict holding only the traces and the per-chart layout
+overrides. The shared blue-grey theme lives in ``layout_template()``; the
+bootstrap script in dashboard.html merges the two and calls
+``Plotly.newPlot`` in the browser.
+"""
+from functools import lru_cache
+
+
+# Blue-Grey Color Palette
+COLORS = {
+    'primary': '#2563eb',          # Blue-600
+    'secondary': '#3b82f6',        # Blue-500
+    'tertiary': '#60a5fa',         # Blue-400
+    'light': '#93c5fd',            # Blue-300
+    'extra_light': '#dbeafe',      # Blue-100
+    'grey_dark': '#1f2937',        # Gray-800
+    'grey_medium': '#4b5563',      # Gray-600
+    'grey_light': '#9ca3af',       # Gray-400
+    'grey_extra_light': '#e5e7eb', # Gray-200
+    'success': '#10b981',          # Emerald-500
+    'warning': '#f59e0b',          # Amber-500
+    'danger': '#ef4444',           # Red-500
+    'background': '#f9fafb',       # Gray-50
+}
+
+CHART_CONFIG = {'displayModeBar': False, 'responsive': True}
+
+HOURS_HOVER = '<b>%{x}</b><br>Hours: %{y:.1f}<extra></extra>'
+
+TOP_LEGEND = {
+    'orientation': 'h',
+    'yanchor': 'bottom',
+    'y': 1.02,
+    'xanchor': 'right',
+    'x': 1,
+}
+
+
+@lru_cache(maxsize=None)
+def layout_template():
+    """Layout shared by every dashboard chart; sent to the page once."""
+    return {
+        'paper_bgcolor': 'white',
+        'plot_bgcolor': COLORS['background'],
+        'font': {'family': 'Arial, sans-serif', 'color': COLORS['grey_medium']},
+        'margin': {'l': 40, 'r': 40, 't': 50, 'b': 40},
+        'xaxis': {'gridcolor': COLORS['grey_extra_light']},
+        'yaxis': {'gridcolor': COLORS['grey_extra_light']},
+    }
+
+
+def spec(data, **layout):
+    return {'data': data, 'layout': layout}
+
+
+# =====================================================
+# SKILL CARD CHARTS
+# =====================================================
+
+def skill_monthly_bar(title, months, monthly_data):
+    return spec(
+        [{
+            'type': 'bar',
+            'x': months,
+            'y': monthly_data,
+            'text': [f"{d:.1f}h" for d in monthly_data],
+            'textposition': 'outside',
+            'marker': {
+                'color': COLORS['primary'],
+                'line': {'color': COLORS['grey_dark'], 'width': 1.5},
+            },
+            'opacity': 0.8,
+            'hovertemplate': HOURS_HOVER,
+        }],
+        title={'text': f"{title} - Monthly Progress"},
+        height=300,
+        font={'size': 11},
+        showlegend=False,
+    )
+
+
+def skill_goals_pie(completed, active):
+    if completed + active > 0:
+        return spec(
+            [{
+                'type': 'pie',
+                'labels': ["Completed", "Active"],
+                'values': [completed, active],
+                'hole': 0.5,
+                'marker': {'colors': [COLORS['success'], COLORS['warning']]},
+                'textinfo': 'label+percent',
+                'textposition': 'outside',
+                'hovertemplate': '<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>',
+                'showlegend': False,
+            }],
+            height=250,
+            margin={'l': 20, 'r': 20, 't': 30, 'b': 20},
+            font={'size': 11},
+        )
+
+    hidden_axis = {'showgrid': False, 'zeroline': False, 'showticklabels': False}
+    return spec(
+        [],
+        annotations=[{
+            'text': "No Goals",
+            'x': 0.5, 'y': 0.5,
+            'xref': 'paper', 'yref': 'paper',
+            'showarrow': False,
+            'font': {'size': 14, 'color': COLORS['grey_light']},
+        }],
+        xaxis=hidden_axis,
+        yaxis=hidden_axis,
+        height=250,
+        margin={'l': 20, 'r': 20, 't': 30, 'b': 20},
+        font={'size': 11},
+    )
+
+
+def skill_daily_line(title, labels, data, moving_avg):
+    return spec(
+        [
+            {
+                'type': 'scatter',
+                'x': labels,
+                'y': data,
+                'mode': 'lines+markers',
+                'name': 'Daily',
+                'line': {'color': COLORS['primary'], 'width': 2},
+                'marker': {'size': 6, 'color': COLORS['primary']},
+                'hovertemplate': HOURS_HOVER,
+            },
+            {
+                'type': 'scatter',
+                'x': labels,
+                'y': moving_avg,
+                'mode': 'lines',
+                'name': '7-Day Avg',
+                'line': {'color': COLORS['grey_medium'], 'width': 2, 'dash': 'dash'},
+                'hovertemplate': '<b>%{x}</b><br>Avg: %{y:.1f}h<extra></extra>',
+            },
+        ],
+        title={'text': f"{title} - Last 30 Days"},
+        height=300,
+        hovermode='x unified',
+        font={'size': 11},
+        legend={**TOP_LEGEND, 'font': {'size': 10}},
+    )
+
+
+def skill_gauge(percent):
+    return spec(
+        [{
+            'type': 'indicator',
+            'mode': 'gauge+number',
+            'value': percent,
+            'title': {'text': "Progress %"},
+            'domain': {'x': [0, 1], 'y': [0, 1]},
+            'gauge': {
+                'axis': {'range': [0, 100], 'tickcolor': COLORS['grey_medium']},
+                'bar': {'color': COLORS['primary']},
+                'bgcolor': 'white',
+                'borderwidth': 2,
+                'bordercolor': COLORS['grey_light'],
+                'steps': [
+                    {'range': [0, 33], 'color': COLORS['extra_light']},
+                    {'range': [33, 66], 'color': COLORS['light']},
+                    {'range': [66, 100], 'color': COLORS['tertiary']},
+                ],
+            },
+        }],
+        height=150,
+        margin={'l': 30, 'r': 30, 't': 30, 'b': 30},
+    )
+
+
+# =====================================================
+# OVERVIEW CHARTS
+# =====================================================
+
+def overall_progress(labels, daily_data, cumulative_data):
+    return spec(
+        [
+            {
+                'type': 'bar',
+                'x': labels,
+                'y': daily_data,
+                'name': "Daily Hours",
+                'marker': {'color': COLORS['primary']},
+                'opacity': 0.7,
+                'hovertemplate': HOURS_HOVER,
+            },
+            {
+                'type': 'scatter',
+                'x': labels,
+                'y': cumulative_data,
+                'yaxis': 'y2',
+                'mode': 'lines+markers',
+                'name': "Cumulative Hours",
+                'line': {'color': COLORS['grey_dark'], 'width': 3},
+                'marker': {'size': 8, 'color': COLORS['grey_dark']},
+                'hovertemplate': '<b>%{x}</b><br>Total: %{y:.1f}h<extra></extra>',
+            },
+        ],
+        title={'text': "Overall Progress (Last 30 Days)"},
+        height=400,
+        hovermode='x unified',
+        margin={'l': 50, 'r': 50, 't': 50, 'b': 50},
+        legend=TOP_LEGEND,
+        xaxis={'tickangle': 45},
+        yaxis={'title': {'text': "Daily Hours"}},
+        yaxis2={
+            'title': {'text': "Cumulative Hours"},
+            'overlaying': 'y',
+            'side': 'right',
+            'gridcolor': COLORS['grey_extra_light'],
+        },
+    )
+
+
+def activity_heatmap(z, x, y, active):
+    """Hours per day; `active` flags the days with any progress logged, labelled even at 0h."""
+    return spec(
+        [{
+            'type': 'heatmap',
+            'z': z,
+            'x': x,
+            'y': y,
+            'colorscale': 'Blues',
+            'text': [
+                [f"{hours}h" if is_active else "" for hours, is_active in zip(week, active_week)]
+                for week, active_week in zip(z, active)
+            ],
+            'texttemplate': "%{text}",
+            'textfont': {'size': 10, 'color': 'white'},
+            'hoverongaps': False,
+            'colorbar': {'title': {'text': "Hours", 'side': "right"}},
+        }],
+        title={'text': "Weekly Activity Heatmap"},
+        height=300,
+    )
+
+
+def weekly_progress(labels, data):
+    return spec(
+        [{
+            'type': 'bar',
+            'x': labels,
+            'y': data,
+            'marker': {
+                'color': COLORS['secondary'],
+                'line': {'color': COLORS['grey_dark'], 'width': 1.5},
+            },
+            'text': [f"{d:.1f}h" for d in data],
+            'textposition': 'outside',
+            'hovertemplate': HOURS_HOVER,
+        }],
+        title={'text': "This Week's Progress"},
+        height=300,
+        showlegend=False,
+    )
@@ -0,0 +1,124 @@
+"""
+Completion state of skills and goals.
+
+The rules are: a skill whose goals are all completed is completed, and
+completing a skill completes its open goals. They used to live in
+``Skill.save`` and ``SkillGoal.save``, which re-counted the open goals and
+re-saved the skill (and updated every goal of a completed skill) on every
+save. Here each change is a conditional UPDATE that touches only the rows
+whose state actually changes, and nothing is written when nothing changes.
+
+update() bypasses the model signals, so the dashboard version of the
+affected users and the skills' goal counters are updated here.
+"""
+from django.db import transaction
+from django.db.models import Case, Exists, F, OuterRef, Q, Value, When
+from django.utils import timezone
+
+from .cache import bump_dashboard_version
+from .models import Skill, SkillGoal
+from .skill_stats import stat_expressions
+
+
+def complete_finished_skills(skill_ids):
+    """
+    Recount the completed goals of the skills in `skill_ids`, and mark the
+    ones that have goals, all of them completed, as completed.
+    """
+    goals = SkillGoal.objects.filter(skill=OuterRef('pk'))
+    completes = Q(Exists(goals), ~Exists(goals.filter(is_completed=False)), is_completed=False)
+    return Skill.objects.filter(pk__in=skill_ids).update(
+        updated_at=Case(When(completes, then=Value(timezone.now())), default=F('updated_at')),
+        is_completed=Case(When(completes, then=Value(True)), default=F('is_completed')),
+        **stat_expressions(['goals_completed']),
+    )
+
+
+def _complete_goals(goal_ids, skill_ids, user_ids):
+    updated = SkillGoal.objects.filter(pk__in=goal_ids, is_completed=False).update(
+        is_completed=True,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        complete_finished_skills(skill_ids)
+        for user_id in user_ids:
+            bump_dashboard_version(user_id)
+    return updated
+
+
+def complete_goal(goal):
+    """Complete `goal`, and its skill if that was its last open goal. Returns whether anything changed."""
+    if goal.is_completed:
+        return False
+    with transaction.atomic():
+        completed = _complete_goals([goal.pk], [goal.skill_id], [goal.user_id]) > 0
+    goal.is_completed = True
+    return completed
+
+
+@transaction.atomic
+def complete_goals(goals):
+    """Bulk variant of complete_goal for a SkillGoal queryset. Returns the number of goals completed."""
+    rows = list(goals.filter(is_completed=False).values_list('pk', 'skill_id', 'user_id'))
+    if not rows:
+        return 0
+    goal_ids, skill_ids, user_ids = zip(*rows)
+    return _complete_goals(goal_ids, set(skill_ids), set(user_ids))
+
+
+def _complete_skills(skill_ids, user_ids, deactivate):
+    # Every goal of the skill is completed below
+    changes = {'is_completed': True, 'goals_completed': F('goals_total')}
+    changed = Q(is_completed=False)
+    if deactivate:
+        changes['is_active'] = False
+        changed |= Q(is_active=True)
+
+    now = timezone.now()
+    updated = Skill.objects.filter(changed, pk__in=skill_ids).update(updated_at=now, **changes)
+    if updated:
+        SkillGoal.objects.filter(skill_id__in=skill_ids, is_completed=False).update(
+            is_completed=True,
+            updated_at=now,
+        )
+        for user_id in user_ids:
+            bump_dashboard_version(user_id)
+    return updated
+
+
+def complete_skill(skill, deactivate=False):
+    """Complete `skill` and its open goals, optionally deactivating it. Returns whether anything changed."""
+    if skill.is_completed and not (deactivate and skill.is_active):
+        return False
+    with transaction.atomic():
+        updated = _complete_skills([skill.pk], [skill.user_id], deactivate) > 0
+    skill.is_completed = True
+    skill.goals_completed = skill.goals_total
+    if deactivate:
+        skill.is_active = False
+    return updated
+
+
+@transaction.atomic
+def complete_skills(skills, deactivate=False):
+    """Bulk variant of complete_skill for a Skill queryset. Returns the number of skills changed."""
+    changed = Q(is_completed=False) | Q(is_active=True) if deactivate else Q(is_completed=False)
+    rows = list(skills.filter(changed).values_list('pk', 'user_id'))
+    if not rows:
+        return 0
+    skill_ids, user_ids = zip(*rows)
+    return _complete_skills(skill_ids, set(user_ids), deactivate)
+
+
+def reopen_skill(skill):
+    """Mark `skill` as active and not completed again. Its goals are left as they are."""
+    updated = (
+        Skill.objects
+        .filter(Q(is_completed=True) | Q(is_active=False), pk=skill.pk)
+        .update(is_completed=False, is_active=True, updated_at=timezone.now())
+    )
+    skill.is_completed = False
+    skill.is_active = True
+    if updated:
+        bump_dashboard_version(skill.user_id)
+    return updated > 0
@@ -0,0 +1,264 @@
+"""
+Dashboard statistics engine.
+
+Every series shown on the dashboard is derived from a handful of grouped
+queries over the user's daily rollups, plus the per-skill counters on the
+Skill rows; the per-day / per-skill breakdowns are then built in memory,
+so the number of queries does not depend on how many skills the user
+tracks.
+
+The summary (stat cards and overview charts) and the per-skill cards are
+built separately: the cards are served a page at a time by
+``build_skill_cards``.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Sum
+
+from .activity import get_activity_bitmap
+from .models import DailyStudyRollup, Skill
+from .timeseries import TimeSeries, cumulative, daily_totals, heatmap_grid, progress_rows, rolling_mean, to_list
+
+
+DAY_LABELS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+CHART_DAYS = 30
+HEATMAP_WEEKS = 4
+MONTHS_SHOWN = 6
+
+
+# =====================================================
+# WINDOW HELPERS
+# =====================================================
+
+def month_buckets(today):
+    """(label, year, month) for the monthly bar chart, oldest first."""
+    buckets = []
+    for i in range(MONTHS_SHOWN - 1, -1, -1):
+        month_date = today - timedelta(days=30 * i)
+        buckets.append((month_date.strftime('%b'), month_date.year, month_date.month))
+    return buckets
+
+
+def summary_window_start(today):
+    """Earliest date the summary series (overall, heatmap, weekly, monthly) need."""
+    return min(today - timedelta(days=30), today - timedelta(days=HEATMAP_WEEKS * 7))
+
+
+def skill_window_start(today):
+    """Earliest date the per-skill charts need."""
+    oldest_month = (today - timedelta(days=30 * (MONTHS_SHOWN - 1))).replace(day=1)
+    return min(oldest_month, today - timedelta(days=CHART_DAYS - 1))
+
+
+def last_days(today, days):
+    return [today - timedelta(days=i) for i in range(days - 1, -1, -1)]
+
+
+# =====================================================
+# QUERIES
+# =====================================================
+
+def fetch_time_series(user, skills, start, today):
+    """Skills x days matrix of logged hours between `start` and `today`."""
+    skill_ids = [skill.id for skill in skills]
+    return TimeSeries.from_rows(
+        progress_rows(user, start, today).filter(skill_id__in=skill_ids),
+        start, today,
+        skill_ids=skill_ids,
+    )
+
+
+def fetch_skill_totals(user):
+    """Status and counters of every skill of `user`, in id order."""
+    return list(
+        Skill.objects.filter(user=user)
+        .order_by('id')
+        .values(
+            'id', 'title', 'is_active', 'is_completed',
+            'total_hours', 'progress_days', 'goals_total', 'goals_completed',
+        )
+    )
+
+
+# =====================================================
+# SERIES BUILDERS
+# =====================================================
+
+def build_skill_series(series, skills, today):
+    days = last_days(today, CHART_DAYS)
+    labels = [day.strftime("%d %b") for day in days]
+    buckets = month_buckets(today)
+
+    daily = series.last(CHART_DAYS)
+    moving_avg = rolling_mean(daily)
+    monthly = series.month_totals([(year, month) for _, year, month in buckets])
+    months = [label for label, _, _ in buckets]
+
+    return [
+        {
+            'skill': skill,
+            'months': months,
+            'monthly_data': to_list(monthly[i]),
+            'labels': labels,
+            'data': to_list(daily[i]),
+            'moving_avg': to_list(moving_avg[i], 1),
+        }
+        for i, skill in enumerate(skills)
+    ]
+
+
+def add_skill_totals(skill_series):
+    for series in skill_series:
+        skill = series['skill']
+        goal_hours = skill.goal_hours or 0
+        percent = int((skill.total_hours / goal_hours) * 100) if goal_hours > 0 else 0
+
+        series.update({
+            'goals_completed': skill.goals_completed,
+            'goals_active': skill.goals_total - skill.goals_completed,
+            'percent': min(percent, 100),
+            'total_hours': skill.total_hours,
+            'avg_daily': round(skill.avg_hours, 1),
+            'total_days': skill.progress_days,
+        })
+    return skill_series
+
+
+def build_overall_series(totals, today):
+    days = last_days(today, CHART_DAYS)
+    daily_data = totals[-CHART_DAYS:]
+
+    return {
+        'labels': [day.strftime("%d %b") for day in days],
+        'daily': to_list(daily_data),
+        'cumulative': to_list(cumulative(daily_data)),
+    }
+
+
+def build_heatmap(totals, activity, today):
+    return {
+        'z': heatmap_grid(totals, HEATMAP_WEEKS).tolist(),
+        'active': activity.grid(today, HEATMAP_WEEKS),
+        'x': DAY_LABELS,
+        'y': [f"Week {w+1}" for w in range(HEATMAP_WEEKS)],
+    }
+
+
+def build_weekly_series(totals, today):
+    days = last_days(today, 7)
+    return {
+        'labels': [day.strftime("%a") for day in days],
+        'data': to_list(totals[-7:].astype(float)),
+    }
+
+
+def build_skill_performance(skill_totals):
+    performance = []
+    for row in skill_totals:
+        days = row['progress_days']
+        if not days:
+            continue
+        performance.append({
+            'skill': row['title'],
+            'total': row['total_hours'],
+            'avg': round(row['total_hours'] / days, 1),
+            'days': days,
+            'consistency': round((days / 30) * 100, 1),
+        })
+
+    performance.sort(key=lambda x: x['total'], reverse=True)
+    return performance
+
+
+# =====================================================
+# ENTRY POINTS
+# =====================================================
+
+def build_dashboard_stats(user, today=None):
+    """Summary stats and overview series; independent of the number of skills charted."""
+    today = today or date.today()
+
+    totals = daily_totals(user, summary_window_start(today), today)
+    skill_totals = fetch_skill_totals(user)
+    activity = get_activity_bitmap(user)
+
+    goal_total = sum(row['goals_total'] for row in skill_totals)
+    goal_completed = sum(row['goals_completed'] for row in skill_totals)
+    goal_completion = int((goal_completed / goal_total) * 100) if goal_total else 0
+
+    total_study_time = sum(row['total_hours'] for row in skill_totals)
+    today_progress = int(totals[-1])
+    weekly_progress = int(totals[-8:].sum())
+    monthly_progress = int(totals[-31:].sum())
+
+    streak = activity.current_streak(today)
+    total_days_active = activity.active_days
+
+    return {
+        'total_skills': len(skill_totals),
+        'active_skills': sum(row['is_active'] for row in skill_totals),
+        'completed_skills': sum(row['is_completed'] for row in skill_totals),
+        'goal_total': goal_total,
+        'goal_completed': goal_completed,
+        'goal_active': goal_total - goal_completed,
+        'goal_completion': goal_completion,
+        'total_study_time': total_study_time,
+        'today_progress': today_progress,
+        'weekly_progress': weekly_progress,
+        'monthly_progress': monthly_progress,
+        'streak': streak,
+        'longest_streak': activity.longest_streak,
+        'productivity_score': round((streak * 2) + (weekly_progress * 1.5) + (goal_completion * 1.2), 2),
+        'total_days_active': total_days_active,
+        'avg_daily_time': total_study_time / total_days_active if total_days_active > 0 else 0,
+        'overall': build_overall_series(totals, today),
+        'heatmap': build_heatmap(totals, activity, today),
+        'weekly': build_weekly_series(totals, today),
+        'skill_performance': build_skill_performance(skill_totals),
+    }
+
+
+def build_skill_cards(user, skills, today=None):
+    """Per-skill chart series and totals for `skills` (one page of cards, annotated with_goal_hours())."""
+    today = today or date.today()
+    skills = list(skills)
+
+    series = fetch_time_series(user, skills, skill_window_start(today), today)
+    return add_skill_totals(build_skill_series(series, skills, today))
+
+
+def build_window_stats(user, days, today=None):
+    """Stats and the daily series for the last `days` days only (refresh API)."""
+    today = today or date.today()
+    start = today - timedelta(days=days - 1)
+
+    totals = daily_totals(user, start, today)
+    skill_hours = DailyStudyRollup.objects.filter(user=user, date__gte=start, date__lte=today) \
+        .values('skill_id', 'skill__title') \
+        .annotate(hours=Sum('actual_hours')) \
+        .order_by('-hours', 'skill_id')
+
+    total_hours = int(totals.sum())
+    active_days = int((totals > 0).sum())
+
+    return {
+        'days': days,
+        'start': start.isoformat(),
+        'end': today.isoformat(),
+        'stats': {
+            'total_hours': total_hours,
+            'active_days': active_days,
+            'avg_daily': round(total_hours / active_days, 1) if active_days else 0,
+            'today': int(totals[-1]),
+        },
+        'series': {
+            'labels': [day.strftime("%d %b") for day in last_days(today, days)],
+            'daily': to_list(totals),
+            'cumulative': to_list(cumulative(totals)),
+            'moving_avg': to_list(rolling_mean(totals), 1),
+        },
+        'skills': [
+            {'id': row['skill_id'], 'title': row['skill__title'], 'hours': row['hours']}
+            for row in skill_hours
+        ],
+    }
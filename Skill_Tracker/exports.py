@@ -0,0 +1,98 @@
+"""
+Streaming CSV / NDJSON exports of a user's data.
+
+Each export is a StreamingHttpResponse over ``QuerySet.iterator()``: rows
+are fetched from the database in chunks (through a server-side cursor on
+PostgreSQL) and encoded as they are sent, so memory use does not grow with
+the number of rows and the first bytes leave before the query has been
+read to the end. The skill title comes from the same query through
+``select_related('skill')``.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import NoteLibrary, Skill, SkillGoal, SkillProgress
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Columns of each export; 'skill' is the skill title. File fields are
+# exported as their stored name.
+EXPORTS = {
+    'progress': (SkillProgress, [
+        'id', 'skill_id', 'skill', 'date', 'planned_time', 'actual_time', 'extra_time',
+        'is_completed', 'project_done', 'project_update', 'certification_done',
+        'certificate_file', 'topics_done', 'new_topic_done', 'topic_notes', 'notes_file',
+        'confidence_level', 'marks_yourself', 'feedback_or_points', 'created_at', 'updated_at',
+    ]),
+    'goals': (SkillGoal, [
+        'id', 'skill_id', 'skill', 'goal_description', 'start_date', 'target_date',
+        'daily_study_hours', 'is_completed', 'roadmap', 'created_at', 'updated_at',
+    ]),
+    'skills': (Skill, [
+        'id', 'title', 'description', 'proficiency_level', 'start_date', 'last_practiced',
+        'is_active', 'is_completed', 'total_hours', 'progress_days', 'goals_total',
+        'goals_completed', 'last_entry_date', 'created_at', 'updated_at',
+    ]),
+    'notes': (NoteLibrary, [
+        'id', 'skill_id', 'skill', 'title', 'note_type', 'file', 'uploaded_at',
+    ]),
+}
+
+
+class Echo:
+    """File-like object whose write() returns the line, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(user, kind):
+    """The (header, rows) of export `kind` for `user`; rows is a lazy iterator of value lists."""
+    model, fields = EXPORTS[kind]
+    queryset = model.objects.for_user(user).order_by('pk')
+    if 'skill' in fields:
+        queryset = queryset.with_skill()
+
+    def values(obj):
+        row = []
+        for field in fields:
+            value = obj.skill.title if field == 'skill' else getattr(obj, field)
+            if hasattr(value, 'field'):  # FieldFile
+                value = value.name or None
+            row.append(value)
+        return row
+
+    return fields, (values(obj) for obj in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE))
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(['' if value is None else value for value in row])
+
+
+def stream_ndjson(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def export_response(user, kind, fmt):
+    """A StreamingHttpResponse with export `kind` of `user`'s data in format `fmt`."""
+    header, rows = export_rows(user, kind)
+    stream = stream_csv if fmt == 'csv' else stream_ndjson
+    response = StreamingHttpResponse(stream(header, rows), content_type=EXPORT_FORMATS[fmt])
+    filename = f'skilltracker-{kind}-{timezone.localdate().isoformat()}.{fmt}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['Cache-Control'] = 'private, no-store'
+    return response
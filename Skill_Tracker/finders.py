@@ -0,0 +1,31 @@
+import os
+
+import plotly
+from django.contrib.staticfiles.finders import BaseFinder
+from django.core.files.storage import FileSystemStorage
+
+
+class PlotlyJSFinder(BaseFinder):
+    """
+    Expose the plotly.js bundle shipped with the plotly package as the
+    static file ``plotly/plotly.min.js``, so the browser version always
+    matches the Python one and the manifest storage can hash and compress it.
+    """
+    prefix = 'plotly'
+    filename = 'plotly.min.js'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.storage = FileSystemStorage(
+            location=os.path.join(os.path.dirname(plotly.__file__), 'package_data')
+        )
+        self.storage.prefix = self.prefix
+
+    def find(self, path, find_all=False, **kwargs):
+        if path != f'{self.prefix}/{self.filename}':
+            return [] if find_all else None
+        match = self.storage.path(self.filename)
+        return [match] if find_all else match
+
+    def list(self, ignore_patterns):
+        yield self.filename, self.storage
@@ -1,3 +1,5 @@
+from datetime import date
+
 from django import forms
 from .models import *
 
@@ -59,7 +61,7 @@ class SkillGoalForm(forms.ModelForm):
         user = kwargs.pop('user', None)  # accept user
         super().__init__(*args, **kwargs)
         if user:
-            self.fields['skill'].queryset = Skill.objects.filter(user=user)
+            self.fields['skill'].queryset = Skill.objects.for_user(user).select_related('user')
             
 class SkillProgressForm(forms.ModelForm):
     class Meta:
@@ -138,3 +140,37 @@ class NoteLibraryForm(forms.ModelForm):
     class Meta:
         model = NoteLibrary
         fields = ['title', 'note_type', 'file']
+
+
+class ProgressRowForm(SkillProgressForm):
+    """
+    One row of a progress import: the SkillProgressForm rules, without the
+    file fields, plus the day and the planned hours (extra_time is derived).
+    """
+
+    date = forms.DateField()
+
+    class Meta(SkillProgressForm.Meta):
+        fields = [
+            field for field in SkillProgressForm.Meta.fields
+            if field not in ('certificate_file', 'notes_file')
+        ] + ['planned_time']
+
+    def clean_date(self):
+        day = self.cleaned_data['date']
+        if day > date.today():
+            raise forms.ValidationError("Progress cannot be logged for a future date.")
+        return day
+
+
+class ProgressImportForm(forms.Form):
+    file = forms.FileField(
+        help_text="CSV with a header row, or NDJSON / a JSON array of objects. "
+                  "Columns: skill (title), date, actual_time and optionally the other progress fields.",
+        widget=forms.FileInput(attrs={'class': 'form-control-file', 'accept': '.csv,.json,.ndjson,.jsonl'}),
+    )
+    replace = forms.BooleanField(
+        required=False,
+        label="Overwrite existing entries for the same skill and day",
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+    )
@@ -0,0 +1,245 @@
+"""
+Bulk import of progress history.
+
+``import_progress`` reads a CSV or JSON file row by row, validates each
+row with the ProgressRowForm rules (those of SkillProgressForm plus the
+day) and writes the valid rows with one ``bulk_create`` per batch. Only
+one batch and a bounded number of error messages are held in memory at a
+time, so the size of the file does not matter.
+
+Rows name their skill by title; the user's skills are looked up once. An
+entry that already exists for the same (user, skill, date) is kept, or
+overwritten with ``replace``. extra_time is derived from the actual and
+planned hours, as when progress is logged. bulk_create() bypasses the
+model signals, so the rollups of each batch's (skill, date) keys are
+recomputed after it is written, and the imported days, the skill counters
+and the search documents of the imported skills are updated once at the
+end instead of per row.
+"""
+import csv
+import io
+import json
+import os
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Coalesce, Greatest
+
+from .activity import mark_activity_days
+from .cache import bump_dashboard_version
+from .forms import ProgressRowForm
+from .models import Skill, SkillProgress
+from .rollups import refresh_rollups
+from .search import index_queryset
+from .skill_stats import recount_skill_stats
+
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 50
+
+IMPORT_FORMATS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+# Written on conflict when `replace` is set
+REPLACED_FIELDS = [*ProgressRowForm.Meta.fields, 'extra_time', 'updated_at']
+
+# Model defaults for columns a row leaves out or empty
+ROW_DEFAULTS = {
+    name: SkillProgress._meta.get_field(name).get_default()
+    for name in ProgressRowForm.Meta.fields
+    if SkillProgress._meta.get_field(name).has_default()
+}
+
+
+class ImportFormatError(ValueError):
+    """The file cannot be parsed as the given format."""
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Row {line}: {message}")
+
+
+def import_format(filename):
+    """The import format of `filename` from its extension, or None."""
+    return IMPORT_FORMATS.get(os.path.splitext(filename)[1].lower())
+
+
+def read_rows(stream, fmt):
+    """Yield (line number, dict) for each row of the text `stream`."""
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    if fmt == 'json':
+        # A JSON array has to be parsed whole; NDJSON is read line by line
+        start = stream.read(1)
+        while start.isspace():
+            start = stream.read(1)
+        if start == '[':
+            try:
+                rows = json.loads(start + stream.read())
+            except ValueError as error:
+                raise ImportFormatError(f"Invalid JSON: {error}") from error
+            for number, row in enumerate(rows, start=1):
+                yield number, row
+            return
+        stream = _prepend(start, stream)
+
+    for number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except ValueError as error:
+                raise ImportFormatError(f"Line {number} is not valid JSON: {error}") from error
+
+
+def _prepend(text, stream):
+    first = next(stream, '')
+    yield text + first
+    yield from stream
+
+
+def open_upload(upload):
+    """A text stream over an uploaded file, decoded as UTF-8 (with or without BOM)."""
+    return io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+
+
+class RowValidator:
+    """
+    ProgressRowForm's field rules and clean_<field>() hooks, applied to one
+    row at a time. Binding a new form per row deep-copies every field and
+    widget and runs the model validation a second time, which made up most
+    of the cost of an import; the fields of one form are reused instead.
+    """
+
+    def __init__(self, user):
+        self.form = ProgressRowForm(user=user)
+
+    def clean(self, data):
+        """The cleaned values of `data` and the error messages per field."""
+        form = self.form
+        form.cleaned_data = {}
+        errors = {}
+        for name, form_field in form.fields.items():
+            try:
+                form.cleaned_data[name] = form_field.clean(form_field.widget.value_from_datadict(data, {}, name))
+                if hasattr(form, f'clean_{name}'):
+                    form.cleaned_data[name] = getattr(form, f'clean_{name}')()
+            except ValidationError as error:
+                form.cleaned_data.pop(name, None)
+                errors[name] = error.messages
+        return form.cleaned_data, errors
+
+
+def validate_row(row, skills, user, validator):
+    """A SkillProgress built from `row`, or the error message."""
+    if not isinstance(row, dict):
+        return None, "not an object"
+
+    data = {name: value for name, value in row.items() if value not in (None, '')}
+    skill_id = skills.get(str(data.pop('skill', '')).strip())
+    if skill_id is None:
+        return None, f"unknown skill {row.get('skill')!r}"
+
+    values, errors = validator.clean({**ROW_DEFAULTS, **data})
+    if errors:
+        return None, '; '.join(f"{name}: {' '.join(messages)}" for name, messages in errors.items())
+    values['extra_time'] = max(values['actual_time'] - values['planned_time'], 0)
+    return SkillProgress(user=user, skill_id=skill_id, **values), None
+
+
+def write_batch(user, batch, replace):
+    """Write the entries of `batch` and recompute the rollups of its keys."""
+    entries = list(batch.values())
+    if replace:
+        SkillProgress.objects.bulk_create(
+            entries,
+            update_conflicts=True,
+            unique_fields=['user', 'skill', 'date'],
+            update_fields=REPLACED_FIELDS,
+        )
+    else:
+        SkillProgress.objects.bulk_create(entries, ignore_conflicts=True)
+    refresh_rollups(user.id, batch)
+
+
+@transaction.atomic
+def import_progress(user, stream, fmt, replace=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Import the progress rows of the text `stream` in format `fmt` ('csv',
+    'json' or 'ndjson') for `user`. Invalid rows are reported and left out.
+    Raises ImportFormatError if the file itself cannot be parsed.
+    """
+    skills = {}
+    for skill_id, title in Skill.objects.for_user(user).order_by('-pk').values_list('pk', 'title'):
+        skills[title.strip()] = skill_id  # the oldest skill wins a shared title
+
+    result = ImportResult()
+    validator = RowValidator(user)
+    existing = SkillProgress.objects.for_user(user).count()
+    imported_skills = set()
+    imported_days = set()
+    written = 0
+
+    # Keyed by (skill, date): a later row for the same day replaces an
+    # earlier one, which a single INSERT .. ON CONFLICT could not do
+    batch = {}
+    for line, row in read_rows(stream, fmt):
+        result.rows += 1
+        progress, error = validate_row(row, skills, user, validator)
+        if error:
+            result.add_error(line, error)
+            continue
+
+        batch[progress.skill_id, progress.date] = progress
+        if len(batch) >= batch_size:
+            write_batch(user, batch, replace)
+            written += len(batch)
+            imported_skills.update(skill_id for skill_id, _ in batch)
+            imported_days.update(day for _, day in batch)
+            batch = {}
+
+    if batch:
+        write_batch(user, batch, replace)
+        written += len(batch)
+        imported_skills.update(skill_id for skill_id, _ in batch)
+        imported_days.update(day for _, day in batch)
+
+    if not imported_skills:
+        return result
+
+    # Counted from the de-duplicated batches: a row replaced by a later
+    # one for the same day was never written
+    result.created = SkillProgress.objects.for_user(user).count() - existing
+    if replace:
+        result.updated = written - result.created
+    else:
+        result.skipped = written - result.created
+
+    mark_activity_days(user.id, imported_days)
+    recount_skill_stats(imported_skills)
+    Skill.objects.filter(pk__in=imported_skills).update(
+        last_practiced=Greatest(Coalesce(F('last_practiced'), F('last_entry_date')), F('last_entry_date')),
+    )
+    index_queryset(SkillProgress.objects.filter(skill_id__in=imported_skills), batch_size)
+    bump_dashboard_version(user.id)
+    return result
@@ -0,0 +1,157 @@
+import json
+import re
+import time
+import tracemalloc
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from Skill_Tracker.cache import bump_dashboard_version
+from Skill_Tracker.middleware import QueryRecorder
+
+
+BENCHMARK_VIEWS = [
+    'dashboard',
+    'user_index',
+    'skill_list',
+    'view_goals',
+    'skill_progress_list',
+    'note_library',
+]
+
+# The test client talks to 'testserver', and a local checkout usually has
+# no collectstatic manifest for the production storage to resolve against.
+BENCHMARK_SETTINGS = {
+    'ALLOWED_HOSTS': ['testserver'],
+    'STORAGES': {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the analytics views through the test client and report p50/p95 "
+        "latency, query count and peak memory as JSON. Seed users first with "
+        "the seed_workload command."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help="Benchmark as this user (can be repeated). Defaults to every user named <prefix>N.",
+        )
+        parser.add_argument('--prefix', default='bench', help="Username prefix of seeded users.")
+        parser.add_argument(
+            '--view',
+            action='append',
+            dest='views',
+            choices=BENCHMARK_VIEWS,
+            help="Only benchmark this view (can be repeated).",
+        )
+        parser.add_argument('--requests', type=int, default=20, help="Timed requests per view and user.")
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed requests per view and user.")
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help="Invalidate the user's dashboard cache before every request.",
+        )
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("--requests must be at least 1.")
+        users = self.get_users(options)
+        views = options['views'] or BENCHMARK_VIEWS
+
+        with override_settings(**BENCHMARK_SETTINGS):
+            results = {
+                name: self.benchmark_view(name, users, options)
+                for name in views
+            }
+
+        report = json.dumps({
+            'database': connection.vendor,
+            'users': [user.username for user in users],
+            'requests': options['requests'],
+            'cold': options['cold'],
+            'views': results,
+        }, indent=2)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(report + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        else:
+            self.stdout.write(report)
+
+    def get_users(self, options):
+        if options['usernames']:
+            users = list(User.objects.filter(username__in=options['usernames']))
+            missing = set(options['usernames']) - {user.username for user in users}
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+        else:
+            users = list(User.objects.filter(username__regex=rf"^{re.escape(options['prefix'])}\d+$").order_by('id'))
+        if not users:
+            raise CommandError("No users to benchmark; run seed_workload first.")
+        return users
+
+    def request(self, client, user, url, cold):
+        if cold:
+            bump_dashboard_version(user.id)
+        return client.get(url)
+
+    def benchmark_view(self, name, users, options):
+        url = reverse(name)
+        timings = []
+        queries = []
+        sql_time = []
+        peak = 0
+        status = None
+
+        for user in users:
+            client = Client()
+            client.force_login(user)
+
+            for _ in range(options['warmup']):
+                self.request(client, user, url, options['cold'])
+
+            for _ in range(options['requests']):
+                if options['cold']:
+                    bump_dashboard_version(user.id)
+                recorder = QueryRecorder()
+                with connection.execute_wrapper(recorder):
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    timings.append(time.perf_counter() - start)
+                queries.append(recorder.count)
+                sql_time.append(recorder.duration)
+                status = response.status_code
+
+            # Memory is measured on a separate request: tracemalloc slows
+            # down every allocation and would distort the timings above
+            tracemalloc.start()
+            self.request(client, user, url, options['cold'])
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+        timings_ms = np.array(timings) * 1000
+        return {
+            'url': url,
+            'status': status,
+            'p50_ms': round(float(np.percentile(timings_ms, 50)), 2),
+            'p95_ms': round(float(np.percentile(timings_ms, 95)), 2),
+            'mean_ms': round(float(timings_ms.mean()), 2),
+            'queries': int(np.median(queries)),
+            'max_queries': max(queries),
+            'sql_ms': round(float(np.median(sql_time)) * 1000, 2),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from Skill_Tracker.storage import ContentAddressedStorage, adopt_legacy_files, collect_blobs, recount_blobs
+
+
+class Command(BaseCommand):
+    help = "Delete stored blobs that no note, roadmap or certificate points at any more."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=1,
+            help="Keep unreferenced blobs that were referenced or uploaded this recently (default 1).",
+        )
+        parser.add_argument(
+            '--recount',
+            action='store_true',
+            help="Recompute the reference counts from the tables first.",
+        )
+        parser.add_argument(
+            '--adopt',
+            action='store_true',
+            help="First move files uploaded before blob storage into it, deduplicating them.",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only report what would be moved and deleted.",
+        )
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, ContentAddressedStorage):
+            raise CommandError("The default storage is not ContentAddressedStorage.")
+        dry_run = options['dry_run']
+
+        if options['adopt']:
+            moved = adopt_legacy_files(dry_run=dry_run)
+            self.stdout.write(f"{'Would move' if dry_run else 'Moved'} {moved} file reference(s) into blob storage.")
+
+        if options['recount'] and not dry_run:
+            corrected = recount_blobs()
+            self.stdout.write(f"Corrected {corrected} reference count(s).")
+
+        collected, size = collect_blobs(timedelta(hours=options['grace_hours']), dry_run=dry_run)
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would delete' if dry_run else 'Deleted'} {collected} unreferenced blob(s), {size} bytes."
+        ))
@@ -0,0 +1,99 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from Skill_Tracker.models import DailyStudyRollup, NoteLibrary, Skill, SkillGoal, SkillProgress
+from Skill_Tracker.pagination import after_key
+
+
+# Plan fragments meaning "read the whole table" on the supported backends
+FULL_SCAN_MARKERS = {
+    'sqlite': ['SCAN Skill_Tracker_', 'SCAN auth_user'],
+    'postgresql': ['Seq Scan'],
+    'mysql': ['type: ALL', "'type': 'ALL'"],
+}
+
+
+def hot_queries(user):
+    """(name, queryset) for the queries the views run on every page load."""
+    today = date.today()
+    now = timezone.now()
+    skill = Skill.objects.for_user(user).first()
+
+    queries = [
+        ('dashboard: daily totals',
+         DailyStudyRollup.objects.filter(user=user, date__gte=today - timedelta(days=30), date__lte=today)
+         .values_list('date').annotate(total=Sum('actual_hours')).order_by()),
+        ('dashboard: recent progress',
+         SkillProgress.objects.for_user(user).with_skill().order_by('-date', '-id')[:10]),
+        ('dashboard: ETag',
+         SkillProgress.objects.filter(user=user).values('user').annotate(latest=Max('updated_at'), count=Count('id'))),
+        ('activity: progress on a day',
+         SkillProgress.objects.filter(user=user, date=today)),
+        ('skill_progress_list: page after a cursor',
+         SkillProgress.objects.for_user(user).with_skill()
+         .filter(after_key(['-date', '-id'], [today - timedelta(days=30), 0]))
+         .order_by('-date', '-id')[:51]),
+        ('note library: page after a cursor',
+         NoteLibrary.objects.for_user(user).with_skill()
+         .filter(after_key(['-uploaded_at', '-id'], [now - timedelta(days=30), 0]))
+         .order_by('-uploaded_at', '-id')[:51]),
+        ('reset_password: user by email',
+         User.objects.filter(email=user.email or 'user@example.com')),
+    ]
+    if skill is not None:
+        queries += [
+            ('add_skill_progress: current goal',
+             SkillGoal.objects.filter(user=user, skill=skill, is_completed=False).order_by('-created_at')[:1]),
+            ("add_skill_progress: merge into today's entry",
+             SkillProgress.objects.filter(user=user, skill=skill, date=today)),
+        ]
+    return queries
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot dashboard/list queries and flag any that scan a whole table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Explain the queries as this user (default: the first user).")
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help="Run EXPLAIN ANALYZE (PostgreSQL) to include actual timings.",
+        )
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"Unknown user: {options['user']}")
+        else:
+            user = User.objects.order_by('id').first()
+            if user is None:
+                raise CommandError("No users in the database; run seed_workload first.")
+
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options['analyze'] = True
+
+        markers = FULL_SCAN_MARKERS.get(connection.vendor, [])
+        full_scans = 0
+
+        for name, queryset in hot_queries(user):
+            plan = queryset.explain(**explain_options)
+            scans = any(marker in plan for marker in markers)
+            full_scans += scans
+
+            style = self.style.WARNING if scans else self.style.SUCCESS
+            self.stdout.write(style(f"== {name}{' (full scan)' if scans else ''}"))
+            self.stdout.write(plan)
+            self.stdout.write('')
+
+        if full_scans:
+            self.stdout.write(self.style.WARNING(f"{full_scans} quer{'y' if full_scans == 1 else 'ies'} scan a whole table."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Every hot query uses an index."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from Skill_Tracker.models import NoteLibrary
+from Skill_Tracker.previews import generate_preview
+
+
+class Command(BaseCommand):
+    help = "Create the missing previews of the note library files (notes added before previews existed)."
+
+    def handle(self, *args, **options):
+        names = (
+            NoteLibrary.objects
+            .exclude(file='')
+            .order_by()
+            .values_list('file', flat=True)
+            .distinct()
+        )
+        created = skipped = 0
+        for name in names.iterator():
+            try:
+                preview = generate_preview(name)
+            except Exception as error:
+                self.stderr.write(f"{name}: {error}")
+                preview = None
+            if preview:
+                created += 1
+            else:
+                skipped += 1
+        self.stdout.write(self.style.SUCCESS(f"{created} file(s) have a preview, {skipped} without one."))
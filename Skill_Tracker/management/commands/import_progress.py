@@ -0,0 +1,54 @@
+import csv
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from Skill_Tracker.imports import IMPORT_BATCH_SIZE, ImportFormatError, import_format, import_progress
+
+
+class Command(BaseCommand):
+    help = "Import progress history for a user from a CSV, JSON or NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'json', 'ndjson'],
+            help="File format; guessed from the extension by default.",
+        )
+        parser.add_argument(
+            '--replace',
+            action='store_true',
+            help="Overwrite existing entries for the same skill and day instead of keeping them.",
+        )
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown user: {options['username']}")
+
+        fmt = options['format'] or import_format(options['path'])
+        if fmt is None:
+            raise CommandError("Cannot tell the file format from its extension; pass --format.")
+
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                result = import_progress(
+                    user,
+                    stream,
+                    fmt,
+                    replace=options['replace'],
+                    batch_size=options['batch_size'],
+                )
+        except (OSError, ImportFormatError, UnicodeDecodeError, csv.Error) as error:
+            raise CommandError(f"Could not import {options['path']}: {error}")
+
+        for error in result.errors:
+            self.stderr.write(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {result.rows} rows: {result.created} created, {result.updated} updated, "
+            f"{result.skipped} already logged, {result.error_count} invalid."
+        ))
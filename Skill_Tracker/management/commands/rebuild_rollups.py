@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from Skill_Tracker.activity import rebuild_activity_bitmaps
+from Skill_Tracker.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild (or backfill) the daily rollups and activity bitmaps from SkillProgress."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help="Only rebuild rollups for this username (can be repeated).",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        user_ids = None
+        users = User.objects.all()
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+            user_ids = list(users.values_list('id', flat=True))
+
+        created = rebuild_rollups(user_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {created} daily rollup rows."))
+
+        rebuilt = rebuild_activity_bitmaps(users.iterator())
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} activity bitmaps."))
@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from Skill_Tracker.models import Skill
+from Skill_Tracker.skill_stats import recount_skill_stats, stale_skills
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-skill counters (hours, days, goals) from SkillProgress and SkillGoal."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help="Only recount the skills of this username (can be repeated).",
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help="Recount every skill, not only the ones whose counters have drifted.",
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help="Only report how many skills have drifted.",
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        skills = Skill.objects.all()
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(users.values_list('username', flat=True))
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+            skills = skills.filter(user__in=users)
+
+        stale = list(stale_skills(skills).values_list('pk', flat=True))
+        self.stdout.write(f"{len(stale)} skill(s) with drifted counters.")
+        if options['dry_run']:
+            return
+
+        skill_ids = skills.values_list('pk', flat=True) if options['all'] else stale
+        updated = recount_skill_stats(skill_ids, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Recounted {updated} skill(s)."))
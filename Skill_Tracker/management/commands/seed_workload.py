@@ -0,0 +1,39 @@
+import random
+
+from django.core.management.base import BaseCommand
+
+from Skill_Tracker.workload import SEED_PASSWORD, Workload, seed_user
+
+
+class Command(BaseCommand):
+    help = "Seed synthetic users with skills, goals, progress history and notes for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1, help="Number of users to create.")
+        parser.add_argument('--skills', type=int, default=5, help="Skills per user.")
+        parser.add_argument('--goals', type=int, default=2, help="Goals per skill.")
+        parser.add_argument('--days', type=int, default=90, help="Days of progress history per skill.")
+        parser.add_argument('--notes', type=int, default=2, help="Notes per skill.")
+        parser.add_argument('--activity', type=float, default=0.6, help="Share of days with progress (0-1).")
+        parser.add_argument('--completed', type=float, default=0.3, help="Share of goals already completed (0-1).")
+        parser.add_argument('--prefix', default='bench', help="Username prefix; existing users are replaced.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, for reproducible workloads.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        workload = Workload(
+            skills=options['skills'],
+            goals=options['goals'],
+            days=options['days'],
+            notes=options['notes'],
+            activity=options['activity'],
+            completed=options['completed'],
+        )
+
+        for i in range(options['users']):
+            user = seed_user(f"{options['prefix']}{i + 1}", workload, rng=rng)
+            self.stdout.write(f"Seeded {user.username}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {options['users']} user(s) (password: {SEED_PASSWORD!r})."
+        ))
@@ -0,0 +1,144 @@
+"""
+Responses for the uploaded files (notes, roadmaps, certificates).
+
+``media_response`` serves one stored file with the headers a browser or a
+proxy needs to avoid transferring it again: an ETag (the SHA-256 already
+in a blob's name, or size and mtime for older files) and Last-Modified,
+answering conditional requests with 304, and single byte ranges with 206
+so PDF viewers can load large files progressively.
+
+The body is a FileResponse over the open file, which the WSGI server can
+send with sendfile(). With MEDIA_OFFLOAD set, the body is left to the
+front proxy instead: the response only names the file in an
+X-Accel-Redirect (nginx) or X-Sendfile (Apache, lighttpd) header.
+"""
+import mimetypes
+import re
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.db.models import Exists, OuterRef, Q
+from django.http import FileResponse, HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags, quote_etag
+
+from .storage import BLOB_FIELDS, BLOB_PREFIX
+
+
+# Blobs never change: their name is the hash of their content
+BLOB_CACHE_CONTROL = 'private, max-age=31536000, immutable'
+FILE_CACHE_CONTROL = 'private, no-cache'
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def owns_file(user, name):
+    """Whether any note, goal or progress entry of `user` points at the stored file `name`."""
+    references = Q()
+    for model, fields in BLOB_FIELDS.items():
+        for field in fields:
+            references |= Exists(model.objects.filter(user=OuterRef('pk'), **{field: name}))
+    return User.objects.filter(references, pk=user.pk).exists()
+
+
+def file_etag(name, size, modified):
+    if name.startswith(BLOB_PREFIX):
+        return quote_etag(name.rsplit('/', 1)[-1].split('.', 1)[0])
+    return quote_etag(f'{size:x}-{int(modified.timestamp()):x}')
+
+
+def parse_range(header, size):
+    """
+    The (start, end) bytes, inclusive, of a single-range Range header;
+    None to serve the whole file (no header, several ranges, or a syntax
+    error, which the spec says to ignore); or False if it cannot be
+    satisfied.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        # Suffix range: the last `end` bytes
+        length = int(end)
+        return (max(size - length, 0), size - 1) if length and size else False
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+class RangeFile:
+    """Read-only view of `length` bytes of `file` from `start`."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def offload_response(name, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_OFFLOAD == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + name
+    else:
+        response['X-Sendfile'] = default_storage.path(name)
+    return response
+
+
+def media_response(request, name):
+    """Serve the stored file `name` (which must exist), honouring conditional and range requests."""
+    size = default_storage.size(name)
+    modified = default_storage.get_modified_time(name)
+    etag = file_etag(name, size, modified)
+    last_modified = int(modified.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if settings.MEDIA_OFFLOAD:
+            # The proxy handles ranges and conditional requests itself
+            response = offload_response(name, content_type)
+        else:
+            response = file_response(request, name, size, etag, content_type)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = BLOB_CACHE_CONTROL if name.startswith(BLOB_PREFIX) else FILE_CACHE_CONTROL
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def file_response(request, name, size, etag, content_type):
+    byte_range = parse_range(request.headers.get('Range'), size)
+    if_range = request.headers.get('If-Range')
+    if byte_range is not None and if_range and etag not in parse_etags(if_range):
+        # The client's partial copy is outdated: send the whole file
+        byte_range = None
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = default_storage.open(name, 'rb')
+    if byte_range is None:
+        return FileResponse(file, content_type=content_type)
+
+    start, end = byte_range
+    response = FileResponse(RangeFile(file, start, end - start + 1), status=206, content_type=content_type)
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
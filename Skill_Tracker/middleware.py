@@ -0,0 +1,141 @@
+"""
+Per-request SQL instrumentation.
+
+QueryCountMiddleware is opt-in (see QUERY_INSTRUMENTATION in settings). It
+hooks every database connection with ``connection.execute_wrapper`` for the
+duration of the request, then reports the query count and SQL time:
+
+* as a ``Server-Timing`` header, visible in the browser's network panel;
+* as one log line per request on the ``Skill_Tracker.queries`` logger,
+  keyed by the resolved view name.
+
+A streamed body (CSV exports, for instance) runs its queries after the
+view returns. Those are recorded while the body is consumed and included
+in the log line, written once the body has been sent. Server-Timing goes
+out with the headers, so it covers the view only. File responses are
+left alone so the server can still send them with sendfile().
+
+When a request runs more than QUERY_COUNT_THRESHOLD queries, the most
+repeated SQL fingerprints are logged as a warning - the usual N+1 signature
+is one fingerprint repeated once per row.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger('Skill_Tracker.queries')
+
+DEFAULT_THRESHOLD = 50
+DEFAULT_TOP = 5
+
+_PLACEHOLDER_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """SQL with literals and IN-lists collapsed, so repeats of one query group together."""
+    sql = _STRING.sub('%s', sql)
+    sql = _NUMBER.sub('%s', sql)
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).replace('%s', '?').strip()
+
+
+class QueryRecorder:
+    """execute_wrapper callable counting queries, time and fingerprints."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+
+@contextmanager
+def recording(recorder):
+    """Pass every query on every connection through `recorder`."""
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        yield
+
+
+class QueryCountMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'QUERY_COUNT_THRESHOLD', DEFAULT_THRESHOLD)
+        self.top = getattr(settings, 'QUERY_COUNT_TOP', DEFAULT_TOP)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with recording(recorder):
+            response = self.get_response(request)
+
+        self.add_server_timing(response, recorder, time.perf_counter() - start)
+        if response.streaming and not response.is_async and getattr(response, 'file_to_stream', None) is None:
+            response.streaming_content = self.record_stream(response.streaming_content, request, response, recorder, start)
+        else:
+            self.log(request, response, recorder, time.perf_counter() - start)
+        return response
+
+    def record_stream(self, content, request, response, recorder, start):
+        try:
+            chunks = iter(content)
+            while True:
+                with recording(recorder):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self.log(request, response, recorder, time.perf_counter() - start)
+
+    def add_server_timing(self, response, recorder, total):
+        metrics = [
+            f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries"',
+            f'app;dur={total * 1000:.1f}',
+        ]
+        existing = response.get('Server-Timing')
+        response['Server-Timing'] = ', '.join(([existing] if existing else []) + metrics)
+
+    def log(self, request, response, recorder, total):
+        match = request.resolver_match
+        view = match.view_name if match else request.path
+        logger.info(
+            'view=%s method=%s status=%s queries=%d sql_ms=%.1f total_ms=%.1f',
+            view, request.method, response.status_code,
+            recorder.count, recorder.duration * 1000, total * 1000,
+            extra={
+                'view': view,
+                'queries': recorder.count,
+                'sql_ms': round(recorder.duration * 1000, 1),
+                'total_ms': round(total * 1000, 1),
+            },
+        )
+
+        if self.threshold is not None and recorder.count > self.threshold:
+            top = '\n'.join(
+                f'  {count:>4}x {sql}'
+                for sql, count in recorder.fingerprints.most_common(self.top)
+            )
+            logger.warning(
+                'view=%s ran %d queries (threshold %d); most repeated:\n%s',
+                view, recorder.count, self.threshold, top,
+            )
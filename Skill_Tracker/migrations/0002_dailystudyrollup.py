@@ -0,0 +1,56 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rollups(apps, schema_editor):
+    SkillProgress = apps.get_model('Skill_Tracker', 'SkillProgress')
+    DailyStudyRollup = apps.get_model('Skill_Tracker', 'DailyStudyRollup')
+
+    rows = SkillProgress.objects.values('user_id', 'skill_id', 'date').annotate(
+        actual_hours=Sum('actual_time'),
+        planned_hours=Sum('planned_time'),
+        extra_hours=Sum('extra_time'),
+        confidence_total=Sum('confidence_level'),
+        marks_total=Sum('marks_yourself'),
+        entries=Count('id'),
+    ).order_by()
+
+    DailyStudyRollup.objects.bulk_create(
+        (DailyStudyRollup(**row) for row in rows),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Skill_Tracker', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStudyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('actual_hours', models.PositiveIntegerField(default=0)),
+                ('planned_hours', models.PositiveIntegerField(default=0)),
+                ('extra_hours', models.PositiveIntegerField(default=0)),
+                ('confidence_total', models.PositiveIntegerField(default=0)),
+                ('marks_total', models.PositiveIntegerField(default=0)),
+                ('entries', models.PositiveIntegerField(default=0)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='study_rollups', to='Skill_Tracker.skill')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='study_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'date'], name='rollup_user_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'skill', 'date'), name='unique_rollup_per_skill_day')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:30
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Skill_Tracker', '0003_activitybitmap'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='skillprogress',
+            name='date',
+            field=models.DateField(default=datetime.date.today, editable=False),
+        ),
+    ]
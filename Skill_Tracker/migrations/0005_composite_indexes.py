@@ -0,0 +1,93 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:36
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+MERGED_FLAGS = ['project_done', 'certification_done', 'new_topic_done', 'topic_notes', 'is_completed']
+MERGED_FILES = ['certificate_file', 'notes_file']
+MERGED_TEXT = ['project_update', 'topics_done', 'feedback_or_points']
+
+
+def merge_duplicate_progress(apps, schema_editor):
+    """Fold same-day entries for a skill into the oldest one before adding the constraint."""
+    SkillProgress = apps.get_model('Skill_Tracker', 'SkillProgress')
+    DailyStudyRollup = apps.get_model('Skill_Tracker', 'DailyStudyRollup')
+
+    duplicates = SkillProgress.objects.values('user_id', 'skill_id', 'date') \
+        .annotate(n=Count('id')) \
+        .filter(n__gt=1) \
+        .order_by()
+
+    for key in duplicates:
+        entries = list(SkillProgress.objects.filter(
+            user_id=key['user_id'], skill_id=key['skill_id'], date=key['date']
+        ).order_by('id'))
+        kept, extra = entries[0], entries[1:]
+
+        for entry in extra:
+            kept.actual_time += entry.actual_time
+            kept.extra_time += entry.extra_time
+            kept.planned_time = max(kept.planned_time, entry.planned_time)
+            kept.confidence_level = max(kept.confidence_level, entry.confidence_level)
+            kept.marks_yourself = max(kept.marks_yourself, entry.marks_yourself)
+            for field in MERGED_FLAGS:
+                setattr(kept, field, getattr(kept, field) or getattr(entry, field))
+            for field in MERGED_FILES:
+                if not getattr(kept, field):
+                    setattr(kept, field, getattr(entry, field))
+            for field in MERGED_TEXT:
+                texts = [t for t in (getattr(kept, field), getattr(entry, field)) if t]
+                setattr(kept, field, '\n\n'.join(texts) or None)
+
+        kept.save()
+        SkillProgress.objects.filter(pk__in=[entry.pk for entry in extra]).delete()
+
+        # The rollup now covers exactly one entry
+        DailyStudyRollup.objects.filter(
+            user_id=key['user_id'], skill_id=key['skill_id'], date=key['date']
+        ).update(
+            actual_hours=kept.actual_time,
+            planned_hours=kept.planned_time,
+            extra_hours=kept.extra_time,
+            confidence_total=kept.confidence_level,
+            marks_total=kept.marks_yourself,
+            entries=1,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Skill_Tracker', '0004_skillprogress_date_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notelibrary',
+            index=models.Index(fields=['user', '-uploaded_at'], name='note_user_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skillgoal',
+            index=models.Index(fields=['user', 'skill', 'is_completed', '-created_at'], name='goal_user_skill_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skillgoal',
+            index=models.Index(fields=['user', 'updated_at'], name='goal_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skillprogress',
+            index=models.Index(fields=['user', '-date'], name='progress_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skillprogress',
+            index=models.Index(fields=['user', 'updated_at'], name='progress_user_updated_idx'),
+        ),
+        migrations.RunPython(merge_duplicate_progress, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='skillprogress',
+            constraint=models.UniqueConstraint(fields=('user', 'skill', 'date'), name='unique_progress_per_skill_day'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:43
+
+from django.db import migrations, models
+from django.db.models import Count, DateField, IntegerField, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_skill_counters(apps, schema_editor):
+    Skill = apps.get_model('Skill_Tracker', 'Skill')
+    SkillGoal = apps.get_model('Skill_Tracker', 'SkillGoal')
+    SkillProgress = apps.get_model('Skill_Tracker', 'SkillProgress')
+
+    def per_skill(queryset, expression, output_field=IntegerField()):
+        return Subquery(
+            queryset.filter(skill=OuterRef('pk')).order_by().values('skill')
+            .annotate(value=expression).values('value'),
+            output_field=output_field,
+        )
+
+    progress = SkillProgress.objects.all()
+    goals = SkillGoal.objects.all()
+    Skill.objects.update(
+        total_hours=Coalesce(per_skill(progress, Sum('actual_time')), 0),
+        progress_days=Coalesce(per_skill(progress, Count('id')), 0),
+        last_entry_date=per_skill(progress, Max('date'), DateField()),
+        goals_total=Coalesce(per_skill(goals, Count('id')), 0),
+        goals_completed=Coalesce(per_skill(goals.filter(is_completed=True), Count('id')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Skill_Tracker', '0005_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='skill',
+            name='goals_completed',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='goals_total',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='last_entry_date',
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='progress_days',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='skill',
+            name='total_hours',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_skill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.10 on 2026-10-18 20:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Skill_Tracker', '0006_skill_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notelibrary',
+            name='note_user_uploaded_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='skillprogress',
+            name='progress_user_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='notelibrary',
+            index=models.Index(fields=['user', '-uploaded_at', '-id'], name='note_user_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='skillprogress',
+            index=models.Index(fields=['user', '-date', '-id'], name='progress_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,138 @@
+# Generated by Django 5.2.10 on 2026-10-18 21:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+FTS_TABLE = 'skill_tracker_search_fts'
+DOCUMENT_TABLE = '"Skill_Tracker_searchdocument"'
+
+SQLITE_INDEX = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        owner, title, body,
+        tokenize = 'porter unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+    f"""CREATE TRIGGER {FTS_TABLE}_insert AFTER INSERT ON {DOCUMENT_TABLE} BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, owner, title, body)
+        VALUES (new.id, 'u' || new.user_id, new.title, new.body);
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_delete AFTER DELETE ON {DOCUMENT_TABLE} BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER {FTS_TABLE}_update AFTER UPDATE ON {DOCUMENT_TABLE} BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, owner, title, body)
+        VALUES (new.id, 'u' || new.user_id, new.title, new.body);
+    END""",
+]
+
+SQLITE_DROP = [
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+POSTGRES_INDEX = [
+    f"""ALTER TABLE {DOCUMENT_TABLE} ADD COLUMN vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', body), 'B')
+    ) STORED""",
+    f"CREATE INDEX search_document_vector_idx ON {DOCUMENT_TABLE} USING GIN (vector)",
+]
+
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS search_document_vector_idx",
+    f"ALTER TABLE {DOCUMENT_TABLE} DROP COLUMN IF EXISTS vector",
+]
+
+PROGRESS_TEXT_FIELDS = ['topics_done', 'project_update', 'feedback_or_points']
+
+
+def sqlite_has_fts5(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_fulltext_index(apps, schema_editor):
+    """The backend's full-text index over SearchDocument; none (icontains search) elsewhere."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite' and sqlite_has_fts5(schema_editor):
+        statements = SQLITE_INDEX
+    elif vendor == 'postgresql':
+        statements = POSTGRES_INDEX
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {'sqlite': SQLITE_DROP, 'postgresql': POSTGRES_DROP}.get(vendor, [])
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def backfill_search_documents(apps, schema_editor):
+    SearchDocument = apps.get_model('Skill_Tracker', 'SearchDocument')
+    Skill = apps.get_model('Skill_Tracker', 'Skill')
+    SkillGoal = apps.get_model('Skill_Tracker', 'SkillGoal')
+    SkillProgress = apps.get_model('Skill_Tracker', 'SkillProgress')
+    NoteLibrary = apps.get_model('Skill_Tracker', 'NoteLibrary')
+
+    def documents():
+        for skill in Skill.objects.iterator():
+            yield skill, 'skill', skill.pk, skill.title, skill.description, skill.start_date
+        for goal in SkillGoal.objects.iterator():
+            yield goal, 'goal', goal.skill_id, '', goal.goal_description, goal.start_date
+        for entry in SkillProgress.objects.iterator():
+            body = '\n'.join(filter(None, (getattr(entry, field) for field in PROGRESS_TEXT_FIELDS)))
+            yield entry, 'progress', entry.skill_id, '', body, entry.date
+        for note in NoteLibrary.objects.iterator():
+            yield note, 'note', note.skill_id, note.title, '', note.uploaded_at.date()
+
+    batch = []
+    for instance, kind, skill_id, title, body, day in documents():
+        if not (title or body):
+            continue
+        batch.append(SearchDocument(
+            user_id=instance.user_id, skill_id=skill_id, kind=kind, object_id=instance.pk,
+            title=title, body=body, date=day,
+        ))
+        if len(batch) >= 1000:
+            SearchDocument.objects.bulk_create(batch)
+            batch = []
+    SearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Skill_Tracker', '0008_storedblob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('skill', 'Skill'), ('goal', 'Goal'), ('progress', 'Progress'), ('note', 'Note')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(blank=True, max_length=200)),
+                ('body', models.TextField(blank=True)),
+                ('date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='Skill_Tracker.skill')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document')],
+            },
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
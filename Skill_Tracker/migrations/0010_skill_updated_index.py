@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-18 21:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Skill_Tracker', '0009_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='skill',
+            index=models.Index(fields=['user', 'updated_at'], name='skill_user_updated_idx'),
+        ),
+    ]
@@ -1,8 +1,120 @@
 from django.db import models
+from django.db.models import (
+    BooleanField, Case, ExpressionWrapper, F, Func, IntegerField, Prefetch, Q,
+    Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Greatest, Least
 from django.contrib.auth.models import User
 import datetime
 from datetime import date
-# Create your models here.
+
+
+# -------- EXPRESSIONS --------
+
+class DaysBetween(Func):
+    """Whole days from `start` to `end` (end - start) for two date expressions."""
+    output_field = IntegerField()
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+
+    def __init__(self, end, start, **extra):
+        super().__init__(end, start, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)',
+            arg_joiner=') - julianday(',
+            **extra_context,
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection,
+            template='DATEDIFF(%(expressions)s)',
+            arg_joiner=', ',
+            **extra_context,
+        )
+
+
+class annotated_property:
+    """
+    A read-only property that a queryset annotation of the same name
+    overrides, so list views can compute it in SQL (and sort/filter on it)
+    while single objects keep computing it in Python.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        if self.name in instance.__dict__:
+            return instance.__dict__[self.name]
+        return self.func(instance)
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+
+# -------- QUERYSETS --------
+
+class UserOwnedQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(user=user)
+
+
+class SkillRelatedQuerySet(UserOwnedQuerySet):
+    def with_skill(self):
+        return self.select_related('skill')
+
+
+class SkillGoalQuerySet(SkillRelatedQuerySet):
+    def with_progress(self, today=None):
+        """
+        Annotate the SkillGoal progress properties (same values, computed in
+        SQL) plus remaining_hours and is_overdue, for sorting and filtering.
+        """
+        today = Value(today or date.today())
+        total_days = Greatest(DaysBetween(F('target_date'), F('start_date')), 0)
+        days_completed = Greatest(DaysBetween(today, F('start_date')), 0)
+        daily_hours = Coalesce(F('daily_study_hours'), 0)
+
+        return self.annotate(
+            total_days=total_days,
+            days_completed=days_completed,
+        ).annotate(
+            total_hours_required=F('total_days') * daily_hours,
+            remaining_hours=Greatest(F('total_days') - F('days_completed'), 0) * daily_hours,
+            progress_percentage=Case(
+                When(total_days=0, then=0),
+                default=Least(F('days_completed') * 100 / F('total_days'), 100),
+                output_field=IntegerField(),
+            ),
+            is_overdue=ExpressionWrapper(
+                Q(is_completed=False, target_date__lt=today),
+                output_field=BooleanField(),
+            ),
+        )
+
+
+class SkillQuerySet(UserOwnedQuerySet):
+    def with_latest_goal(self):
+        """Prefetch goals newest first into `prefetched_goals` (see Skill.latest_goal)."""
+        return self.prefetch_related(Prefetch(
+            'goals',
+            queryset=SkillGoal.objects.order_by('-created_at', '-pk'),
+            to_attr='prefetched_goals',
+        ))
+
+    def with_goal_hours(self):
+        """Annotate goal_hours, the summed daily study hours of the skill's goals."""
+        return self.annotate(goal_hours=Coalesce(Sum('goals__daily_study_hours'), 0))
+
+
 class Skill(models.Model):
 
     LEVEL_CHOICES = [
@@ -32,12 +144,55 @@ class Skill(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_completed = models.BooleanField(default=False)
 
+    # Counters over the skill's progress entries and goals, kept up to date
+    # by Skill_Tracker.skill_stats
+    total_hours = models.PositiveIntegerField(default=0, editable=False)
+    progress_days = models.PositiveIntegerField(default=0, editable=False)
+    goals_total = models.PositiveIntegerField(default=0, editable=False)
+    goals_completed = models.PositiveIntegerField(default=0, editable=False)
+    last_entry_date = models.DateField(blank=True, null=True, editable=False)
+
+    COUNTER_FIELDS = ['total_hours', 'progress_days', 'goals_total', 'goals_completed', 'last_entry_date']
+
+    # Completion is propagated to and from the goals by Skill_Tracker.completion
+    objects = SkillQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Dashboard ETag: Max(updated_at) per user
+            models.Index(fields=['user', 'updated_at'], name='skill_user_updated_idx'),
+        ]
+
     def save(self, *args, **kwargs):
+        # The counters are only written with F() updates; saving a copy
+        # loaded earlier must not overwrite them with stale values
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
         super().save(*args, **kwargs)
 
-        # If skill is completed → mark all goals completed
-        if self.is_completed:
-            self.goals.update(is_completed=True)
+    @property
+    def latest_goal(self):
+        if hasattr(self, 'prefetched_goals'):
+            return self.prefetched_goals[0] if self.prefetched_goals else None
+        return self.goals.order_by('-created_at', '-pk').first()
+
+    @property
+    def progress(self):
+        """Percent of the goal hours studied; needs with_goal_hours()."""
+        goal_hours = getattr(self, 'goal_hours', 0)
+        if not goal_hours:
+            return 0
+        return min(int((self.total_hours / goal_hours) * 100), 100)
+
+    @property
+    def avg_hours(self):
+        """Average hours per progress entry."""
+        if not self.progress_days:
+            return 0
+        return self.total_hours / self.progress_days
 
     def __str__(self):
         return f"{self.title} ({self.user.username})"
@@ -63,41 +218,53 @@ class SkillGoal(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
-    def save(self, *args, **kwargs):
-        super().save(*args, **kwargs)
 
-        # If goal is completed → mark skill completed
-        if self.skill.goals.filter(is_completed=False).count() == 0:
-            self.skill.is_completed = True
-            self.skill.save()
+    objects = SkillGoalQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Current goal lookup in add_skill_progress
+            models.Index(fields=['user', 'skill', 'is_completed', '-created_at'], name='goal_user_skill_status_idx'),
+            # Dashboard ETag: Max(updated_at) per user
+            models.Index(fields=['user', 'updated_at'], name='goal_user_updated_idx'),
+        ]
 
 
     # -------- SMART CALCULATIONS --------
-    @property
+    # SkillGoal.objects.with_progress() computes the same values in SQL
+    @annotated_property
     def total_days(self):
         return max((self.target_date - self.start_date).days, 0)
 
-    @property
+    @annotated_property
     def total_hours_required(self):
         if not self.daily_study_hours:
             return 0
         return self.total_days * self.daily_study_hours
 
-    @property
+    @annotated_property
     def days_completed(self):
         return max((date.today() - self.start_date).days, 0)
 
-    @property
+    @annotated_property
+    def remaining_hours(self):
+        return max(self.total_days - self.days_completed, 0) * (self.daily_study_hours or 0)
+
+    @annotated_property
     def progress_percentage(self):
         if self.total_days == 0:
             return 0
-        return min(int((self.days_completed / self.total_days) * 100), 100)
+        # Integer arithmetic: int(29 / 100 * 100) is 28
+        return min(self.days_completed * 100 // self.total_days, 100)
+
+    @annotated_property
+    def is_overdue(self):
+        return not self.is_completed and self.target_date < date.today()
     
 class SkillProgress(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='skill_progress')
     skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='progress_entries')
-    date = models.DateField(auto_now_add=True)
+    date = models.DateField(default=datetime.date.today, editable=False)
     planned_time =models.PositiveIntegerField(help_text="daily_study time in hours",default=0)
     actual_time = models.PositiveIntegerField(help_text="Actual study time in hours")
     extra_time = models.PositiveIntegerField(help_text="Extra study time in hours", default=0)
@@ -116,6 +283,20 @@ class SkillProgress(models.Model):
     marks_yourself = models.PositiveIntegerField(help_text="Rate yourself from 1 to 10", default=5)
     is_completed = models.BooleanField(default=False)
 
+    objects = SkillRelatedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # One entry per skill per day; also serves (user, skill, date) lookups
+            models.UniqueConstraint(fields=['user', 'skill', 'date'], name='unique_progress_per_skill_day'),
+        ]
+        indexes = [
+            # Keyset pages of skill_progress_list, newest first
+            models.Index(fields=['user', '-date', '-id'], name='progress_user_date_idx'),
+            # Dashboard ETag: Max(updated_at) per user
+            models.Index(fields=['user', 'updated_at'], name='progress_user_updated_idx'),
+        ]
+
 class NoteLibrary(models.Model):
     NOTE_TYPES = [
         ('notes', 'Notes'),
@@ -132,5 +313,182 @@ class NoteLibrary(models.Model):
 
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    objects = SkillRelatedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pages of note_library, newest first
+            models.Index(fields=['user', '-uploaded_at', '-id'], name='note_user_uploaded_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.skill.title}"
+
+
+class StoredBlob(models.Model):
+    """
+    A file stored once under its SHA-256 digest by ContentAddressedStorage,
+    and the number of file fields (notes, roadmaps, certificates) that
+    point at it. Blobs nothing points at are removed by ``collect_blobs``.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    digest = models.CharField(max_length=64)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Last time the refcount changed; unreferenced blobs get a grace period
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['refcount', 'updated_at'], name='blob_refcount_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+
+class SearchDocument(models.Model):
+    """
+    The searchable text of one skill, goal, progress entry or note, kept in
+    sync by signals. The full-text index over it depends on the database
+    backend and is created by migration 0009 (see search.py).
+    """
+    KINDS = [
+        ('skill', 'Skill'),
+        ('goal', 'Goal'),
+        ('progress', 'Progress'),
+        ('note', 'Note'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_documents')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.PositiveBigIntegerField()
+
+    title = models.CharField(max_length=200, blank=True)
+    body = models.TextField(blank=True)
+    date = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = UserOwnedQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title or self.body[:40]}"
+
+
+class DailyStudyRollup(models.Model):
+    """Per (user, skill, day) totals of SkillProgress, kept in sync by signals."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='study_rollups')
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name='study_rollups')
+    date = models.DateField()
+
+    actual_hours = models.PositiveIntegerField(default=0)
+    planned_hours = models.PositiveIntegerField(default=0)
+    extra_hours = models.PositiveIntegerField(default=0)
+    confidence_total = models.PositiveIntegerField(default=0)
+    marks_total = models.PositiveIntegerField(default=0)
+    entries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'skill', 'date'], name='unique_rollup_per_skill_day'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'date'], name='rollup_user_date_idx'),
+        ]
+
+    @property
+    def avg_confidence(self):
+        return self.confidence_total / self.entries if self.entries else 0
+
+    @property
+    def avg_marks(self):
+        return self.marks_total / self.entries if self.entries else 0
+
+    def __str__(self):
+        return f"{self.skill.title} on {self.date}: {self.actual_hours}h"
+
+
+class ActivityBitmap(models.Model):
+    """
+    One bit per day since `start_date` (little-endian), set when the user
+    logged any progress that day. Streaks and active-day counts are bit
+    operations on it instead of one query per day.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='activity_bitmap')
+    start_date = models.DateField()
+    bits = models.BinaryField(default=b'')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def value(self):
+        return int.from_bytes(bytes(self.bits), 'little')
+
+    def _store(self, value):
+        self.bits = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+    def _offset(self, day):
+        return (day - self.start_date).days
+
+    def mark(self, day):
+        value = self.value
+        if day < self.start_date:
+            value <<= (self.start_date - day).days
+            self.start_date = day
+        self._store(value | (1 << self._offset(day)))
+
+    def unmark(self, day):
+        offset = self._offset(day)
+        if offset >= 0:
+            self._store(self.value & ~(1 << offset))
+
+    def is_active(self, day):
+        offset = self._offset(day)
+        return offset >= 0 and bool(self.value >> offset & 1)
+
+    @property
+    def active_days(self):
+        return self.value.bit_count()
+
+    def current_streak(self, today=None):
+        """Consecutive active days ending today (0 if today has no progress)."""
+        today = today or date.today()
+        n = self._offset(today)
+        if n < 0:
+            return 0
+        window = self.value & ((1 << (n + 1)) - 1)
+        gaps = ~window & ((1 << (n + 1)) - 1)
+        return n + 1 - gaps.bit_length()
+
+    @property
+    def longest_streak(self):
+        value = self.value
+        longest = 0
+        while value:
+            value &= value >> 1
+            longest += 1
+        return longest
+
+    def grid(self, today=None, weeks=4):
+        """weeks x 7 activity flags for the `weeks * 7` days ending yesterday."""
+        today = today or date.today()
+        days = weeks * 7
+        end = self._offset(today)
+        value = self.value
+        if end < days:
+            value <<= days - end
+            end = days
+        window = value >> (end - days) & ((1 << days) - 1)
+        return [
+            [bool(window >> (w * 7 + d) & 1) for d in range(7)]
+            for w in range(weeks)
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}: {self.active_days} active days"
@@ -0,0 +1,125 @@
+"""
+Keyset (cursor) pagination for the list views.
+
+Offset pagination makes the database read and discard every row before
+the requested page, so deep pages get slower the longer a user's history
+is. A keyset page instead continues from the sort key of the last row
+shown -- ``WHERE (date, id) < (:date, :id) ORDER BY date DESC, id DESC
+LIMIT n`` -- which costs the same on any page when an index covers the
+sort key.
+
+The cursor is the sort key of the boundary row, JSON-encoded into an
+opaque URL-safe string. The ordering must end in a unique field (the pk)
+so the key identifies exactly one row.
+"""
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    next_cursor: str = None
+    previous_cursor: str = None
+
+
+def cursor_value(value):
+    # Full precision: a datetime rounded to milliseconds would no longer
+    # match its row
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Cannot use {type(value).__name__} in a cursor")
+
+
+def encode_cursor(values):
+    data = json.dumps(values, default=cursor_value, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """The key values in `cursor`, or None if it is not a valid cursor for `length` fields."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+def after_key(ordering, values):
+    """Q for the rows that come after the row with key `values` in `ordering`."""
+    condition = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{name}__{lookup}': value})
+        equal &= Q(**{name: value})
+
+    # The OR alone does not let the database seek into an index on the
+    # sort key; a plain range on the leading field does
+    first = ordering[0]
+    lookup = 'lte' if first.startswith('-') else 'gte'
+    return Q(**{f'{first.lstrip("-")}__{lookup}': values[0]}) & condition
+
+
+def reverse_ordering(ordering):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+
+def row_key(obj, ordering):
+    return [getattr(obj, field.lstrip('-')) for field in ordering]
+
+
+def paginate_keyset(queryset, ordering, per_page, after=None, before=None):
+    """
+    One page of `queryset` in `ordering`: the first page, the page after
+    cursor `after` or the page before cursor `before`. Invalid cursors
+    give the first page.
+    """
+    ordering = list(ordering)
+    cursor = after or before
+    values = decode_cursor(cursor, len(ordering)) if cursor else None
+    backwards = values is not None and not after
+
+    order = reverse_ordering(ordering) if backwards else ordering
+    rows = queryset.order_by(*order)
+    if values is not None:
+        try:
+            rows = rows.filter(after_key(order, values))
+        except (ValidationError, ValueError, TypeError):
+            return paginate_keyset(queryset, ordering, per_page)
+
+    rows = list(rows[:per_page + 1])
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    page = KeysetPage(items=rows)
+    if rows:
+        first, last = encode_cursor(row_key(rows[0], ordering)), encode_cursor(row_key(rows[-1], ordering))
+        if backwards:
+            page.previous_cursor = first if has_more else None
+            page.next_cursor = last
+        else:
+            page.previous_cursor = first if values is not None else None
+            page.next_cursor = last if has_more else None
+    return page
+
+
+def get_keyset_page(request, queryset, ordering, per_page):
+    """paginate_keyset() with the cursors from the `after`/`before` GET parameters."""
+    return paginate_keyset(
+        queryset,
+        ordering,
+        per_page,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
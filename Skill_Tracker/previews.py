@@ -0,0 +1,158 @@
+"""
+Preview images for the note library.
+
+Adding a note queues the generation of a small WebP preview of its file:
+a thumbnail of an image, or the first page of a PDF. The work runs in a
+thread pool after the transaction commits, so the upload request does not
+wait for it, and the preview is stored next to the file under the same
+content digest (see storage.preview_name): notes sharing a blob share its
+preview, and it is made only once.
+
+PDF pages are rendered with pypdfium2 if it is installed, else with
+poppler's ``pdftoppm``; without either, PDFs get no preview and the
+library shows the type icon instead.
+"""
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .storage import preview_name
+
+try:
+    import pypdfium2
+except ImportError:
+    pypdfium2 = None
+
+
+logger = logging.getLogger(__name__)
+
+PREVIEW_SIZE = (320, 320)
+PREVIEW_QUALITY = 75
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.gif', '.webp', '.bmp'}
+PDF_TIMEOUT = 30
+
+_executor = None
+_pending = set()
+_lock = threading.Lock()
+
+
+# =====================================================
+# RENDERING
+# =====================================================
+
+def render_pdf_page(path):
+    """The first page of the PDF at `path` as an image, or None if no renderer is available."""
+    if pypdfium2 is not None:
+        pdf = pypdfium2.PdfDocument(path)
+        try:
+            page = pdf[0]
+            scale = max(PREVIEW_SIZE) / max(page.get_size())
+            return page.render(scale=scale).to_pil()
+        finally:
+            pdf.close()
+
+    pdftoppm = shutil.which('pdftoppm')
+    if pdftoppm is None:
+        return None
+    with tempfile.TemporaryDirectory() as directory:
+        output = os.path.join(directory, 'page')
+        subprocess.run(
+            [pdftoppm, '-png', '-singlefile', '-f', '1', '-l', '1',
+             '-scale-to', str(max(PREVIEW_SIZE)), path, output],
+            check=True,
+            capture_output=True,
+            timeout=PDF_TIMEOUT,
+        )
+        with Image.open(f'{output}.png') as image:
+            image.load()
+            return image
+
+
+def encode_preview(image):
+    image.thumbnail(PREVIEW_SIZE)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    output = BytesIO()
+    image.save(output, 'WEBP', quality=PREVIEW_QUALITY, method=4)
+    return output.getvalue()
+
+
+def render_preview(path):
+    """WebP bytes of the preview of the file at `path`, or None if it has no preview."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in IMAGE_EXTENSIONS:
+        with Image.open(path) as image:
+            # Decode JPEGs at a reduced scale instead of full size
+            image.draft('RGB', PREVIEW_SIZE)
+            return encode_preview(ImageOps.exif_transpose(image))
+    if extension == '.pdf':
+        page = render_pdf_page(path)
+        return encode_preview(page) if page is not None else None
+    return None
+
+
+def generate_preview(name):
+    """Create the preview of the stored file `name` unless it exists. Returns its name, or None."""
+    preview = preview_name(name)
+    if default_storage.exists(preview):
+        return preview
+    if not default_storage.exists(name):
+        return None
+
+    data = render_preview(default_storage.path(name))
+    if data is None:
+        return None
+
+    # Written directly: the content-addressed storage would name it by its own digest
+    path = default_storage.path(preview)
+    temporary = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(data)
+    os.replace(temporary, path)
+    return preview
+
+
+# =====================================================
+# WORKER POOL
+# =====================================================
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PREVIEW_WORKERS,
+            thread_name_prefix='previews',
+        )
+    return _executor
+
+
+def _generate(name):
+    try:
+        generate_preview(name)
+    except Exception:
+        logger.exception("Could not create the preview of %s", name)
+    finally:
+        with _lock:
+            _pending.discard(name)
+
+
+def schedule_preview(name):
+    """Create the preview of `name` in the worker pool (inline with PREVIEW_WORKERS = 0)."""
+    if settings.PREVIEW_WORKERS <= 0:
+        return _generate(name)
+
+    with _lock:
+        if name in _pending:
+            return None
+        _pending.add(name)
+        executor = get_executor()
+    return executor.submit(_generate, name)
@@ -0,0 +1,92 @@
+"""
+Progress submission.
+
+``submit_progress`` records one SkillProgress entry in a single
+transaction: the INSERT relies on the one-entry-per-day constraint instead
+of a read-then-write check, so a concurrent double submit cannot create a
+duplicate. The signal handlers then write the rollup, the activity bitmap
+and the skill counters (``Skill.last_practiced`` included) with one
+statement each.
+"""
+from django.db import IntegrityError, transaction
+
+from .models import SkillProgress
+from .storage import BLOB_FIELDS
+
+
+# Values added to the existing entry when a same-day submission is merged
+MERGED_HOURS = ['actual_time', 'extra_time']
+# Files that replace those of the existing entry when uploaded with the merged one
+MERGED_FILES = BLOB_FIELDS[SkillProgress]
+
+
+class DuplicateProgress(Exception):
+    """The skill already has a progress entry for that day."""
+
+
+@transaction.atomic
+def submit_progress(progress, merge=False):
+    """
+    Save `progress` (an unsaved entry with user, skill and date set) and
+    mark its skill as practiced that day.
+
+    If the skill already has an entry for the day, its hours are added to
+    that entry when `merge` is true; otherwise DuplicateProgress is raised.
+    Returns the saved or merged entry and whether it was merged.
+    """
+    merged = False
+    try:
+        if merge:
+            # Stored outside the savepoint, whose rollback would take the
+            # StoredBlob rows with it
+            store_files(progress)
+            # A failed INSERT must not abort the surrounding transaction
+            with transaction.atomic():
+                progress.save()
+        else:
+            progress.save()
+    except IntegrityError as error:
+        if not merge:
+            raise DuplicateProgress() from error
+        merged_entry = merge_progress(progress)
+        if merged_entry is None:
+            # Some other constraint failed
+            raise
+        progress, merged = merged_entry, True
+
+    return progress, merged
+
+
+def store_files(progress):
+    """Store the uploads of `progress` now rather than when it is saved, as FileField.pre_save() would."""
+    for field in MERGED_FILES:
+        file = getattr(progress, field)
+        if file and not file._committed:
+            file.save(file.name, file.file, save=False)
+
+
+def merge_progress(progress):
+    """
+    Add the hours of `progress` to the saved entry for the same skill and
+    day, if any, and attach the files uploaded with it.
+    """
+    # Locked, so a concurrent merge adds to the hours read here
+    entry = SkillProgress.objects.select_for_update().filter(
+        user_id=progress.user_id,
+        skill_id=progress.skill_id,
+        date=progress.date,
+    ).first()
+    if entry is None:
+        return None
+
+    for field in MERGED_HOURS:
+        setattr(entry, field, getattr(entry, field) + (getattr(progress, field) or 0))
+    files = [field for field in MERGED_FILES if getattr(progress, field)]
+    for field in files:
+        # Already stored by store_files()
+        setattr(entry, field, getattr(progress, field).name)
+
+    # save() so the signal handlers update the rollup, the counters and the
+    # blob references like for any edit
+    entry.save(update_fields=[*MERGED_HOURS, *files, 'updated_at'])
+    return entry
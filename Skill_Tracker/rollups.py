@@ -0,0 +1,140 @@
+"""
+Maintenance of the DailyStudyRollup table.
+
+A rollup row holds the summed SkillProgress values for one
+(user, skill, date); it is refreshed whenever an entry for that key is
+created, edited or deleted, and can be rebuilt in bulk.
+
+Since SkillProgress allows one entry per (user, skill, date), the signal
+handlers write a row straight from its entry with a single upsert
+(``store_rollup``); ``refresh_rollup`` and ``refresh_rollups`` recompute
+rows from the table.
+"""
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from .models import DailyStudyRollup, SkillProgress
+
+
+ROLLUP_AGGREGATES = {
+    'actual_hours': Sum('actual_time'),
+    'planned_hours': Sum('planned_time'),
+    'extra_hours': Sum('extra_time'),
+    'confidence_total': Sum('confidence_level'),
+    'marks_total': Sum('marks_yourself'),
+    'entries': Count('id'),
+}
+
+
+ROLLUP_FIELDS = {
+    'actual_hours': 'actual_time',
+    'planned_hours': 'planned_time',
+    'extra_hours': 'extra_time',
+    'confidence_total': 'confidence_level',
+    'marks_total': 'marks_yourself',
+}
+
+
+def store_rollup(progress):
+    """Upsert the rollup row of one entry, in a single statement."""
+    DailyStudyRollup.objects.bulk_create(
+        [DailyStudyRollup(
+            user_id=progress.user_id,
+            skill_id=progress.skill_id,
+            date=progress.date,
+            entries=1,
+            **{field: getattr(progress, source) or 0 for field, source in ROLLUP_FIELDS.items()},
+        )],
+        update_conflicts=True,
+        unique_fields=['user', 'skill', 'date'],
+        update_fields=[*ROLLUP_FIELDS, 'entries'],
+    )
+
+
+def delete_rollup(user_id, skill_id, day):
+    DailyStudyRollup.objects.filter(user_id=user_id, skill_id=skill_id, date=day).delete()
+
+
+def refresh_rollup(user_id, skill_id, day):
+    """Recompute the rollup row for one (user, skill, date) from its entries."""
+    totals = SkillProgress.objects.filter(
+        user_id=user_id,
+        skill_id=skill_id,
+        date=day
+    ).aggregate(**ROLLUP_AGGREGATES)
+
+    if not totals['entries']:
+        DailyStudyRollup.objects.filter(user_id=user_id, skill_id=skill_id, date=day).delete()
+        return None
+
+    rollup, _ = DailyStudyRollup.objects.update_or_create(
+        user_id=user_id,
+        skill_id=skill_id,
+        date=day,
+        defaults={field: value or 0 for field, value in totals.items()},
+    )
+    return rollup
+
+
+def refresh_rollups(user_id, keys):
+    """Recompute the rollup rows of `keys`, (skill_id, date) pairs of one user, from their entries."""
+    keys = set(keys)
+    if not keys:
+        return 0
+
+    days = [day for _, day in keys]
+    rows = SkillProgress.objects.filter(
+        user_id=user_id,
+        skill_id__in={skill_id for skill_id, _ in keys},
+        date__range=(min(days), max(days)),
+    ).values('skill_id', 'date').annotate(**ROLLUP_AGGREGATES).order_by()
+
+    rollups = [
+        DailyStudyRollup(user_id=user_id, **{
+            field: (value or 0) if field in ROLLUP_AGGREGATES else value
+            for field, value in row.items()
+        })
+        for row in rows
+        if (row['skill_id'], row['date']) in keys
+    ]
+    DailyStudyRollup.objects.bulk_create(
+        rollups,
+        update_conflicts=True,
+        unique_fields=['user', 'skill', 'date'],
+        update_fields=list(ROLLUP_AGGREGATES),
+    )
+    return len(rollups)
+
+
+def rebuild_rollups(user_ids=None, batch_size=1000):
+    """Rebuild rollups from scratch, for every user or only `user_ids`."""
+    progress = SkillProgress.objects.all()
+    rollups = DailyStudyRollup.objects.all()
+    if user_ids is not None:
+        progress = progress.filter(user_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+
+    rows = progress.values('user_id', 'skill_id', 'date') \
+        .annotate(**ROLLUP_AGGREGATES) \
+        .order_by()
+
+    created = 0
+    with transaction.atomic():
+        rollups.delete()
+
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(DailyStudyRollup(**{
+                field: (value or 0) if field in ROLLUP_AGGREGATES else value
+                for field, value in row.items()
+            }))
+            if len(batch) >= batch_size:
+                DailyStudyRollup.objects.bulk_create(batch)
+                created += len(batch)
+                batch = []
+
+        if batch:
+            DailyStudyRollup.objects.bulk_create(batch)
+            created += len(batch)
+
+    return created
@@ -0,0 +1,252 @@
+"""
+Full-text search over a user's skills, goals, progress entries and notes.
+
+Every searchable object has one SearchDocument row (title, body, date),
+written by the signal handlers with a single upsert when the object is
+saved and deleted with it. The inverted index over those rows is the
+database's own:
+
+* SQLite: an FTS5 table with the porter stemmer and prefix indexes, kept
+  in sync with SearchDocument by triggers. Each row also holds an ``owner``
+  token (``u<user id>``), so a query only walks the posting lists of the
+  requesting user's documents.
+* PostgreSQL: a generated, weighted ``tsvector`` column with a GIN index.
+
+Both are created by migration 0009. On other backends, or where SQLite
+lacks FTS5, search falls back to ``icontains``.
+
+Queries are split into words; every word must match (stemmed), and the
+last one also as a prefix, so results appear while typing.
+"""
+import re
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import NoteLibrary, SearchDocument, Skill, SkillGoal, SkillProgress
+
+
+FTS_TABLE = 'skill_tracker_search_fts'
+SEARCH_LIMIT = 50
+MAX_TERMS = 8
+
+TERM_RE = re.compile(r'\w+')
+
+# Snippet delimiters, replaced by <mark> after the text is escaped
+MARK_START, MARK_END = '\ue000', '\ue001'
+
+PROGRESS_TEXT_FIELDS = ['topics_done', 'project_update', 'feedback_or_points']
+
+
+# =====================================================
+# DOCUMENTS
+# =====================================================
+
+SEARCH_KINDS = {
+    Skill: 'skill',
+    SkillGoal: 'goal',
+    SkillProgress: 'progress',
+    NoteLibrary: 'note',
+}
+
+
+def document_text(instance):
+    """(title, body, date) of the search document of `instance`."""
+    if isinstance(instance, SkillProgress):
+        body = '\n'.join(filter(None, (getattr(instance, field) for field in PROGRESS_TEXT_FIELDS)))
+        return '', body, instance.date
+    if isinstance(instance, NoteLibrary):
+        return instance.title, '', instance.uploaded_at.date() if instance.uploaded_at else None
+    if isinstance(instance, SkillGoal):
+        return '', instance.goal_description, instance.start_date
+    return instance.title, instance.description, instance.start_date
+
+
+def build_document(instance):
+    """The unsaved SearchDocument of `instance`, or None if it has no text."""
+    title, body, day = document_text(instance)
+    if not (title or body):
+        return None
+    kind = SEARCH_KINDS[type(instance)]
+    return SearchDocument(
+        user_id=instance.user_id,
+        skill_id=instance.pk if kind == 'skill' else instance.skill_id,
+        kind=kind,
+        object_id=instance.pk,
+        title=title or '',
+        body=body or '',
+        date=day,
+    )
+
+
+def save_documents(documents):
+    SearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=['kind', 'object_id'],
+        update_fields=['skill', 'title', 'body', 'date', 'updated_at'],
+    )
+
+
+def index_object(instance, created=False):
+    """Write (or remove) the search document of one saved object: a single statement, or none."""
+    document = build_document(instance)
+    if document is not None:
+        save_documents([document])
+    elif not created:
+        unindex_object(instance)
+
+
+def unindex_object(instance):
+    SearchDocument.objects.filter(kind=SEARCH_KINDS[type(instance)], object_id=instance.pk).delete()
+
+
+def index_queryset(queryset, batch_size=1000):
+    """(Re)index the objects of `queryset` (skills, goals, progress or notes) in batches. Returns the number indexed."""
+    indexed = 0
+    batch, empty = [], []
+
+    def flush():
+        save_documents(batch)
+        if empty:
+            SearchDocument.objects.filter(kind=SEARCH_KINDS[queryset.model], object_id__in=empty).delete()
+
+    for instance in queryset.order_by().iterator(chunk_size=batch_size):
+        document = build_document(instance)
+        if document is None:
+            empty.append(instance.pk)
+        else:
+            batch.append(document)
+        if len(batch) + len(empty) >= batch_size:
+            flush()
+            indexed += len(batch)
+            batch, empty = [], []
+
+    flush()
+    return indexed + len(batch)
+
+
+def rebuild_search_index(user_ids=None, batch_size=1000):
+    """Rebuild the search documents of every user, or only `user_ids`. Returns the number indexed."""
+    documents = SearchDocument.objects.all()
+    if user_ids is not None:
+        documents = documents.filter(user_id__in=user_ids)
+    documents.delete()
+
+    indexed = 0
+    for model in SEARCH_KINDS:
+        objects = model.objects.all()
+        if user_ids is not None:
+            objects = objects.filter(user_id__in=user_ids)
+        indexed += index_queryset(objects, batch_size)
+    return indexed
+
+
+# =====================================================
+# QUERIES
+# =====================================================
+
+def query_terms(query):
+    return [term.lower() for term in TERM_RE.findall(query)][:MAX_TERMS]
+
+
+@lru_cache(maxsize=None)
+def fulltext_backend(vendor):
+    """'fts5', 'postgres' or None (icontains), depending on what migration 0009 could create."""
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+        if vendor == 'sqlite' and FTS_TABLE in tables:
+            return 'fts5'
+        if vendor == 'postgresql':
+            columns = connection.introspection.get_table_description(cursor, SearchDocument._meta.db_table)
+            if any(column.name == 'vector' for column in columns):
+                return 'postgres'
+    return None
+
+
+def highlight(text):
+    """`text` escaped for HTML, with the matches marked."""
+    return mark_safe(escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+def search(user, query, kind=None, limit=SEARCH_LIMIT):
+    """
+    The best matching search documents of `user` for `query`, best first,
+    each with `skill_title` and an HTML `snippet`. One query.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return []
+
+    backend = fulltext_backend(connection.vendor)
+    if backend == 'fts5':
+        results = search_fts5(user, terms, kind, limit)
+    elif backend == 'postgres':
+        results = search_postgres(user, terms, kind, limit)
+    else:
+        results = search_icontains(user, terms, kind, limit)
+
+    for document in results:
+        document.snippet = highlight(document.snippet or document.title)
+    return results
+
+
+RESULT_COLUMNS = 'd.id, d.user_id, d.skill_id, d.kind, d.object_id, d.title, d.body, d.date, d.updated_at'
+
+
+def search_fts5(user, terms, kind, limit):
+    words = ' AND '.join(f'"{term}"' for term in terms) + '*'
+    match = f'owner:u{user.pk} AND {{title body}} : ({words})'
+    documents = connection.ops.quote_name(SearchDocument._meta.db_table)
+    skills = connection.ops.quote_name(Skill._meta.db_table)
+    kind_filter = 'AND d.kind = %s' if kind else ''
+
+    # bm25() weights: owner 0, title 5, body 1. Lower is better.
+    sql = f"""
+        SELECT {RESULT_COLUMNS}, s.title AS skill_title,
+               snippet({FTS_TABLE}, 2, %s, %s, '…', 16) AS snippet
+        FROM {FTS_TABLE}
+        JOIN {documents} AS d ON d.id = {FTS_TABLE}.rowid
+        JOIN {skills} AS s ON s.id = d.skill_id
+        WHERE {FTS_TABLE} MATCH %s {kind_filter}
+        ORDER BY bm25({FTS_TABLE}, 0.0, 5.0, 1.0)
+        LIMIT %s
+    """
+    params = [MARK_START, MARK_END, match, *([kind] if kind else []), limit]
+    return list(SearchDocument.objects.raw(sql, params))
+
+
+def search_postgres(user, terms, kind, limit):
+    tsquery = ' & '.join(terms) + ':*'
+    documents = connection.ops.quote_name(SearchDocument._meta.db_table)
+    skills = connection.ops.quote_name(Skill._meta.db_table)
+    kind_filter = 'AND d.kind = %s' if kind else ''
+    options = f'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=24, MinWords=8'
+
+    sql = f"""
+        SELECT {RESULT_COLUMNS}, s.title AS skill_title,
+               ts_headline('english', d.body, q, %s) AS snippet
+        FROM {documents} AS d
+        JOIN {skills} AS s ON s.id = d.skill_id,
+             to_tsquery('english', %s) AS q
+        WHERE d.user_id = %s AND d.vector @@ q {kind_filter}
+        ORDER BY ts_rank(d.vector, q) DESC, d.date DESC
+        LIMIT %s
+    """
+    params = [options, tsquery, user.pk, *([kind] if kind else []), limit]
+    return list(SearchDocument.objects.raw(sql, params))
+
+
+def search_icontains(user, terms, kind, limit):
+    documents = SearchDocument.objects.for_user(user).annotate(skill_title=F('skill__title'))
+    if kind:
+        documents = documents.filter(kind=kind)
+    for term in terms:
+        documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+    results = list(documents.order_by('-date', '-id')[:limit])
+    for document in results:
+        document.snippet = document.body[:160]
+    return results
@@ -0,0 +1,197 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .activity import mark_activity_day, register_functions, sync_activity_day
+from .cache import bump_dashboard_version
+from .models import NoteLibrary, Skill, SkillGoal, SkillProgress
+from .previews import schedule_preview
+from .rollups import delete_rollup, store_rollup
+from .search import index_object, unindex_object
+from .skill_stats import GOAL_FIELDS, PROGRESS_FIELDS, adjust_goals, adjust_progress, recount_skill_stats
+from .storage import blob_names, release_blobs, update_references
+
+
+# =====================================================
+# LOADED STATE
+# =====================================================
+
+# What the save and delete handlers below compare against. post_init runs
+# for every loaded row, so these read __dict__: a deferred field stays
+# None instead of being loaded, which would fire post_init again.
+
+@receiver(post_init, sender=SkillProgress)
+def remember_progress(sender, instance, **kwargs):
+    values = instance.__dict__
+    # Lets an edit that moves an entry to another skill/day refresh both rows
+    instance._rollup_key = (values.get('user_id'), values.get('skill_id'), values.get('date'))
+    instance._activity_day = values.get('date')
+    instance._counted_skill_id = values.get('skill_id')
+    instance._blob_names = blob_names(instance)
+
+
+@receiver(post_init, sender=SkillGoal)
+def remember_goal(sender, instance, **kwargs):
+    instance._counted_skill_id = instance.__dict__.get('skill_id')
+    instance._blob_names = blob_names(instance)
+
+
+@receiver(post_init, sender=NoteLibrary)
+def remember_note(sender, instance, **kwargs):
+    instance._blob_names = blob_names(instance)
+
+
+# =====================================================
+# DAILY ROLLUPS
+# =====================================================
+
+def rollup_key(progress):
+    return (progress.user_id, progress.skill_id, progress.date)
+
+
+@receiver(post_save, sender=SkillProgress)
+def update_rollup_on_save(sender, instance, **kwargs):
+    old_key = instance._rollup_key
+    new_key = rollup_key(instance)
+
+    store_rollup(instance)
+    if not kwargs.get('created') and old_key != new_key and None not in old_key:
+        delete_rollup(*old_key)
+
+    instance._rollup_key = new_key
+
+
+@receiver(post_delete, sender=SkillProgress)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    delete_rollup(*rollup_key(instance))
+
+
+# =====================================================
+# ACTIVITY BITMAP
+# =====================================================
+
+@receiver(post_save, sender=SkillProgress)
+def update_activity_on_save(sender, instance, created, **kwargs):
+    mark_activity_day(instance.user_id, instance.date)
+    old_day = instance._activity_day
+    if not created and old_day is not None and old_day != instance.date:
+        sync_activity_day(instance.user_id, old_day)
+    instance._activity_day = instance.date
+
+
+@receiver(post_delete, sender=SkillProgress)
+def update_activity_on_delete(sender, instance, **kwargs):
+    sync_activity_day(instance.user_id, instance.date)
+
+
+@receiver(connection_created)
+def register_activity_functions(sender, connection, **kwargs):
+    register_functions(connection)
+
+
+# =====================================================
+# SKILL COUNTERS
+# =====================================================
+
+def edited_skills(instance):
+    skill_ids = {instance._counted_skill_id, instance.skill_id} - {None}
+    instance._counted_skill_id = instance.skill_id
+    return skill_ids
+
+
+@receiver(post_save, sender=SkillProgress)
+def count_progress_on_save(sender, instance, created, **kwargs):
+    if created:
+        adjust_progress(instance.skill_id, instance.actual_time or 0, 1, instance.date)
+        instance._counted_skill_id = instance.skill_id
+    else:
+        recount_skill_stats(edited_skills(instance), PROGRESS_FIELDS)
+
+
+@receiver(post_delete, sender=SkillProgress)
+def count_progress_on_delete(sender, instance, **kwargs):
+    adjust_progress(instance.skill_id, -(instance.actual_time or 0), -1)
+
+
+@receiver(post_save, sender=SkillGoal)
+def count_goal_on_save(sender, instance, created, **kwargs):
+    if created:
+        adjust_goals(instance.skill_id, 1, int(instance.is_completed))
+        instance._counted_skill_id = instance.skill_id
+    else:
+        recount_skill_stats(edited_skills(instance), GOAL_FIELDS)
+
+
+@receiver(post_delete, sender=SkillGoal)
+def count_goal_on_delete(sender, instance, **kwargs):
+    adjust_goals(instance.skill_id, -1, -int(instance.is_completed))
+
+
+# =====================================================
+# STORED BLOB REFERENCES
+# =====================================================
+
+@receiver(post_save, sender=NoteLibrary)
+@receiver(post_save, sender=SkillGoal)
+@receiver(post_save, sender=SkillProgress)
+def count_blobs_on_save(sender, instance, **kwargs):
+    names = blob_names(instance)
+    update_references(instance._blob_names, names)
+    instance._blob_names = names
+
+
+@receiver(post_delete, sender=NoteLibrary)
+@receiver(post_delete, sender=SkillGoal)
+@receiver(post_delete, sender=SkillProgress)
+def count_blobs_on_delete(sender, instance, **kwargs):
+    release_blobs(instance._blob_names)
+
+
+# =====================================================
+# NOTE PREVIEWS
+# =====================================================
+
+@receiver(post_save, sender=NoteLibrary)
+def preview_note_on_save(sender, instance, **kwargs):
+    # A no-op in the worker when the blob already has a preview
+    if instance.file:
+        transaction.on_commit(partial(schedule_preview, instance.file.name))
+
+
+# =====================================================
+# SEARCH INDEX
+# =====================================================
+
+@receiver(post_save, sender=Skill)
+@receiver(post_save, sender=SkillGoal)
+@receiver(post_save, sender=SkillProgress)
+@receiver(post_save, sender=NoteLibrary)
+def index_on_save(sender, instance, created, **kwargs):
+    index_object(instance, created)
+
+
+@receiver(post_delete, sender=Skill)
+@receiver(post_delete, sender=SkillGoal)
+@receiver(post_delete, sender=SkillProgress)
+@receiver(post_delete, sender=NoteLibrary)
+def unindex_on_delete(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+# =====================================================
+# DASHBOARD CACHE
+# =====================================================
+
+@receiver(post_save, sender=Skill)
+@receiver(post_save, sender=SkillGoal)
+@receiver(post_save, sender=SkillProgress)
+@receiver(post_save, sender=NoteLibrary)
+@receiver(post_delete, sender=Skill)
+@receiver(post_delete, sender=SkillGoal)
+@receiver(post_delete, sender=SkillProgress)
+@receiver(post_delete, sender=NoteLibrary)
+def invalidate_dashboard(sender, instance, **kwargs):
+    bump_dashboard_version(instance.user_id)
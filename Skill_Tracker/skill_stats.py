@@ -0,0 +1,115 @@
+"""
+Maintenance of the per-skill counters.
+
+Skill.total_hours, progress_days, last_entry_date, goals_total and
+goals_completed summarise a skill's SkillProgress entries and goals, so the
+skill list, the dashboard and the skill API read them straight from the
+Skill rows instead of aggregating the related tables.
+
+Creating or deleting an entry or a goal adjusts the counters with one F()
+UPDATE (the signal handlers, and the services that write with update(),
+call ``adjust_progress``/``adjust_goals``). An edit may change any counted
+value, so it recomputes the affected counters of the skill, and of the
+skill the row moved from, from the tables instead: also one UPDATE, and
+it does not depend on the instance still holding the values it was
+loaded with. ``recount_skill_stats`` does the same in bulk, to backfill
+or to repair drift.
+"""
+from django.db.models import Count, DateField, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Skill, SkillGoal, SkillProgress
+
+
+STAT_FIELDS = Skill.COUNTER_FIELDS
+PROGRESS_FIELDS = ['total_hours', 'progress_days', 'last_entry_date']
+GOAL_FIELDS = ['goals_total', 'goals_completed']
+
+
+def per_skill(queryset, expression, output_field=None):
+    """Correlated subquery: `expression` aggregated over the rows of the outer skill."""
+    return Subquery(
+        queryset.filter(skill=OuterRef('pk'))
+        .order_by()
+        .values('skill')
+        .annotate(value=expression)
+        .values('value'),
+        output_field=output_field or IntegerField(),
+    )
+
+
+def latest_entry_date():
+    return per_skill(SkillProgress.objects.all(), Max('date'), DateField())
+
+
+def stat_expressions(fields=STAT_FIELDS):
+    """The value of each counter in `fields`, computed from the tables."""
+    progress = SkillProgress.objects.all()
+    goals = SkillGoal.objects.all()
+    expressions = {
+        'total_hours': Coalesce(per_skill(progress, Sum('actual_time')), 0),
+        'progress_days': Coalesce(per_skill(progress, Count('id')), 0),
+        'last_entry_date': latest_entry_date(),
+        'goals_total': Coalesce(per_skill(goals, Count('id')), 0),
+        'goals_completed': Coalesce(per_skill(goals.filter(is_completed=True), Count('id')), 0),
+    }
+    return {field: expressions[field] for field in fields}
+
+
+# =====================================================
+# INCREMENTAL UPDATES
+# =====================================================
+
+
+def adjust_progress(skill_id, hours=0, entries=0, day=None):
+    """
+    Add `hours` and `entries` (either may be negative) to the progress
+    counters of one skill. `day` is the date of an added entry, which also
+    marks the skill as practiced that day; removing an entry recomputes
+    last_entry_date from the remaining ones.
+    """
+    changes = {
+        'total_hours': Greatest(F('total_hours') + hours, 0),
+        'progress_days': Greatest(F('progress_days') + entries, 0),
+    }
+    if entries < 0:
+        changes['last_entry_date'] = latest_entry_date()
+    elif day is not None:
+        day = Value(day, output_field=DateField())
+        changes['last_entry_date'] = Greatest(Coalesce(F('last_entry_date'), day), day)
+        changes['last_practiced'] = Greatest(Coalesce(F('last_practiced'), day), day)
+    return Skill.objects.filter(pk=skill_id).update(**changes)
+
+
+def adjust_goals(skill_id, total=0, completed=0):
+    """Add `total` and `completed` (either may be negative) to the goal counters of one skill."""
+    return Skill.objects.filter(pk=skill_id).update(
+        goals_total=Greatest(F('goals_total') + total, 0),
+        goals_completed=Greatest(F('goals_completed') + completed, 0),
+    )
+
+
+# =====================================================
+# RECOUNT
+# =====================================================
+
+def stale_skills(skills):
+    """The skills in the `skills` queryset whose counters differ from the tables."""
+    expected = {f'expected_{field}': expression for field, expression in stat_expressions().items()}
+    matches = Q(
+        *(Q(**{field: F(f'expected_{field}')}) for field in STAT_FIELDS if field != 'last_entry_date'),
+        Q(last_entry_date=F('expected_last_entry_date'))
+        | Q(last_entry_date__isnull=True, expected_last_entry_date__isnull=True),
+    )
+    return skills.alias(**expected).exclude(matches)
+
+
+def recount_skill_stats(skill_ids, fields=STAT_FIELDS, batch_size=1000):
+    """Recompute `fields` of the given skills from the tables. Returns the number of skills updated."""
+    skill_ids = list(skill_ids)
+    expressions = stat_expressions(fields)
+    updated = 0
+    for start in range(0, len(skill_ids), batch_size):
+        batch = skill_ids[start:start + batch_size]
+        updated += Skill.objects.filter(pk__in=batch).update(**expressions)
+    return updated
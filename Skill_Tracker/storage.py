@@ -0,0 +1,239 @@
+"""
+Content-addressed, deduplicating file storage.
+
+Uploaded notes, roadmaps and certificates are stored once per content,
+under ``blobs/<2 hex>/<sha256><ext>``, whatever their name or the field
+they were uploaded to. Uploading a file that is already stored writes
+nothing: the field just points at the existing blob.
+
+The SHA-256 is computed by the upload handlers while the request body
+streams in, so storing an upload never reads it a second time. Files
+that did not come from an upload (management commands, tests) are hashed
+on save.
+
+Each blob has a StoredBlob row whose refcount is the number of file fields
+pointing at it; the signal handlers keep it up to date as rows are saved
+and deleted. Unreferenced blobs are deleted by ``collect_blobs`` after a
+grace period, so an upload stored just before its row is saved is never
+collected in between.
+"""
+import hashlib
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadhandler import MemoryFileUploadHandler, TemporaryFileUploadHandler
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import NoteLibrary, SkillGoal, SkillProgress, StoredBlob
+
+
+BLOB_PREFIX = 'blobs/'
+COLLECT_GRACE = timedelta(hours=1)
+PREVIEW_SUFFIX = '.preview.webp'
+
+# The file fields stored as blobs, per model
+BLOB_FIELDS = {
+    NoteLibrary: ['file'],
+    SkillGoal: ['roadmap'],
+    SkillProgress: ['certificate_file', 'notes_file'],
+}
+
+
+# =====================================================
+# UPLOAD HANDLERS
+# =====================================================
+
+class HashingUploadMixin:
+    """Computes the SHA-256 of the chunks this handler stores and sets it as `sha256` on the file."""
+
+    def new_file(self, *args, **kwargs):
+        self.hasher = hashlib.sha256()
+        super().new_file(*args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        passed_on = super().receive_data_chunk(raw_data, start)
+        if passed_on is None:
+            self.hasher.update(raw_data)
+        return passed_on
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self.hasher.hexdigest()
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    pass
+
+
+# =====================================================
+# STORAGE
+# =====================================================
+
+def file_digest(content):
+    hasher = hashlib.sha256()
+    for chunk in content.chunks():
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def blob_name(digest, filename):
+    extension = os.path.splitext(filename)[1].lower()
+    return f'{BLOB_PREFIX}{digest[:2]}/{digest}{extension}'
+
+
+def preview_name(name):
+    """Where the preview image of the stored file `name` is kept: next to it, under the same digest."""
+    return os.path.splitext(name)[0] + PREVIEW_SUFFIX
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that names files by their SHA-256 and stores each content once."""
+
+    def _save(self, name, content):
+        digest = getattr(content, 'sha256', None) or file_digest(content)
+        name = blob_name(digest, name)
+
+        if not self.exists(name):
+            saved = super()._save(name, content)
+            if saved != name:
+                # Another request stored the same content in the meantime
+                self.delete(saved)
+
+        StoredBlob.objects.get_or_create(
+            name=name,
+            defaults={'digest': digest, 'size': content.size},
+        )
+        return name
+
+
+# =====================================================
+# REFERENCE COUNTS
+# =====================================================
+
+def blob_names(instance):
+    """The blob names the file fields of `instance` point at, as loaded (deferred fields are left out)."""
+    names = []
+    for field in BLOB_FIELDS[type(instance)]:
+        value = instance.__dict__.get(field)
+        name = getattr(value, 'name', value)
+        if name and name.startswith(BLOB_PREFIX):
+            names.append(name)
+    return names
+
+
+def _add_references(names, sign):
+    for count, group in _group_by_count(names).items():
+        StoredBlob.objects.filter(name__in=group).update(
+            refcount=Greatest(F('refcount') + sign * count, 0),
+            updated_at=timezone.now(),
+        )
+
+
+def _group_by_count(names):
+    groups = {}
+    for name, count in Counter(names).items():
+        groups.setdefault(count, []).append(name)
+    return groups
+
+
+def retain_blobs(names):
+    _add_references(names, 1)
+
+
+def release_blobs(names):
+    _add_references(names, -1)
+
+
+def update_references(old_names, new_names):
+    """Move references from `old_names` to `new_names`; nothing is written if they are the same."""
+    old, new = Counter(old_names), Counter(new_names)
+    retain_blobs(list((new - old).elements()))
+    release_blobs(list((old - new).elements()))
+
+
+def count_references():
+    """The number of file fields pointing at each blob, counted from the tables."""
+    counts = Counter()
+    for model, fields in BLOB_FIELDS.items():
+        for field in fields:
+            rows = model.objects.filter(**{f'{field}__startswith': BLOB_PREFIX}).values_list(field, flat=True)
+            counts.update(rows.iterator())
+    return counts
+
+
+def recount_blobs(batch_size=1000):
+    """Recompute every refcount from the tables. Returns the number of blobs corrected."""
+    counts = count_references()
+    changed = []
+    for blob in StoredBlob.objects.only('pk', 'name', 'refcount').iterator(chunk_size=batch_size):
+        if blob.refcount != counts[blob.name]:
+            blob.refcount = counts[blob.name]
+            blob.updated_at = timezone.now()
+            changed.append(blob)
+    StoredBlob.objects.bulk_update(changed, ['refcount', 'updated_at'], batch_size=batch_size)
+    return len(changed)
+
+
+def collect_blobs(grace=COLLECT_GRACE, dry_run=False):
+    """Delete the blobs nothing has pointed at for `grace`. Returns their number and total size."""
+    unreferenced = StoredBlob.objects.filter(refcount=0, updated_at__lt=timezone.now() - grace)
+    collected = size = 0
+    for pk, name, blob_size in list(unreferenced.values_list('pk', 'name', 'size')):
+        if not dry_run:
+            # The file goes first: an upload of the same content racing
+            # with this then writes it again instead of pointing at nothing
+            if not unreferenced.filter(pk=pk).exists():
+                continue
+            default_storage.delete(name)
+            default_storage.delete(preview_name(name))
+            unreferenced.filter(pk=pk).delete()
+        collected += 1
+        size += blob_size
+    return collected, size
+
+
+def adopt_legacy_files(dry_run=False):
+    """
+    Move files stored under their upload name before blobs existed into
+    blob storage, pointing the rows at the deduplicated blobs. Returns the
+    number of rows moved.
+    """
+    adopted = {}
+    moved = 0
+    for model, fields in BLOB_FIELDS.items():
+        for field in fields:
+            rows = (
+                model.objects
+                .exclude(**{f'{field}__startswith': BLOB_PREFIX})
+                .exclude(**{f'{field}__isnull': True})
+                .exclude(**{field: ''})
+                .values_list('pk', field)
+            )
+            for pk, name in rows.iterator():
+                if name not in adopted:
+                    if not default_storage.exists(name):
+                        continue
+                    if dry_run:
+                        adopted[name] = None
+                    else:
+                        with default_storage.open(name) as content:
+                            adopted[name] = default_storage.save(name, content)
+                moved += 1
+                if not dry_run:
+                    model.objects.filter(pk=pk).update(**{field: adopted[name]})
+                    retain_blobs([adopted[name]])
+
+    if not dry_run:
+        for name in adopted:
+            default_storage.delete(name)
+    return moved
@@ -1,3 +1,1388 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import random
+import re
+from datetime import date, timedelta
+import hashlib
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+from tempfile import NamedTemporaryFile
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection
+from django.db.models import Sum
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.templatetags.static import static
+from django.urls import reverse
+from PIL import Image
+
+from .activity import get_activity_bitmap
+from .cache import bump_dashboard_version, get_dashboard_cache_stats, get_dashboard_version
+from .dashboard_stats import build_dashboard_stats
+from .imports import import_progress
+from .completion import complete_goal, complete_goals, complete_skill, complete_skills
+from .models import (
+    ActivityBitmap, DailyStudyRollup, NoteLibrary, SearchDocument, Skill, SkillGoal, SkillProgress, StoredBlob,
+)
+from .pagination import encode_cursor
+from .progress import DuplicateProgress, submit_progress
+from .skill_stats import stale_skills
+from .previews import render_preview
+from .search import rebuild_search_index, search
+from .storage import collect_blobs, preview_name, recount_blobs
+from .timeseries import TimeSeries, cumulative, heatmap_grid, rolling_mean, to_list
+from .workload import Workload, seed_user
+
+
+TEST_SETTINGS = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'STORAGES': {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+}
+
+
+def seed(username, skills):
+    return seed_user(username, Workload(skills=skills, goals=2, days=14, notes=2, completed=0))
+
+
+def statements(queries):
+    """(verb, table) of each captured statement, leaving out savepoints."""
+    return [q['sql'].split('"')[:2] for q in queries if 'SAVEPOINT' not in q['sql']]
+
+
+class TempMediaMixin:
+    """Stores uploads in a temporary MEDIA_ROOT with the content-addressed storage."""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        storages = {**TEST_SETTINGS['STORAGES'], 'default': {'BACKEND': 'Skill_Tracker.storage.ContentAddressedStorage'}}
+        media = override_settings(MEDIA_ROOT=self.media_root, STORAGES=storages)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+# =====================================================
+# QUERY BUDGETS
+# =====================================================
+
+# (url name, args, max queries). `args` names objects of the seeded user:
+# its first skill, goal, progress entry and note. Views that change data
+# come last, so they don't affect the ones measured after them. Savepoints
+# of the transactions a view opens count towards its budget.
+QUERY_BUDGETS = [
+    # Skill_Tracker/urls.py
+    ('index', (), 0),
+    ('user_index', (), 11),
+    ('dashboard', (), 7),
+    ('dashboard_skills', (), 4),
+    ('refresh_dashboard_api', (), 7),
+    ('get_skill_data_api', ('skill',), 3),
+    ('dashboard_cache_stats', (), 2),
+    ('add_skill', (), 2),
+    ('edit_skill', ('skill',), 3),
+    ('delete_skill', ('skill',), 3),
+    ('view_skill', ('goal',), 5),
+    ('skill_list', (), 5),
+    ('skill_goal', (), 3),
+    ('view_goals', (), 4),
+    ('view_goals', ('skill',), 5),
+    ('view_goal_detail', ('skill', 'goal'), 4),
+    ('goal_detail', ('goal',), 4),
+    ('edit_goal', ('goal',), 5),
+    ('delete_goal', ('goal',), 4),
+    ('skill_progress_list', (), 6),
+    ('add_skill_progress', ('skill',), 4),
+    ('delete_skill_progress', ('progress',), 5),
+    ('edit_skill_progress', ('progress',), 3),
+    ('note_library', (), 5),
+    ('add_note', ('skill',), 3),
+    ('delete_note', ('note',), 3),
+    ('import_progress', (), 2),
+    ('search', (), 2),
+    # accounts/urls.py
+    ('register', (), 0),
+    ('login_view', (), 0),
+    ('reset_password', (), 0),
+    ('profile', (), 8),
+    # Changes data
+    ('mark_goal_completed', ('goal',), 7),
+    ('mark_skill_completed', ('skill',), 7),
+    ('logout_view', (), 4),
+]
+
+
+@override_settings(**TEST_SETTINGS)
+class QueryBudgetTests(TestCase):
+    """
+    Every URL must stay within its query budget, and run the same number
+    of queries for a user with 1 skill as for one with 50: a count that
+    grows with the data is an N+1 in the view or its template.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.small = seed('budget_small', skills=1)
+        cls.large = seed('budget_large', skills=50)
+
+    def objects(self, user):
+        return {
+            'skill': user.skills.order_by('pk').first(),
+            'goal': user.goals.order_by('pk').first(),
+            'progress': user.skill_progress.order_by('pk').first(),
+            'note': user.notes.order_by('pk').first(),
+        }
+
+    def count_queries(self, user, name, args):
+        objects = self.objects(user)
+        url = reverse(name, args=[objects[arg].pk for arg in args])
+
+        self.client.force_login(user)
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertLess(response.status_code, 500, url)
+        return len(queries)
+
+    def test_query_budgets(self):
+        for name, args, budget in QUERY_BUDGETS:
+            with self.subTest(view=name, args=args):
+                small = self.count_queries(self.small, name, args)
+                large = self.count_queries(self.large, name, args)
+
+                self.assertLessEqual(small, budget, f"{name} ran {small} queries with 1 skill")
+                self.assertEqual(large, small, f"{name} queries grow with the number of skills")
+
+
+# =====================================================
+# QUERYSETS
+# =====================================================
+
+class SkillQuerySetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('querysets', Workload(skills=3, goals=3, days=20, notes=0))
+
+    def test_goal_hours(self):
+        for skill in Skill.objects.for_user(self.user).with_goal_hours():
+            self.assertEqual(skill.goal_hours, sum(g.daily_study_hours for g in skill.goals.all()))
+
+    def test_latest_goal_uses_prefetch(self):
+        skills = list(Skill.objects.for_user(self.user).with_latest_goal())
+
+        with self.assertNumQueries(0):
+            latest = [skill.latest_goal for skill in skills]
+        for skill, goal in zip(skills, latest):
+            self.assertEqual(goal, skill.goals.order_by('-created_at', '-pk').first())
+
+
+class SkillGoalProgressTests(TestCase):
+    PROPERTIES = [
+        'total_days', 'days_completed', 'total_hours_required',
+        'remaining_hours', 'progress_percentage', 'is_overdue',
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('goal_progress', Workload(skills=1, goals=0, days=0, notes=0))
+        skill = cls.user.skills.get()
+        today = date.today()
+        # (start offset, target offset, daily hours, completed), in days from today
+        for start, target, hours, completed in [
+            (-29, 71, 2, False),    # 29%: float arithmetic would give 28
+            (-10, -1, 3, False),    # overdue
+            (-10, -1, 3, True),     # finished late, not overdue
+            (5, 30, None, False),   # not started yet
+            (0, 0, 1, False),       # zero-length goal
+            (0, -5, 1, False),      # target before start, also overdue
+        ]:
+            goal = SkillGoal.objects.create(
+                user=cls.user, skill=skill, goal_description='goal',
+                target_date=today + timedelta(days=target),
+                daily_study_hours=hours, is_completed=completed,
+            )
+            SkillGoal.objects.filter(pk=goal.pk).update(start_date=today + timedelta(days=start))
+
+    def test_annotations_match_properties(self):
+        for goal in SkillGoal.objects.for_user(self.user).with_progress():
+            plain = SkillGoal.objects.get(pk=goal.pk)
+            for name in self.PROPERTIES:
+                with self.subTest(goal=goal.pk, property=name):
+                    self.assertEqual(goal.__dict__[name], getattr(plain, name))
+
+    def test_view_goals_sorts_and_filters_in_sql(self):
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('view_goals'), {'sort': 'progress'})
+        progress = [goal.progress_percentage for goal in response.context['goals']]
+        self.assertEqual(progress, sorted(progress, reverse=True))
+
+        response = self.client.get(reverse('view_goals'), {'status': 'overdue'})
+        self.assertEqual(len(response.context['goals']), 2)
+        self.assertEqual(response.context['overdue_count'], 2)
+
+
+class SkillProgressConstraintTests(TestCase):
+
+    def test_one_entry_per_skill_per_day(self):
+        user = seed_user('one_per_day', Workload(skills=1, goals=0, days=1, activity=1, notes=0))
+        entry = user.skill_progress.get()
+
+        with self.assertRaises(IntegrityError):
+            SkillProgress.objects.create(user=user, skill=entry.skill, date=entry.date, actual_time=1)
+
+
+class LoadedStateTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('loaded_state', Workload(skills=1, goals=1, days=3, activity=1, notes=1))
+
+    def test_deferred_fields_are_not_loaded_on_init(self):
+        for queryset in [
+            SkillProgress.objects.only('id'),
+            SkillProgress.objects.defer('date'),
+            SkillGoal.objects.only('id'),
+            NoteLibrary.objects.only('id'),
+        ]:
+            with self.subTest(queryset=str(queryset.query)), self.assertNumQueries(1):
+                self.assertTrue(list(queryset))
+
+    def test_saving_a_deferred_entry_keeps_derived_data(self):
+        entry = SkillProgress.objects.only('id', 'actual_time').filter(user=self.user).first()
+        entry.actual_time = 7
+        entry.save()
+
+        rollup = DailyStudyRollup.objects.get(skill_id=entry.skill_id, date=entry.date)
+        self.assertEqual(rollup.actual_hours, 7)
+        self.assertFalse(stale_skills(Skill.objects.filter(user=self.user)).exists())
+
+
+class RollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('rollups', Workload(skills=2, goals=0, days=0, notes=0))
+        cls.first, cls.second = cls.user.skills.order_by('pk')
+
+    def rollups(self):
+        return sorted(
+            DailyStudyRollup.objects.filter(user=self.user)
+            .values_list('skill_id', 'date', 'actual_hours', 'planned_hours', 'extra_hours', 'entries')
+        )
+
+    def test_rollups_follow_create_edit_and_delete(self):
+        today = date.today()
+        yesterday = today - timedelta(days=1)
+        entry = SkillProgress.objects.create(
+            user=self.user, skill=self.first, date=today, planned_time=2, actual_time=3, extra_time=1,
+        )
+        self.assertEqual(self.rollups(), [(self.first.pk, today, 3, 2, 1, 1)])
+
+        entry.actual_time = 5
+        entry.save()
+        self.assertEqual(self.rollups(), [(self.first.pk, today, 5, 2, 1, 1)])
+
+        entry.date = yesterday
+        entry.save()
+        self.assertEqual(self.rollups(), [(self.first.pk, yesterday, 5, 2, 1, 1)])
+
+        entry.skill = self.second
+        entry.save()
+        self.assertEqual(self.rollups(), [(self.second.pk, yesterday, 5, 2, 1, 1)])
+
+        entry.delete()
+        self.assertEqual(self.rollups(), [])
+
+    def test_rebuild_matches_the_signals(self):
+        for days_ago in range(5):
+            for skill in (self.first, self.second):
+                SkillProgress.objects.create(
+                    user=self.user, skill=skill, date=date.today() - timedelta(days=days_ago),
+                    planned_time=2, actual_time=days_ago,
+                )
+        maintained = self.rollups()
+
+        call_command('rebuild_rollups', user=['rollups'], stdout=StringIO())
+        self.assertEqual(self.rollups(), maintained)
+
+
+class ActivityBitmapTests(TestCase):
+
+    @staticmethod
+    def reference(days, today, weeks):
+        """Streaks and grid of the set `days`, computed day by day."""
+        current = 0
+        while today - timedelta(days=current) in days:
+            current += 1
+        longest = run = 0
+        for day in sorted(days):
+            run = run + 1 if day - timedelta(days=1) in days else 1
+            longest = max(longest, run)
+        grid = [
+            [today - timedelta(days=weeks * 7 - w * 7 - d) in days for d in range(7)]
+            for w in range(weeks)
+        ]
+        return current, longest, len(days), grid
+
+    def test_bit_operations_match_a_day_by_day_reference(self):
+        rng = random.Random(0)
+        today = date(2026, 3, 1)
+        for trial in range(200):
+            start = today - timedelta(days=rng.randint(0, 40))
+            bitmap = ActivityBitmap(start_date=start)
+            days = set()
+            for _ in range(rng.randint(0, 60)):
+                # Days before `start` rebase the bitmap; ranges cross byte boundaries
+                day = today - timedelta(days=rng.randint(0, 70))
+                if rng.random() < 0.75:
+                    bitmap.mark(day)
+                    days.add(day)
+                else:
+                    bitmap.unmark(day)
+                    if day >= bitmap.start_date:
+                        days.discard(day)
+            self.assertTrue(all(bitmap.is_active(day) for day in days))
+
+            with self.subTest(trial=trial):
+                self.assertEqual(
+                    (bitmap.current_streak(today), bitmap.longest_streak, bitmap.active_days, bitmap.grid(today, 4)),
+                    self.reference(days, today, 4),
+                )
+
+    def test_marking_an_earlier_day_rebases_the_bitmap(self):
+        start = date(2026, 1, 10)
+        bitmap = ActivityBitmap(start_date=start)
+        bitmap.mark(start)
+        bitmap.mark(start + timedelta(days=8))
+
+        bitmap.mark(start - timedelta(days=9))
+        self.assertEqual(bitmap.start_date, start - timedelta(days=9))
+        self.assertEqual(bitmap.value, 1 | 1 << 9 | 1 << 17)
+        self.assertEqual(len(bytes(bitmap.bits)), 3)
+
+        bitmap.unmark(start + timedelta(days=8))
+        self.assertEqual(len(bytes(bitmap.bits)), 2)
+
+    def test_user_index_shows_the_current_streak(self):
+        user = seed_user('streaker', Workload(skills=1, goals=0, days=0, notes=0))
+        skill = user.skills.get()
+        for days_ago in (0, 1, 2, 4):
+            SkillProgress.objects.create(
+                user=user, skill=skill, date=date.today() - timedelta(days=days_ago), actual_time=1,
+            )
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('user_index'))
+        self.assertEqual(response.context['streak'], 3)
+        self.assertEqual(get_activity_bitmap(user).longest_streak, 3)
+
+
+class SubmitProgressTests(TempMediaMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('submit_progress', Workload(skills=1, goals=0, days=0, notes=0))
+        cls.skill = cls.user.skills.get()
+
+    def entry(self, hours):
+        return SkillProgress(user=self.user, skill=self.skill, planned_time=2, actual_time=hours, extra_time=0)
+
+    def test_submission_runs_a_fixed_number_of_statements(self):
+        with CaptureQueriesContext(connection) as queries:
+            submit_progress(self.entry(3))
+        # One write per table: the entry, its rollup upsert, the day's bit
+        # and the skill counters with last_practiced
+        self.assertEqual(statements(queries), [
+            ['INSERT INTO ', 'Skill_Tracker_skillprogress'],
+            ['INSERT INTO ', 'Skill_Tracker_dailystudyrollup'],
+            ['UPDATE ', 'Skill_Tracker_activitybitmap'],
+            ['UPDATE ', 'Skill_Tracker_skill'],
+        ])
+        self.assertTrue(get_activity_bitmap(self.user).is_active(date.today()))
+        self.skill.refresh_from_db()
+        self.assertEqual(self.skill.last_practiced, date.today())
+
+    def test_duplicate_is_rejected_or_merged(self):
+        submit_progress(self.entry(3))
+
+        with self.assertRaises(DuplicateProgress):
+            submit_progress(self.entry(2))
+
+        entry, merged = submit_progress(self.entry(2), merge=True)
+        self.assertTrue(merged)
+        self.assertEqual(entry.actual_time, 5)
+        self.assertEqual(self.user.skill_progress.count(), 1)
+
+        rollup = DailyStudyRollup.objects.get(user=self.user, skill=self.skill, date=entry.date)
+        self.assertEqual(rollup.actual_hours, 5)
+        self.assertEqual(rollup.entries, 1)
+
+        self.skill.refresh_from_db()
+        self.assertEqual(self.skill.last_practiced, entry.date)
+        self.assertEqual(self.skill.total_hours, 5)
+
+    def test_merged_entry_keeps_the_uploaded_files(self):
+        submit_progress(self.entry(3))
+
+        second = self.entry(1)
+        second.certificate_file = SimpleUploadedFile('certificate.pdf', b'%PDF- merged')
+        entry, merged = submit_progress(second, merge=True)
+
+        self.assertTrue(merged)
+        entry.refresh_from_db()
+        self.assertTrue(entry.certificate_file.name.startswith('blobs/'))
+        self.assertEqual(entry.certificate_file.read(), b'%PDF- merged')
+        self.assertEqual(StoredBlob.objects.get(name=entry.certificate_file.name).refcount, 1)
+
+
+class CompletionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('completion', Workload(skills=3, goals=2, days=0, notes=0, completed=0))
+
+    def test_last_open_goal_completes_the_skill(self):
+        skill = self.user.skills.order_by('pk').first()
+        first, last = skill.goals.order_by('pk')
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(complete_goal(first))
+        self.assertEqual(statements(queries), [
+            ['UPDATE ', 'Skill_Tracker_skillgoal'],
+            ['UPDATE ', 'Skill_Tracker_skill'],
+        ])
+        skill.refresh_from_db()
+        self.assertFalse(skill.is_completed)
+
+        self.assertTrue(complete_goal(last))
+        skill.refresh_from_db()
+        self.assertTrue(skill.is_completed)
+
+        # Nothing left to change: no writes
+        with self.assertNumQueries(0):
+            self.assertFalse(complete_goal(last))
+
+    def test_completing_a_skill_completes_its_goals(self):
+        skill = self.user.skills.order_by('pk').last()
+
+        self.assertTrue(complete_skill(skill, deactivate=True))
+        self.assertFalse(skill.goals.filter(is_completed=False).exists())
+        skill.refresh_from_db()
+        self.assertFalse(skill.is_active)
+
+        with self.assertNumQueries(0):
+            self.assertFalse(complete_skill(skill))
+
+    def test_editing_a_goal_in_place_applies_the_completion_rule(self):
+        skill = self.user.skills.order_by('pk').first()
+        goal = skill.goals.order_by('pk').first()
+        # Every goal completed without going through complete_goals()
+        skill.goals.update(is_completed=True)
+        self.client.force_login(self.user)
+
+        response = self.client.post(reverse('edit_goal', args=[goal.pk]), {
+            'skill': skill.pk,
+            'goal_description': 'Reworded',
+            'target_date': goal.target_date.isoformat(),
+            'daily_study_hours': goal.daily_study_hours,
+        })
+        self.assertRedirects(response, reverse('complete_skill_decision', args=[goal.pk]))
+        skill.refresh_from_db()
+        self.assertTrue(skill.is_completed)
+        self.assertEqual(skill.goals_completed, 2)
+
+    def test_bulk_variants(self):
+        skills = Skill.objects.for_user(self.user)
+
+        self.assertEqual(complete_goals(SkillGoal.objects.filter(skill__in=skills[:2])), 4)
+        self.assertEqual(list(skills.order_by('pk').values_list('is_completed', flat=True)), [True, True, False])
+
+        self.assertEqual(complete_skills(skills), 1)
+        self.assertFalse(SkillGoal.objects.for_user(self.user).filter(is_completed=False).exists())
+        self.assertEqual(complete_skills(skills), 0)
+
+
+class SkillStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('skill_stats', Workload(skills=2, goals=2, days=10, notes=0))
+
+    def assertCountersMatch(self):
+        skills = Skill.objects.for_user(self.user)
+        self.assertFalse(stale_skills(skills).exists())
+        for skill in skills:
+            entries = skill.progress_entries.all()
+            self.assertEqual(skill.total_hours, sum(p.actual_time for p in entries))
+            self.assertEqual(skill.progress_days, len(entries))
+            self.assertEqual(skill.last_entry_date, max((p.date for p in entries), default=None))
+            self.assertEqual(skill.goals_total, skill.goals.count())
+            self.assertEqual(skill.goals_completed, skill.goals.filter(is_completed=True).count())
+
+    def test_counters_follow_every_write_path(self):
+        self.assertCountersMatch()
+        first, second = Skill.objects.for_user(self.user).order_by('pk')
+        today = date.today()
+
+        # Progress: add, merge, edit, move to another skill and day, delete
+        entry = SkillProgress.objects.create(user=self.user, skill=first, date=today + timedelta(days=1), actual_time=3)
+        submit_progress(SkillProgress(user=self.user, skill=first, date=entry.date, actual_time=2), merge=True)
+        entry.refresh_from_db()
+        entry.actual_time += 1
+        entry.save()
+        self.assertCountersMatch()
+
+        entry.skill = second
+        entry.date = today + timedelta(days=2)
+        entry.save()
+        self.assertCountersMatch()
+        second.progress_entries.order_by('date').last().delete()
+        self.assertCountersMatch()
+
+        # Goals: add, complete, move, delete, complete the skill
+        goal = SkillGoal.objects.create(user=self.user, skill=first, goal_description='g', target_date=today)
+        complete_goal(goal)
+        goal.skill = second
+        goal.save()
+        self.assertCountersMatch()
+        goal.delete()
+        complete_skill(first)
+        self.assertCountersMatch()
+
+    def test_recount_repairs_drift(self):
+        skills = Skill.objects.for_user(self.user)
+        skills.update(total_hours=0, goals_total=99, last_entry_date=None)
+        self.assertEqual(stale_skills(skills).count(), 2)
+
+        call_command('recount_skill_stats', user=[self.user.username], stdout=StringIO())
+        self.assertCountersMatch()
+
+
+class KeysetPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('keyset', Workload(skills=3, goals=0, days=60, activity=1, notes=0))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_page(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('skill_progress_list'), params)
+        return response.context, len(queries)
+
+    def test_pages_walk_the_whole_history_at_constant_cost(self):
+        expected = list(self.user.skill_progress.order_by('-date', '-id').values_list('pk', flat=True))
+
+        seen, costs, pages = [], set(), []
+        context, cost = self.get_page()
+        while True:
+            pages.append(context)
+            seen += [entry.pk for entry in context['progress_list']]
+            costs.add(cost)
+            if not context['next_cursor']:
+                break
+            context, cost = self.get_page(after=context['next_cursor'])
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(pages), 4)
+        self.assertEqual(len(costs), 1)
+
+        # Going back from the last page gives the one before it
+        context, _ = self.get_page(before=pages[-1]['previous_cursor'])
+        self.assertEqual(context['progress_list'], pages[-2]['progress_list'])
+
+    def test_filters_run_in_sql(self):
+        skill = self.user.skills.order_by('pk').first()
+        start = date.today() - timedelta(days=9)
+
+        context, _ = self.get_page(skill=skill.pk, start=start.isoformat(), status='pending')
+        entries = context['progress_list']
+        self.assertEqual(len(entries), 10)
+        self.assertTrue(all(e.skill_id == skill.pk and e.date >= start for e in entries))
+        self.assertIsNone(context['next_cursor'])
+
+    def test_invalid_cursor_gives_the_first_page(self):
+        first, _ = self.get_page()
+        for cursor in ['garbage', encode_cursor(['not a date', 1]), encode_cursor([1])]:
+            context, _ = self.get_page(after=cursor)
+            self.assertEqual(context['progress_list'], first['progress_list'])
+
+
+class DashboardStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('stats', Workload(skills=3, goals=2, days=45, notes=0, completed=0.5))
+
+    def hours(self, **filters):
+        return self.user.skill_progress.filter(**filters).aggregate(total=Sum('actual_time'))['total'] or 0
+
+    def test_summary_matches_the_progress_table(self):
+        today = date.today()
+        stats = build_dashboard_stats(self.user, today)
+        goals = self.user.goals
+
+        self.assertEqual(stats['total_skills'], self.user.skills.count())
+        self.assertEqual(stats['active_skills'], self.user.skills.filter(is_active=True).count())
+        self.assertEqual((stats['goal_total'], stats['goal_completed']), (goals.count(), goals.filter(is_completed=True).count()))
+        self.assertEqual(stats['total_study_time'], self.hours())
+        self.assertEqual(stats['today_progress'], self.hours(date=today))
+        self.assertEqual(stats['weekly_progress'], self.hours(date__gte=today - timedelta(days=7)))
+        self.assertEqual(stats['monthly_progress'], self.hours(date__gte=today - timedelta(days=30)))
+        self.assertEqual(stats['total_days_active'], self.user.skill_progress.values('date').distinct().count())
+        self.assertEqual(stats['overall']['daily'][-1], stats['today_progress'])
+        self.assertEqual(stats['overall']['cumulative'][-1], self.hours(date__gt=today - timedelta(days=30)))
+
+        active = set(self.user.skill_progress.values_list('date', flat=True))
+        self.assertEqual(stats['heatmap']['active'], [
+            [today - timedelta(days=4 * 7 - w * 7 - d) in active for d in range(7)] for w in range(4)
+        ])
+        self.assertEqual(stats['longest_streak'], ActivityBitmapTests.reference(active, today, 4)[1])
+
+        performance = {row['skill']: row['total'] for row in stats['skill_performance']}
+        for skill in self.user.skills.all():
+            self.assertEqual(performance[skill.title], self.hours(skill=skill))
+
+
+@override_settings(**TEST_SETTINGS)
+class DashboardPageTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed('dashboard_page', skills=3)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_plotly_is_a_static_file(self):
+        path = finders.find('plotly/plotly.min.js')
+        self.assertTrue(path and os.path.getsize(path) > 1_000_000)
+
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, static('plotly/plotly.min.js'), count=1)
+        # The bundle itself is not inlined
+        self.assertLess(len(response.content), 500_000)
+
+    def test_charts_are_json_specs(self):
+        response = self.client.get(reverse('dashboard'))
+        specs = json.loads(re.search(
+            r'<script id="chart-specs" type="application/json">(.*?)</script>', response.content.decode(), re.S,
+        )[1])
+        self.assertEqual(set(specs), {'overall', 'heatmap', 'weekly'})
+        for name, spec in specs.items():
+            with self.subTest(chart=name):
+                self.assertEqual(set(spec), {'data', 'layout'})
+                self.assertContains(response, f'data-chart="{name}"')
+        heatmap = specs['heatmap']['data'][0]['z']
+        self.assertEqual([len(week) for week in heatmap], [7, 7, 7, 7])
+        self.assertTrue(all(isinstance(hours, int) for week in heatmap for hours in week))
+        self.assertContains(response, f"Best: {response.context['longest_streak']} days")
+        self.assertNotContains(response, 'plotly-graph-div')
+
+        cards = self.client.get(reverse('dashboard_skills')).json()
+        for skill in self.user.skills.all():
+            for chart in ('bar', 'pie', 'line', 'gauge'):
+                self.assertIn(f'skill-{skill.pk}-{chart}', cards['specs'])
+
+
+class TimeSeriesTests(SimpleTestCase):
+    """The vectorised series against the per-day loops they replaced."""
+    START, END = date(2026, 1, 20), date(2026, 3, 10)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        rng = random.Random(0)
+        cls.daily = {1: {}, 2: {}}
+        rows = []
+        for n in range((cls.END - cls.START).days + 1):
+            day = cls.START + timedelta(days=n)
+            for skill_id in (1, 2):
+                # Gaps of several days, and both sides of each month boundary
+                if rng.random() < 0.4:
+                    hours = rng.randint(0, 6)
+                    cls.daily[skill_id][day] = hours
+                    rows.append((skill_id, day, hours))
+        # Outside the window, or an unknown skill: dropped
+        rows += [(1, cls.START - timedelta(days=1), 5), (1, cls.END + timedelta(days=1), 5), (3, cls.START, 5)]
+        cls.series = TimeSeries.from_rows(rows, cls.START, cls.END, skill_ids=[1, 2])
+        cls.days = [cls.START + timedelta(days=n) for n in range((cls.END - cls.START).days + 1)]
+
+    def test_rolling_mean(self):
+        for row, skill_id in zip(self.series.matrix, (1, 2)):
+            data = [self.daily[skill_id].get(day, 0) for day in self.days]
+            expected = [
+                None if i < 6 else round(sum(data[i - 6:i + 1]) / 7, 1)
+                for i in range(len(data))
+            ]
+            self.assertEqual(to_list(row), data)
+            self.assertEqual(to_list(rolling_mean(row), 1), expected)
+
+    def test_month_totals(self):
+        months = [(2025, 12), (2026, 1), (2026, 2), (2026, 3)]
+        totals = self.series.month_totals(months)
+        for i, skill_id in enumerate((1, 2)):
+            monthly = {}
+            for day, hours in self.daily[skill_id].items():
+                monthly[day.year, day.month] = monthly.get((day.year, day.month), 0) + hours
+            self.assertEqual(to_list(totals[i]), [monthly.get(month, 0) for month in months])
+
+    def test_heatmap_grid(self):
+        today = self.END
+        by_day = {}
+        for per_skill in self.daily.values():
+            for day, hours in per_skill.items():
+                by_day[day] = by_day.get(day, 0) + hours
+        expected = [
+            [by_day.get(today - timedelta(days=4 * 7 - w * 7) + timedelta(days=d), 0) for d in range(7)]
+            for w in range(4)
+        ]
+        self.assertEqual(heatmap_grid(self.series.totals(), 4).tolist(), expected)
+        self.assertEqual(to_list(cumulative(self.series.totals()))[-1], sum(by_day.values()))
+
+
+@override_settings(**TEST_SETTINGS, DASHBOARD_CACHE_STATS=True)
+class DashboardCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed('cached', skills=2)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def misses(self):
+        return get_dashboard_cache_stats()['misses']
+
+    def test_saves_invalidate_the_cached_dashboard(self):
+        self.client.get(reverse('dashboard'))
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(get_dashboard_cache_stats()['hits'], 1)
+
+        skill = self.user.skills.order_by('pk').first()
+        for instance in [
+            self.user.skill_progress.order_by('pk').first(),
+            self.user.goals.order_by('pk').first(),
+            skill,
+            self.user.notes.order_by('pk').first(),
+        ]:
+            with self.subTest(model=type(instance).__name__):
+                misses = self.misses()
+                instance.save()
+                self.client.get(reverse('dashboard'))
+                self.assertEqual(self.misses(), misses + 1)
+
+    def test_bumps_never_reuse_a_version(self):
+        versions = {get_dashboard_version(self.user.id)}
+        with mock.patch.object(cache, 'incr', side_effect=AssertionError("incr is not atomic on every backend")):
+            for _ in range(3):
+                bump_dashboard_version(self.user.id)
+                versions.add(get_dashboard_version(self.user.id))
+        self.assertEqual(len(versions), 4)
+
+    @override_settings(DASHBOARD_CACHE_STATS=False)
+    def test_hits_are_not_counted_by_default(self):
+        self.client.get(reverse('dashboard'))
+        self.client.get(reverse('dashboard'))
+        self.assertEqual(get_dashboard_cache_stats(), {'hits': 0, 'misses': 0, 'hit_ratio': None, 'enabled': False})
+
+
+@override_settings(**TEST_SETTINGS)
+class DashboardSkillCardsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Two full pages and one card
+        cls.user = seed_user('cards', Workload(skills=13, goals=1, days=7, notes=0))
+        cls.exact = seed_user('cards_exact', Workload(skills=12, goals=0, days=0, notes=0))
+
+    def setUp(self):
+        cache.clear()
+
+    def page(self, user, page):
+        self.client.force_login(user)
+        return self.client.get(reverse('dashboard_skills'), {'page': page}).json()
+
+    def skill_ids(self, data):
+        return [int(key.split('-')[1]) for key in data['specs'] if key.endswith('-bar')]
+
+    def test_pages_cover_every_skill_once(self):
+        pages = [self.page(self.user, n) for n in (1, 2, 3)]
+        self.assertEqual([page['next_page'] for page in pages], [2, 3, None])
+        self.assertEqual([len(self.skill_ids(page)) for page in pages], [6, 6, 1])
+
+        ids = [skill_id for page in pages for skill_id in self.skill_ids(page)]
+        self.assertEqual(ids, list(self.user.skills.order_by('id').values_list('id', flat=True)))
+        for page in pages:
+            self.assertEqual(page['html'].count('class="skill-card'), len(self.skill_ids(page)))
+
+    def test_page_boundaries(self):
+        # A last page that is exactly full has no next page
+        self.assertEqual(self.page(self.exact, 2)['next_page'], None)
+        self.assertEqual(len(self.skill_ids(self.page(self.exact, 2))), 6)
+        # Past the end, or an invalid page number
+        past = self.page(self.exact, 3)
+        self.assertEqual((past['specs'], past['next_page']), ({}, None))
+        self.assertNotIn('skill-card', past['html'])
+        self.assertEqual(self.page(self.exact, 'x')['next_page'], 2)
+        self.assertEqual(self.page(self.exact, 0)['next_page'], 2)
+
+
+@override_settings(**TEST_SETTINGS)
+class DashboardRefreshTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed('refresh', skills=2)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_unchanged_data_is_not_modified(self):
+        url = reverse('refresh_dashboard_api')
+        response = self.client.get(url, {'days': 7})
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        response = self.client.get(url, {'days': 7}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # Another window is another representation
+        self.assertEqual(self.client.get(url, {'days': 30}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_saving_progress_changes_the_etag(self):
+        url = reverse('refresh_dashboard_api')
+        etag = self.client.get(url)['ETag']
+
+        entry = self.user.skill_progress.order_by('pk').first()
+        entry.actual_time += 1
+        entry.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_renaming_a_skill_changes_the_etag(self):
+        url = reverse('refresh_dashboard_api')
+        etag = self.client.get(url)['ETag']
+
+        skill = self.user.skills.order_by('pk').first()
+        skill.title = 'Renamed'
+        skill.save()
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(**TEST_SETTINGS, QUERY_COUNT_THRESHOLD=3)
+class QueryCountMiddlewareTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed('instrumented', skills=2)
+
+    def setUp(self):
+        middleware = override_settings(MIDDLEWARE=['Skill_Tracker.middleware.QueryCountMiddleware', *settings.MIDDLEWARE])
+        middleware.enable()
+        self.addCleanup(middleware.disable)
+        self.client.force_login(self.user)
+
+    def test_server_timing_and_log(self):
+        with self.assertLogs('Skill_Tracker.queries', 'INFO') as logs, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('skill_list'))
+
+        self.assertRegex(response['Server-Timing'], rf'^db;dur=[\d.]+;desc="{len(queries)} queries", app;dur=[\d.]+$')
+        info, warning = logs.records
+        self.assertEqual((info.view, info.queries), ('skill_list', len(queries)))
+        # Over the threshold: the most repeated SQL is logged
+        self.assertEqual(warning.levelname, 'WARNING')
+        self.assertIn(f'ran {len(queries)} queries (threshold 3)', warning.getMessage())
+
+    def test_queries_of_a_streamed_body_are_counted(self):
+        with self.assertLogs('Skill_Tracker.queries', 'INFO') as logs:
+            response = self.client.get(reverse('export_data', args=['progress', 'csv']))
+            header_count = int(re.search(r'desc="(\d+) queries"', response['Server-Timing'])[1])
+            # Logged once the body has been sent
+            self.assertEqual(logs.records, [])
+            with CaptureQueriesContext(connection) as queries:
+                b''.join(response.streaming_content)
+
+        self.assertGreater(len(queries), 0)
+        self.assertEqual(logs.records[0].queries, header_count + len(queries))
+
+
+@override_settings(**TEST_SETTINGS)
+class WorkloadCommandTests(TestCase):
+
+    def test_seed_workload(self):
+        out = StringIO()
+        call_command('seed_workload', users=2, skills=2, goals=1, days=10, notes=1, activity=1, prefix='cmd', stdout=out)
+
+        self.assertIn('Seeded 2 user(s)', out.getvalue())
+        user = User.objects.get(username='cmd2')
+        self.assertEqual((user.skills.count(), user.goals.count(), user.notes.count()), (2, 2, 2))
+        self.assertEqual(user.skill_progress.count(), 20)
+        self.assertEqual(DailyStudyRollup.objects.filter(user=user).count(), 20)
+
+    def test_benchmark_views(self):
+        seed_user('bench1', Workload(skills=2, goals=1, days=7, notes=1))
+        out = StringIO()
+        call_command('benchmark_views', view=['dashboard', 'skill_list'], requests=2, warmup=0, stdout=out)
+
+        report = json.loads(out.getvalue())
+        self.assertEqual(report['users'], ['bench1'])
+        self.assertEqual(set(report['views']), {'dashboard', 'skill_list'})
+        for result in report['views'].values():
+            self.assertEqual(result['status'], 200)
+            self.assertGreater(result['queries'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+
+    def test_benchmark_views_needs_users(self):
+        with self.assertRaisesMessage(CommandError, 'run seed_workload first'):
+            call_command('benchmark_views', prefix='nobody', stdout=StringIO())
+
+
+class ExplainHotQueriesTests(TestCase):
+
+    def test_every_hot_query_uses_an_index(self):
+        seed_user('explained', Workload(skills=2, goals=1, days=7, notes=1))
+        out = StringIO()
+        call_command('explain_hot_queries', user='explained', stdout=out)
+
+        self.assertIn('== dashboard: daily totals', out.getvalue())
+        self.assertIn("== add_skill_progress: merge into today's entry", out.getvalue())
+        self.assertNotIn('(full scan)', out.getvalue())
+        self.assertIn('Every hot query uses an index.', out.getvalue())
+
+    def test_unknown_user(self):
+        with self.assertRaisesMessage(CommandError, 'Unknown user: nobody'):
+            call_command('explain_hot_queries', user='nobody', stdout=StringIO())
+
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed('export', skills=2)
+        cls.other = seed('export_other', skills=1)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def download(self, kind, fmt):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('export_data', args=[kind, fmt]))
+            body = b''.join(response.streaming_content).decode()
+        return response, body, len(queries)
+
+    def test_csv_streams_every_row_of_the_user(self):
+        response, body, _ = self.download('progress', 'csv')
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(body.splitlines()))
+        expected = self.user.skill_progress.order_by('pk')
+        self.assertEqual([int(row['id']) for row in rows], list(expected.values_list('pk', flat=True)))
+        self.assertEqual(rows[0]['skill'], expected.first().skill.title)
+
+    def test_ndjson_has_one_object_per_line(self):
+        _, body, _ = self.download('goals', 'ndjson')
+        goals = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(goals), self.user.goals.count())
+        self.assertEqual({goal['skill_id'] for goal in goals}, set(self.user.skills.values_list('pk', flat=True)))
+
+    def test_export_cost_does_not_grow_with_the_data(self):
+        costs = {kind: self.download(kind, 'csv')[2] for kind in ['progress', 'goals', 'skills', 'notes']}
+        self.client.force_login(self.other)
+        self.assertEqual(costs, {kind: self.download(kind, 'csv')[2] for kind in costs})
+
+    def test_unknown_export_is_404(self):
+        self.assertEqual(self.client.get(reverse('export_data', args=['users', 'csv'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('export_data', args=['progress', 'xml'])).status_code, 404)
+
+
+class ImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('importer', Workload(skills=2, goals=0, days=0, notes=0))
+        cls.skills = list(cls.user.skills.order_by('pk'))
+
+    def csv_rows(self, days, skill=None, **values):
+        skill = skill or self.skills[0]
+        header = ['skill', 'date', 'actual_time', *values]
+        lines = [','.join(header)]
+        for n in range(days):
+            day = date.today() - timedelta(days=n)
+            lines.append(','.join([skill.title, day.isoformat(), '2', *map(str, values.values())]))
+        return StringIO('\n'.join(lines) + '\n')
+
+    def test_import_writes_entries_and_derived_data(self):
+        result = import_progress(self.user, self.csv_rows(30), 'csv', batch_size=7)
+
+        skill = Skill.objects.get(pk=self.skills[0].pk)
+        self.assertEqual((result.rows, result.created, result.error_count), (30, 30, 0))
+        self.assertEqual((skill.progress_days, skill.total_hours), (30, 60))
+        self.assertEqual(skill.last_practiced, date.today())
+        self.assertEqual(DailyStudyRollup.objects.filter(skill=skill).count(), 30)
+        self.assertFalse(stale_skills(Skill.objects.filter(user=self.user)).exists())
+        self.assertTrue(ActivityBitmap.objects.get(user=self.user).is_active(date.today() - timedelta(days=29)))
+
+    def test_extra_time_is_derived_from_the_planned_hours(self):
+        import_progress(self.user, self.csv_rows(2, planned_time=1, extra_time=7), 'csv')
+        self.assertEqual(set(self.user.skill_progress.values_list('extra_time', flat=True)), {1})
+
+        rollup = DailyStudyRollup.objects.filter(user=self.user).first()
+        self.assertEqual((rollup.planned_hours, rollup.extra_hours), (1, 1))
+
+    def test_only_the_imported_days_are_refreshed(self):
+        old_day = date.today() - timedelta(days=100)
+        untouched = DailyStudyRollup.objects.create(
+            user=self.user, skill=self.skills[0], date=old_day, actual_hours=9, entries=1,
+        )
+        import_progress(self.user, self.csv_rows(3), 'csv')
+
+        self.assertTrue(DailyStudyRollup.objects.filter(pk=untouched.pk, actual_hours=9).exists())
+        self.assertEqual(DailyStudyRollup.objects.filter(user=self.user).count(), 4)
+        bitmap = ActivityBitmap.objects.get(user=self.user)
+        self.assertTrue(bitmap.is_active(date.today() - timedelta(days=2)))
+        self.assertFalse(bitmap.is_active(date.today() - timedelta(days=3)))
+
+    def test_existing_entries_are_kept_or_replaced(self):
+        import_progress(self.user, self.csv_rows(5), 'csv')
+
+        result = import_progress(self.user, self.csv_rows(10, confidence_level=9), 'csv')
+        self.assertEqual((result.created, result.skipped), (5, 5))
+        self.assertEqual(self.user.skill_progress.filter(confidence_level=9).count(), 5)
+
+        result = import_progress(self.user, self.csv_rows(10, confidence_level=9), 'csv', replace=True)
+        self.assertEqual((result.created, result.updated), (0, 10))
+        self.assertEqual(self.user.skill_progress.filter(confidence_level=9).count(), 10)
+
+    def test_repeated_days_are_counted_once(self):
+        day = date.today().isoformat()
+        skill = self.skills[0].title
+        rows = f'skill,date,actual_time\n{skill},{day},1\n{skill},{day},2\n{skill},{day},3\n'
+
+        result = import_progress(self.user, StringIO(rows), 'csv')
+        self.assertEqual((result.rows, result.created, result.skipped, result.updated), (3, 1, 0, 0))
+        self.assertEqual(self.user.skill_progress.get().actual_time, 3)
+
+        result = import_progress(self.user, StringIO(rows), 'csv', replace=True)
+        self.assertEqual((result.rows, result.created, result.skipped, result.updated), (3, 0, 0, 1))
+
+        result = import_progress(self.user, StringIO(rows), 'csv')
+        self.assertEqual((result.rows, result.created, result.skipped, result.updated), (3, 0, 1, 0))
+
+    def test_invalid_rows_are_reported_and_left_out(self):
+        tomorrow = (date.today() + timedelta(days=1)).isoformat()
+        stream = StringIO(
+            'skill,date,actual_time\n'
+            f'{self.skills[0].title},{date.today()},3\n'
+            f'Unknown,{date.today()},3\n'
+            f'{self.skills[0].title},{tomorrow},3\n'
+            f'{self.skills[1].title},{date.today()},many\n'
+        )
+        result = import_progress(self.user, stream, 'csv')
+
+        self.assertEqual((result.rows, result.created, result.error_count), (4, 1, 3))
+        self.assertEqual([error.split(':')[0] for error in result.errors], ['Row 3', 'Row 4', 'Row 5'])
+
+    def test_rows_are_not_queried_one_by_one(self):
+        costs = []
+        for skill, days in [(self.skills[0], 20), (self.skills[1], 200)]:
+            with CaptureQueriesContext(connection) as queries:
+                import_progress(self.user, self.csv_rows(days, skill=skill), 'csv')
+            # bulk_create splits a batch into as many INSERTs as the
+            # backend's parameter limit needs; everything else is per import
+            costs.append([q for q in statements(queries) if not q[0].startswith('INSERT')])
+        self.assertEqual(costs[0], costs[1])
+
+    def test_json_formats_and_command(self):
+        day = date.today().isoformat()
+        rows = [{'skill': skill.title, 'date': day, 'actual_time': 1} for skill in self.skills]
+
+        result = import_progress(self.user, StringIO(json.dumps(rows)), 'json')
+        self.assertEqual(result.created, 2)
+
+        with NamedTemporaryFile('w', suffix='.ndjson') as file:
+            file.write('\n'.join(json.dumps({**row, 'actual_time': 4}) for row in rows))
+            file.flush()
+            out = StringIO()
+            call_command('import_progress', 'importer', file.name, '--replace', stdout=out)
+        self.assertIn('2 updated', out.getvalue())
+        self.assertEqual(self.user.skill_progress.filter(actual_time=4).count(), 2)
+
+    def test_upload_view(self):
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile('history.csv', self.csv_rows(3).getvalue().encode('utf-8-sig'))
+        response = self.client.post(reverse('import_progress'), {'file': upload})
+
+        self.assertRedirects(response, reverse('skill_progress_list'))
+        self.assertEqual(self.user.skill_progress.count(), 3)
+
+
+class ContentAddressedStorageTests(TempMediaMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('blobs', Workload(skills=1, goals=0, days=1, notes=0))
+        cls.skill = cls.user.skills.get()
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def upload_note(self, name, content):
+        response = self.client.post(reverse('add_note', args=[self.skill.pk]), {
+            'title': name,
+            'note_type': 'notes',
+            'file': SimpleUploadedFile(name, content),
+        })
+        self.assertEqual(response.status_code, 302)
+        return NoteLibrary.objects.filter(user=self.user).latest('pk')
+
+    def stored_files(self):
+        return sorted(os.path.relpath(os.path.join(root, name), self.media_root)
+                      for root, _, names in os.walk(self.media_root) for name in names)
+
+    def test_identical_uploads_share_one_blob(self):
+        content = b'%PDF-1.4 roadmap' * 1000
+        digest = hashlib.sha256(content).hexdigest()
+
+        first = self.upload_note('Django_vs_Flask.pdf', content)
+        second = self.upload_note('Django_vs_Flask.PDF', content)
+
+        self.assertEqual(first.file.name, f'blobs/{digest[:2]}/{digest}.pdf')
+        self.assertEqual(second.file.name, first.file.name)
+        self.assertEqual(self.stored_files(), [first.file.name])
+        self.assertEqual(StoredBlob.objects.get().refcount, 2)
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=1024)
+    def test_streamed_uploads_are_not_read_again(self):
+        content = os.urandom(50_000)
+        with mock.patch('Skill_Tracker.storage.file_digest', side_effect=AssertionError("second read")):
+            note = self.upload_note('course.pdf', content)
+        with note.file.open('rb') as stored:
+            self.assertEqual(stored.read(), content)
+
+    def test_unreferenced_blobs_are_collected(self):
+        notes = [self.upload_note(f'copy{n}.txt', b'same notes') for n in range(2)]
+        other = self.upload_note('other.txt', b'other notes')
+
+        notes[0].delete()
+        self.assertEqual(collect_blobs(grace=timedelta(0)), (0, 0))
+
+        progress = self.user.skill_progress.get()
+        progress.notes_file = notes[1].file.name
+        progress.save()
+        notes[1].delete()
+        other.delete()
+        self.assertEqual(collect_blobs(grace=timedelta(0)), (1, len(b'other notes')))
+        self.assertEqual(self.stored_files(), [progress.notes_file.name])
+
+        StoredBlob.objects.update(refcount=5)
+        self.assertEqual(recount_blobs(), 1)
+        self.assertEqual(StoredBlob.objects.get().refcount, 1)
+
+
+class MediaServingTests(TempMediaMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = seed_user('media_owner', Workload(skills=1, goals=0, days=0, notes=0))
+        cls.other = seed_user('media_other', Workload(skills=1, goals=0, days=0, notes=0))
+
+    def setUp(self):
+        super().setUp()
+        self.content = bytes(range(256)) * 40
+        self.client.force_login(self.owner)
+        self.client.post(reverse('add_note', args=[self.owner.skills.get().pk]), {
+            'title': 'Roadmap',
+            'note_type': 'roadmap',
+            'file': SimpleUploadedFile('roadmap.pdf', self.content),
+        })
+        self.url = self.owner.notes.get().file.url
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_owner_gets_the_file_with_validators(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.content)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['ETag'], f'"{hashlib.sha256(self.content).hexdigest()}"')
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response, _ = self.get(if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_users_and_anonymous_cannot_read_it(self):
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_range_requests(self):
+        size = len(self.content)
+        for header, start, end in [('bytes=0-99', 0, 99), ('bytes=10000-', 10000, size - 1), ('bytes=-10', size - 10, size - 1)]:
+            with self.subTest(header):
+                response, body = self.get(range=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response['Content-Range'], f'bytes {start}-{end}/{size}')
+                self.assertEqual(body, self.content[start:end + 1])
+
+        response, _ = self.get(range=f'bytes={size}-')
+        self.assertEqual(response.status_code, 416)
+
+        # A stale If-Range gets the whole file
+        response, body = self.get(range='bytes=0-9', if_range='"stale"')
+        self.assertEqual((response.status_code, body), (200, self.content))
+
+    @override_settings(MEDIA_OFFLOAD='x-accel-redirect', MEDIA_ACCEL_PREFIX='/protected/')
+    def test_offload_to_the_proxy(self):
+        response, body = self.get()
+        name = self.owner.notes.get().file.name
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/{name}')
+        self.assertEqual(body, b'')
+
+
+@override_settings(PREVIEW_WORKERS=0)
+class NotePreviewTests(TempMediaMixin, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('previews', Workload(skills=1, goals=0, days=0, notes=0))
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def image(self, size=(1600, 1200), fmt='PNG'):
+        output = BytesIO()
+        Image.new('RGB', size, 'steelblue').save(output, fmt)
+        return output.getvalue()
+
+    def upload(self, name, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('add_note', args=[self.user.skills.get().pk]), {
+                'title': name,
+                'note_type': 'notes',
+                'file': SimpleUploadedFile(name, content),
+            })
+        return self.user.notes.latest('pk')
+
+    def test_image_upload_gets_a_small_webp_preview(self):
+        note = self.upload('diagram.png', self.image())
+
+        response = self.client.get(reverse('note_preview', args=[note.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        preview = b''.join(response.streaming_content)
+        self.assertLess(len(preview), 10_000)
+
+        self.assertEqual(Image.open(BytesIO(preview)).size, (320, 240))
+
+    def test_preview_is_shared_by_identical_files(self):
+        first = self.upload('a.jpg', self.image(fmt='JPEG'))
+        with mock.patch('Skill_Tracker.previews.render_preview') as render:
+            second = self.upload('b.jpg', self.image(fmt='JPEG'))
+        render.assert_not_called()
+        self.assertEqual(preview_name(first.file.name), preview_name(second.file.name))
+
+    def test_files_without_a_preview(self):
+        note = self.upload('notes.txt', b'plain text')
+        self.assertEqual(self.client.get(reverse('note_preview', args=[note.pk])).status_code, 404)
+        self.assertIsNone(render_preview('notes.txt'))
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = seed_user('searcher', Workload(skills=1, goals=0, days=0, notes=0))
+        cls.other = seed_user('other_searcher', Workload(skills=1, goals=0, days=0, notes=0))
+        cls.skill = cls.user.skills.get()
+
+    def entry(self, days_ago=0, **text):
+        return SkillProgress.objects.create(
+            user=self.user, skill=self.skill, date=date.today() - timedelta(days=days_ago),
+            planned_time=2, actual_time=1, **text,
+        )
+
+    def kinds(self, query, user=None):
+        return [(document.kind, document.object_id) for document in search(user or self.user, query)]
+
+    def test_words_are_stemmed_and_the_last_one_is_a_prefix(self):
+        entry = self.entry(topics_done='Wrote class decorators', feedback_or_points='Closures still confusing')
+
+        self.assertEqual(self.kinds('decorator'), [('progress', entry.pk)])
+        self.assertEqual(self.kinds('writing decorators'), [])
+        self.assertEqual(self.kinds('confusing clos'), [('progress', entry.pk)])
+        self.assertEqual(self.kinds('recursion'), [])
+        self.assertEqual(self.kinds('decorator', user=self.other), [])
+
+    def test_index_follows_edits_and_deletes(self):
+        entry = self.entry(topics_done='binary search trees')
+        note = NoteLibrary.objects.create(user=self.user, skill=self.skill, title='Tree rotations cheat sheet',
+                                          note_type='notes', file='note_library/trees.pdf')
+        self.assertEqual(len(self.kinds('trees')), 2)
+
+        entry.topics_done = 'heaps'
+        entry.save()
+        self.assertEqual(self.kinds('trees'), [('note', note.pk)])
+
+        entry.topics_done = ''
+        entry.save()
+        note.delete()
+        self.assertEqual(self.kinds('heaps'), [])
+        self.assertFalse(SearchDocument.objects.filter(user=self.user).exclude(kind='skill').exists())
+
+    def test_titles_rank_above_bodies(self):
+        entry = self.entry(project_update='Started a parser project')
+        note = NoteLibrary.objects.create(user=self.user, skill=self.skill, title='Parser notes',
+                                          note_type='notes', file='note_library/parser.pdf')
+        self.assertEqual(self.kinds('parser'), [('note', note.pk), ('progress', entry.pk)])
+
+    def test_rebuild_matches_the_signals(self):
+        self.entry(topics_done='window functions')
+        indexed = sorted(SearchDocument.objects.filter(user=self.user).values_list('kind', 'object_id', 'body'))
+        self.assertEqual(rebuild_search_index([self.user.pk]), len(indexed))
+        self.assertEqual(
+            sorted(SearchDocument.objects.filter(user=self.user).values_list('kind', 'object_id', 'body')), indexed,
+        )
+
+    def test_search_page_escapes_text_and_runs_fixed_queries(self):
+        for n in range(20):
+            self.entry(days_ago=n, topics_done=f'<script>alert({n})</script> regex lookahead')
+        self.client.force_login(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('search'), {'q': 'regex', 'kind': 'progress'})
+        self.assertEqual(len(response.context['results']), 20)
+        self.assertContains(response, '<mark>regex</mark>', count=20)
+        self.assertNotContains(response, '<script>alert')
+        # Session, user and the search
+        self.assertEqual(len(statements(queries)), 3)
@@ -0,0 +1,127 @@
+"""
+Dense NumPy time series for the analytics views.
+
+Sparse (skill, date, hours) rows are scattered into a skills x days matrix
+once; rolling means, cumulative totals, month reductions and the
+heatmap grid are then plain array operations on that matrix.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+from django.db.models import Sum
+
+from .models import DailyStudyRollup
+
+
+class TimeSeries:
+    """Hours per skill (rows) per day (columns) between `start` and `end`."""
+
+    def __init__(self, skill_ids, start, end, matrix):
+        self.skill_ids = list(skill_ids)
+        self.start = start
+        self.end = end
+        self.matrix = matrix
+
+    @classmethod
+    def from_rows(cls, rows, start, end, skill_ids=None):
+        """Build from (skill_id, date, hours) rows; rows outside the window are dropped."""
+        rows = list(rows)
+        if skill_ids is None:
+            skill_ids = sorted({skill_id for skill_id, _, _ in rows})
+        skill_ids = list(skill_ids)
+        days = (end - start).days + 1
+        matrix = np.zeros((len(skill_ids), days), dtype=np.int64)
+
+        if not rows or not skill_ids:
+            return cls(skill_ids, start, end, matrix)
+
+        skills, dates, hours = zip(*rows)
+        skills = np.array(skills, dtype=np.int64)
+        ordinals = np.fromiter(map(date.toordinal, dates), dtype=np.int64, count=len(dates))
+        hours = np.array([h or 0 for h in hours], dtype=np.int64)
+        ids = np.array(skill_ids, dtype=np.int64)
+        order = np.argsort(ids)
+        r = order[np.searchsorted(ids, skills, sorter=order).clip(0, len(ids) - 1)]
+        c = ordinals - start.toordinal()
+        keep = (c >= 0) & (c < days) & (ids[r] == skills)
+        np.add.at(matrix, (r[keep], c[keep]), hours[keep])
+
+        return cls(skill_ids, start, end, matrix)
+
+    @property
+    def days(self):
+        return [self.start + timedelta(days=i) for i in range(self.matrix.shape[1])]
+
+    def totals(self):
+        """Hours per day summed over every skill."""
+        return self.matrix.sum(axis=0)
+
+    def last(self, days):
+        """The trailing `days` columns of every row."""
+        return self.matrix[:, -days:]
+
+    def month_totals(self, months):
+        """Hours per skill for each (year, month) in `months` -> skills x len(months)."""
+        day_keys = np.array([d.year * 12 + d.month for d in self.days], dtype=np.int64)
+        month_keys = np.array([year * 12 + month for year, month in months], dtype=np.int64)
+        onehot = (day_keys[:, None] == month_keys[None, :]).astype(np.int64)
+        return self.matrix @ onehot
+
+
+# =====================================================
+# VECTOR HELPERS
+# =====================================================
+
+def rolling_mean(values, window=7):
+    """Trailing mean over `window` samples along the last axis; NaN until the window fills."""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] < window:
+        return out
+    csum = np.cumsum(values, axis=-1)
+    sums = csum[..., window - 1:].copy()
+    sums[..., 1:] -= csum[..., :-window]
+    out[..., window - 1:] = sums / window
+    return out
+
+
+def cumulative(values):
+    return np.cumsum(np.asarray(values), axis=-1)
+
+
+def heatmap_grid(values, weeks=4):
+    """Reshape the `weeks * 7` days that end yesterday into a weeks x 7 grid."""
+    values = np.asarray(values)
+    return values[-weeks * 7 - 1:-1].reshape(weeks, 7)
+
+
+def to_list(values, digits=None):
+    """Plain Python list for templates/plotly, with NaN mapped to None."""
+    values = np.asarray(values)
+    if digits is not None:
+        values = np.round(values, digits)
+    if values.dtype.kind == 'f':
+        return [None if np.isnan(v) else v for v in values.tolist()]
+    return values.tolist()
+
+
+# =====================================================
+# QUERIES
+# =====================================================
+
+def progress_rows(user, start, end=None):
+    """(skill_id, date, hours) for the user's progress, read from the daily rollups."""
+    qs = DailyStudyRollup.objects.filter(user=user, date__gte=start)
+    if end is not None:
+        qs = qs.filter(date__lte=end)
+    return qs.values_list('skill_id', 'date', 'actual_hours')
+
+
+def daily_totals(user, start, end):
+    """Hours per day for every day between `start` and `end`, across all skills."""
+    rows = DailyStudyRollup.objects.filter(user=user, date__gte=start, date__lte=end) \
+        .values_list('date') \
+        .annotate(total=Sum('actual_hours')) \
+        .order_by()
+    series = TimeSeries.from_rows(((0, day, hours) for day, hours in rows), start, end, skill_ids=[0])
+    return series.totals()
@@ -1,12 +1,15 @@
 from django.urls import path,include
 from .views import *
 from django.conf import settings
-from django.conf.urls.static import static
 
 urlpatterns = [
     path('', index, name='index'),
     path('user_index/', user_index, name='user_index'),
     path('dashboard/', dashboard, name='dashboard'),
+    path('dashboard/skills/', dashboard_skills, name='dashboard_skills'),
+    path('dashboard/refresh/', refresh_dashboard_api, name='refresh_dashboard_api'),
+    path('api/skills/<int:skill_id>/', get_skill_data_api, name='get_skill_data_api'),
+    path('dashboard/cache-stats/', dashboard_cache_stats, name='dashboard_cache_stats'),
     path('add_skill/', add_skill, name='add_skill'),
     path('edit_skill/<int:skill_id>/', edit_skill, name='edit_skill'),
     path('delete_skill/<int:skill_id>/', delete_skill, name='delete_skill'),
@@ -19,6 +22,7 @@ urlpatterns = [
     path('goal_detail/<int:goal_id>/', goal_detail, name='goal_detail'),
     path('edit_goal/<int:goal_id>/', edit_goal, name='edit_goal'),
     path('delete_goal/<int:goal_id>/', delete_goal, name='delete_goal'),
+    path('goal/<int:goal_id>/decision/', complete_skill_decision, name='complete_skill_decision'),
     path('skill_progress_list/', skill_progress_list, name='skill_progress_list'),
     path('add_skill_progress/<int:skill_id>/',add_skill_progress, name='add_skill_progress'),
     path('delete-progress/<int:progress_id>/',delete_skill_progress,name='delete_skill_progress'),
@@ -29,7 +33,11 @@ urlpatterns = [
     path('note-library/',note_library, name='note_library'),
     path('add-note/<int:skill_id>/',add_note, name='add_note'),
     path('delete-note/<int:note_id>/',delete_note, name='delete_note'),
+    path('note-preview/<int:note_id>/', note_preview, name='note_preview'),
+    path('export/<slug:kind>.<slug:fmt>', export_data, name='export_data'),
+    path('import-progress/', import_progress_view, name='import_progress'),
+    path('search/', search, name='search'),
+    path(f"{settings.MEDIA_URL.strip('/')}/<path:name>", serve_media, name='serve_media'),
 
     path('accounts/', include('accounts.urls')),
-]
-urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+]
\ No newline at end of file
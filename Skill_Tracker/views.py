@@ -2,19 +2,31 @@ from datetime import date, timedelta, datetime
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Count, Q, Sum, Avg, Max, Min
+from django.db.models import Count, Q, Sum, Max
 from django.db.models.functions import TruncMonth, TruncWeek
-from django.http import JsonResponse
-import json
+from django.core.files.storage import default_storage
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+import csv
+import hashlib
 from django.utils import timezone
 from .models import *
 from .forms import *
-
-import plotly.graph_objs as go
-import plotly.express as px
-from plotly.offline import plot
-from plotly.subplots import make_subplots
-import numpy as np
+from .dashboard_stats import build_dashboard_stats, build_skill_cards, build_window_stats
+from . import charts
+from .timeseries import daily_totals
+from .activity import get_activity_bitmap
+from .progress import DuplicateProgress, submit_progress
+from .pagination import get_keyset_page
+from .exports import EXPORTS, EXPORT_FORMATS, export_response
+from .imports import ImportFormatError, import_format, import_progress, open_upload
+from .media import FILE_CACHE_CONTROL, media_response, owns_file
+from .storage import preview_name
+from .search import search as search_documents
+from .completion import complete_finished_skills, complete_goal, complete_skill, reopen_skill
+from .cache import get_dashboard_context, get_dashboard_cache_stats
 
 
 # =====================================================
@@ -26,37 +38,22 @@ def index(request):
 
 @login_required
 def user_index(request):
-    skills = Skill.objects.filter(user=request.user)
+    user_skills = Skill.objects.for_user(request.user)
+    skills = user_skills.with_goal_hours()
 
     thirty_days_ago = timezone.now() - timedelta(days=30)
-    active_skills = skills.filter(
+    active_skills = user_skills.filter(
         Q(is_active=True) | Q(last_practiced__gte=thirty_days_ago)
     ).count()
     
-    completed_skills = skills.filter(is_completed=True).count()
+    completed_skills = user_skills.filter(is_completed=True).count()
     
 
-    notes = NoteLibrary.objects.filter(skill__user=request.user).order_by('-uploaded_at')
+    notes = NoteLibrary.objects.for_user(request.user).with_skill().order_by('-uploaded_at')
     notes_count = notes.count()
     
-    # Calculate streak
-    streak = 0
-    if skills.exists():
-    
-        latest_practice = skills.filter(
-            last_practiced__isnull=False
-        ).order_by('-last_practiced').first()
-        
-        if latest_practice and latest_practice.last_practiced:
-            today = timezone.now().date()
-            last_practice_date = latest_practice.last_practiced  # This is already a date
-            
-            days_since = (today - last_practice_date).days
-            
-            if days_since <= 1:
-                streak = 7
-    
-    total_hours = 0
+    streak = get_streak(request.user)
+    total_hours = get_total_study_time(request.user)
     context = {
         'skills': skills,
         'active_skills': active_skills,
@@ -98,7 +95,7 @@ def delete_skill(request, skill_id):
 
 @login_required
 def skill_list(request):
-    skills = Skill.objects.filter(user=request.user)
+    skills = Skill.objects.for_user(request.user).with_latest_goal()
 
     stats = skills.aggregate(
         total=Count('id'),
@@ -126,10 +123,43 @@ def skill_list(request):
 # SKILL GOALS
 # =====================================================
 
+GOALS_PER_PAGE = 24
+
+GOAL_SORTS = {
+    'oldest': ('pk',),
+    'newest': ('-created_at', '-pk'),
+    'target': ('target_date', 'pk'),
+    'progress': ('-progress_percentage', 'pk'),
+    'remaining': ('-remaining_hours', 'pk'),
+}
+
+
+def get_int_param(request, name):
+    try:
+        return int(request.GET[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def get_date_param(request, name):
+    try:
+        return date.fromisoformat(request.GET[name])
+    except (KeyError, ValueError):
+        return None
+
+
+def get_page_params(request):
+    """The GET parameters minus the page cursors, for building page links."""
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    return params.urlencode()
+
+
 @login_required
 def skill_goal(request):
     form = SkillGoalForm(request.POST or None, request.FILES or None)
-    form.fields['skill'].queryset = Skill.objects.filter(user=request.user)
+    form.fields['skill'].queryset = Skill.objects.for_user(request.user).select_related('user')
 
     if request.method == 'POST' and form.is_valid():
         goal = form.save(commit=False)
@@ -142,21 +172,57 @@ def skill_goal(request):
 
 @login_required
 def view_goals(request, skill_id=None):
+    skill_id = skill_id or get_int_param(request, 'skill_id')
     if skill_id:
         skill = get_object_or_404(Skill, id=skill_id, user=request.user)
         goals = SkillGoal.objects.filter(skill=skill)
     else:
         skill = None
-        goals = SkillGoal.objects.filter(skill__user=request.user)
+        goals = SkillGoal.objects.for_user(request.user)
+
+    today = date.today()
+    counts = goals.aggregate(
+        active=Count('id', filter=Q(is_completed=False)),
+        completed=Count('id', filter=Q(is_completed=True)),
+        overdue=Count('id', filter=Q(is_completed=False, target_date__lt=today)),
+    )
+
+    # Sorting, filtering and paging all happen in SQL on the annotated
+    # progress metrics
+    goals = goals.with_skill().with_progress(today)
+
+    status = request.GET.get('status', 'all')
+    if status == 'active':
+        goals = goals.filter(is_completed=False)
+    elif status == 'completed':
+        goals = goals.filter(is_completed=True)
+    elif status == 'overdue':
+        goals = goals.filter(is_overdue=True)
+    else:
+        status = 'all'
+
+    min_progress = get_int_param(request, 'min_progress')
+    if min_progress is not None:
+        goals = goals.filter(progress_percentage__gte=min_progress)
 
-    active_count = goals.filter(is_completed=False).count()
-    completed_count = goals.filter(is_completed=True).count()
+    sort = request.GET.get('sort', 'oldest')
+    if sort not in GOAL_SORTS:
+        sort = 'oldest'
+    page = get_keyset_page(request, goals, GOAL_SORTS[sort], GOALS_PER_PAGE)
 
     return render(request, 'user/view_goal.html', {
-        'goals': goals,
-        'active_count': active_count,
-        'completed_count': completed_count,
+        'goals': page.items,
+        'active_count': counts['active'],
+        'completed_count': counts['completed'],
+        'overdue_count': counts['overdue'],
         'skill': skill,
+        'sort': sort,
+        'sort_choices': GOAL_SORTS.keys(),
+        'status': status,
+        'min_progress': min_progress,
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+        'query_string': get_page_params(request),
     })
 
 
@@ -194,10 +260,14 @@ def edit_skill(request, skill_id):
 def edit_goal(request, goal_id):
     goal = get_object_or_404(SkillGoal, id=goal_id, user=request.user)
     form = SkillGoalForm(request.POST or None, request.FILES or None, instance=goal)
-    form.fields['skill'].queryset = Skill.objects.filter(user=request.user)
+    form.fields['skill'].queryset = Skill.objects.for_user(request.user).select_related('user')
+    old_skill_id = goal.skill_id
 
     if request.method == "POST" and form.is_valid():
         goal = form.save()
+        # Completing the last open goal completes the skill, and a goal
+        # moved away may leave its old skill with only completed ones
+        complete_finished_skills({old_skill_id, goal.skill_id})
 
         if goal.is_completed:
             return redirect("complete_skill_decision", goal_id=goal.id)
@@ -220,14 +290,10 @@ def complete_skill_decision(request, goal_id):
         action = request.POST.get("action")
 
         if action == "complete":
-            skill.is_completed = True
-            skill.is_active = False
-            skill.save()
+            complete_skill(skill, deactivate=True)
 
         elif action == "continue":
-            skill.is_completed = False
-            skill.is_active = True
-            skill.save()
+            reopen_skill(skill)
 
         messages.success(request, "Skill status updated successfully!")
         return redirect("dashboard")
@@ -265,16 +331,47 @@ def view_goal_detail(request, skill_id, goal_id):
 # SKILL PROGRESS
 # =====================================================
 
+PROGRESS_PER_PAGE = 50
+PROGRESS_STATUSES = {'completed': True, 'pending': False}
+
+
 @login_required
 def skill_progress_list(request):
-    skills = Skill.objects.filter(user=request.user)
-    notes = NoteLibrary.objects.filter(user=request.user)
-    progress_list = SkillProgress.objects.filter(user=request.user)
+    skills = list(Skill.objects.for_user(request.user))
+    progress = SkillProgress.objects.for_user(request.user).with_skill()
+
+    skill_id = get_int_param(request, 'skill')
+    if skill_id:
+        progress = progress.filter(skill_id=skill_id)
+
+    status = request.GET.get('status', '')
+    if status in PROGRESS_STATUSES:
+        progress = progress.filter(is_completed=PROGRESS_STATUSES[status])
+    else:
+        status = ''
+
+    start = get_date_param(request, 'start')
+    end = get_date_param(request, 'end')
+    if start:
+        progress = progress.filter(date__gte=start)
+    if end:
+        progress = progress.filter(date__lte=end)
+
+    page = get_keyset_page(request, progress, ('-date', '-id'), PROGRESS_PER_PAGE)
 
     return render(request, 'user/skill_progress_list.html', {
         'skills': skills,
-        'progress_list': progress_list,
-        'notes':notes
+        'progress_list': page.items,
+        'total_entries': sum(skill.progress_days for skill in skills),
+        'total_hours': sum(skill.total_hours for skill in skills),
+        'notes_count': NoteLibrary.objects.for_user(request.user).count(),
+        'skill_id': skill_id,
+        'status': status,
+        'start': start,
+        'end': end,
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+        'query_string': get_page_params(request),
     })
 
 
@@ -301,26 +398,21 @@ def add_skill_progress(request, skill_id):
         progress.planned_time = planned_time
 
         if goal and date.today() >= goal.target_date and not goal.is_completed:
-            goal.is_completed = True
-            goal.save()
+            complete_goal(goal)
             return redirect("complete_skill_decision", goal_id=goal.id)
 
-        if SkillProgress.objects.filter(
-            user=request.user,
-            skill=skill,
-            date=date.today()
-        ).exists():
-            messages.error(request, "You already added progress for today.")
-            return redirect('skill_progress_list')
-
         progress.extra_time = max(progress.actual_time - planned_time, 0)
 
-        skill.last_practiced = date.today()
-        skill.save()
-
-        progress.save()
+        try:
+            _, merged = submit_progress(progress, merge=request.POST.get('merge') == 'on')
+        except DuplicateProgress:
+            messages.error(request, "You already added progress for today.")
+            return redirect('skill_progress_list')
 
-        messages.success(request, "Skill progress added successfully!")
+        if merged:
+            messages.success(request, "Hours added to today's progress entry!")
+        else:
+            messages.success(request, "Skill progress added successfully!")
         return redirect('skill_progress_list')
 
     return render(request, 'user/add_skill_progress.html', {
@@ -334,7 +426,6 @@ def add_skill_progress(request, skill_id):
 def edit_skill_progress(request, progress_id):
     progress = get_object_or_404(SkillProgress, id=progress_id, user=request.user)
     form = SkillProgressForm(request.POST or None, instance=progress)
-    form.fields['skill'].queryset = Skill.objects.filter(user=request.user)
 
     if request.method == 'POST' and form.is_valid():
         form.save()
@@ -381,14 +472,46 @@ def add_note(request, skill_id):
     })
 
 
+NOTES_PER_PAGE = 50
+
+
 @login_required
 def note_library(request):
-    skills = Skill.objects.filter(user=request.user)
-    notes = NoteLibrary.objects.filter(user=request.user).order_by('-uploaded_at')
+    skills = Skill.objects.for_user(request.user)
+    notes = NoteLibrary.objects.for_user(request.user)
+    notes_count = notes.count()
+
+    skill_id = get_int_param(request, 'skill')
+    if skill_id:
+        notes = notes.filter(skill_id=skill_id)
+
+    note_type = request.GET.get('type', '')
+    if note_type in dict(NoteLibrary.NOTE_TYPES):
+        notes = notes.filter(note_type=note_type)
+    else:
+        note_type = ''
+
+    start = get_date_param(request, 'start')
+    end = get_date_param(request, 'end')
+    if start:
+        notes = notes.filter(uploaded_at__date__gte=start)
+    if end:
+        notes = notes.filter(uploaded_at__date__lte=end)
+
+    page = get_keyset_page(request, notes.with_skill(), ('-uploaded_at', '-id'), NOTES_PER_PAGE)
 
     return render(request, "user/note_library.html", {
         "skills": skills,
-        "notes": notes
+        "notes": page.items,
+        "notes_count": notes_count,
+        "note_types": NoteLibrary.NOTE_TYPES,
+        "skill_id": skill_id,
+        "note_type": note_type,
+        "start": start,
+        "end": end,
+        "next_cursor": page.next_cursor,
+        "previous_cursor": page.previous_cursor,
+        "query_string": get_page_params(request),
     })
 
 
@@ -407,10 +530,7 @@ def delete_note(request, note_id):
 def mark_goal_completed(request, goal_id):
     goal = get_object_or_404(SkillGoal, id=goal_id, user=request.user)
 
-    if not goal.is_completed:
-        goal.is_completed = True
-        goal.save()  # This will auto-complete skill (because of your save override)
-
+    if complete_goal(goal):
         messages.success(request, "Goal marked as completed 🎉")
 
     return redirect('goal_detail', goal.id)
@@ -419,9 +539,7 @@ def mark_goal_completed(request, goal_id):
 def mark_skill_completed(request, skill_id):
     skill = get_object_or_404(Skill, id=skill_id, user=request.user)
 
-    if not skill.is_completed:
-        skill.is_completed = True
-        skill.save()
+    complete_skill(skill)
 
     return redirect('view_skill', skill.id)
 
@@ -430,39 +548,40 @@ def mark_skill_completed(request, skill_id):
 # =====================================================
 
 def get_total_study_time(user):
-    return SkillProgress.objects.filter(user=user)\
-        .aggregate(total=Sum('actual_time'))['total'] or 0
+    return Skill.objects.filter(user=user)\
+        .aggregate(total=Sum('total_hours'))['total'] or 0
 
 
 def get_today_progress(user):
-    return SkillProgress.objects.filter(
+    return DailyStudyRollup.objects.filter(
         user=user,
         date=date.today()
-    ).aggregate(total=Sum('actual_time'))['total'] or 0
+    ).aggregate(total=Sum('actual_hours'))['total'] or 0
 
 
 def get_weekly_progress(user):
     week_ago = date.today() - timedelta(days=7)
-    return SkillProgress.objects.filter(
+    return DailyStudyRollup.objects.filter(
         user=user,
         date__gte=week_ago
-    ).aggregate(total=Sum('actual_time'))['total'] or 0
+    ).aggregate(total=Sum('actual_hours'))['total'] or 0
 
 
 def get_monthly_progress(user):
     month_ago = date.today() - timedelta(days=30)
-    return SkillProgress.objects.filter(
+    return DailyStudyRollup.objects.filter(
         user=user,
         date__gte=month_ago
-    ).aggregate(total=Sum('actual_time'))['total'] or 0
+    ).aggregate(total=Sum('actual_hours'))['total'] or 0
 
 
 def get_goal_stats(user):
-    return {
-        "total": SkillGoal.objects.filter(user=user).count(),
-        "completed": SkillGoal.objects.filter(user=user, is_completed=True).count(),
-        "active": SkillGoal.objects.filter(user=user, is_completed=False).count(),
-    }
+    stats = Skill.objects.filter(user=user).aggregate(
+        total=Sum('goals_total', default=0),
+        completed=Sum('goals_completed', default=0),
+    )
+    stats["active"] = stats["total"] - stats["completed"]
+    return stats
 
 
 def get_goal_completion_percentage(user):
@@ -473,9 +592,9 @@ def get_goal_completion_percentage(user):
 
 
 def get_skill_wise_analytics(user):
-    return SkillProgress.objects.filter(user=user) \
+    return DailyStudyRollup.objects.filter(user=user) \
         .values('skill__title') \
-        .annotate(total_time=Sum('actual_time')) \
+        .annotate(total_time=Sum('actual_hours')) \
         .order_by('-total_time')
 
 
@@ -489,21 +608,7 @@ def get_goal_completion_by_skill(user):
 
 
 def get_streak(user):
-    streak = 0
-    today = date.today()
-
-    while True:
-        exists = SkillProgress.objects.filter(
-            user=user,
-            date=today - timedelta(days=streak)
-        ).exists()
-
-        if exists:
-            streak += 1
-        else:
-            break
-
-    return streak
+    return get_activity_bitmap(user).current_streak(date.today())
 
 
 def get_productivity_score(user):
@@ -517,504 +622,252 @@ def get_productivity_score(user):
 
 def get_weekly_chart_data(user):
     today = date.today()
-    labels = []
-    data = []
+    start = today - timedelta(days=6)
+    data = daily_totals(user, start, today)
+    labels = [(start + timedelta(days=i)).strftime("%a") for i in range(7)]
 
-    for i in range(6, -1, -1):
-        day = today - timedelta(days=i)
-        total = SkillProgress.objects.filter(
-            user=user,
-            date=day
-        ).aggregate(sum=Sum('actual_time'))['sum'] or 0
-        labels.append(day.strftime("%a"))
-        data.append(float(total))
-
-    return labels, data
+    return labels, data.astype(float).tolist()
 
 
 def get_monthly_chart_data(user):
     today = date.today()
-    labels = []
-    data = []
-
-    for i in range(29, -1, -1):
-        day = today - timedelta(days=i)
-        total = SkillProgress.objects.filter(
-            user=user,
-            date=day
-        ).aggregate(sum=Sum('actual_time'))['sum'] or 0
-        labels.append(day.strftime("%d %b"))
-        data.append(float(total))
+    start = today - timedelta(days=29)
+    data = daily_totals(user, start, today)
+    labels = [(start + timedelta(days=i)).strftime("%d %b") for i in range(30)]
 
-    return labels, data
+    return labels, data.astype(float).tolist()
 
 # =====================================================
 # INTERACTIVE DASHBOARD WITH BLUE-GREY COLOR PALETTE
 # =====================================================
-# =====================================================
-# INTERACTIVE DASHBOARD WITH BLUE-GREY COLOR PALETTE
-# =====================================================
+SKILL_CARDS_PER_PAGE = 6
+
 @login_required
 def dashboard(request):
-    user = request.user
-    today = date.today()
-
-    # Blue-Grey Color Palette
-    colors = {
-        'primary': '#2563eb',      # Blue-600
-        'secondary': '#3b82f6',     # Blue-500
-        'tertiary': '#60a5fa',      # Blue-400
-        'light': '#93c5fd',         # Blue-300
-        'extra_light': '#dbeafe',   # Blue-100
-        'grey_dark': '#1f2937',     # Gray-800
-        'grey_medium': '#4b5563',   # Gray-600
-        'grey_light': '#9ca3af',    # Gray-400
-        'grey_extra_light': '#e5e7eb', # Gray-200
-        'success': '#10b981',        # Emerald-500
-        'warning': '#f59e0b',        # Amber-500
-        'danger': '#ef4444',         # Red-500
-        'background': '#f9fafb'      # Gray-50
-    }
-
-    # -----------------------------
-    # Basic Stats
-    # -----------------------------
-    total_skills = Skill.objects.filter(user=user).count()
-    active_skills = Skill.objects.filter(user=user, is_active=True).count()
-    completed_skills = Skill.objects.filter(user=user, is_completed=True).count()
-
-    goal_stats = get_goal_stats(user)
-    goal_completion = get_goal_completion_percentage(user)
-
-    total_study_time = get_total_study_time(user)
-    today_progress = get_today_progress(user)
-    weekly_progress = get_weekly_progress(user)
-    monthly_progress = get_monthly_progress(user)
+    context = get_dashboard_context(request.user, date.today(), build_dashboard_context)
+    return render(request, "user/dashboard.html", context)
 
-    streak = get_streak(user)
-    productivity_score = get_productivity_score(user)
 
-    # Advanced stats
-    total_days_active = SkillProgress.objects.filter(user=user).values('date').distinct().count()
-    avg_daily_time = total_study_time / total_days_active if total_days_active > 0 else 0
-    
-    skills = Skill.objects.filter(user=user)
-
-    # Skill performance data for tables
-    skill_performance = []
-    for skill in skills:
-        skill_progress = SkillProgress.objects.filter(user=user, skill=skill)
-        if skill_progress.exists():
-            total = skill_progress.aggregate(total=Sum('actual_time'))['total'] or 0
-            avg = skill_progress.aggregate(avg=Avg('actual_time'))['avg'] or 0
-            days = skill_progress.count()
-            consistency = (days / 30) * 100 if days > 0 else 0
-            
-            skill_performance.append({
-                'skill': skill.title,
-                'total': round(total, 1),
-                'avg': round(avg, 1),
-                'days': days,
-                'consistency': round(consistency, 1)
-            })
-    
-    skill_performance.sort(key=lambda x: x['total'], reverse=True)
+@login_required
+def dashboard_skills(request):
+    """One page of per-skill dashboard cards, as an HTML fragment plus chart specs."""
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+
+    context = get_dashboard_context(
+        request.user,
+        date.today(),
+        lambda user, today: build_skill_cards_context(user, today, page),
+        section=f'skills:{page}',
+    )
+    return JsonResponse({
+        'html': render_to_string('user/partials/dashboard_skill_cards.html', context, request=request),
+        'specs': context['chart_specs'],
+        'next_page': context['next_page'],
+    })
 
-    # -----------------------------
-    # Skill-wise Charts
-    # -----------------------------
-    skill_charts = []
 
-    for index, skill in enumerate(skills):
-        skill_progress = SkillProgress.objects.filter(user=user, skill=skill)
-        skill_goals = SkillGoal.objects.filter(user=user, skill=skill)
-
-        # ===== Monthly Bar Chart =====
-        months = []
-        monthly_data = []
-
-        for i in range(5, -1, -1):
-            month_date = today - timedelta(days=30*i)
-            month_start = month_date.replace(day=1)
-            if month_start.month == 12:
-                month_end = month_start.replace(year=month_start.year + 1, month=1, day=1) - timedelta(days=1)
-            else:
-                month_end = month_start.replace(month=month_start.month + 1, day=1) - timedelta(days=1)
-            
-            total = skill_progress.filter(
-                date__gte=month_start,
-                date__lte=month_end
-            ).aggregate(total=Sum('actual_time'))['total'] or 0
-
-            months.append(month_date.strftime('%b'))
-            monthly_data.append(total)
-
-        bar_fig = go.Figure()
-        bar_fig.add_trace(go.Bar(
-            x=months,
-            y=monthly_data,
-            text=[f"{d:.1f}h" for d in monthly_data],
-            textposition='outside',
-            marker_color=colors['primary'],
-            marker_line_color=colors['grey_dark'],
-            marker_line_width=1.5,
-            opacity=0.8,
-            hovertemplate='<b>%{x}</b><br>Hours: %{y:.1f}<extra></extra>'
-        ))
-
-        bar_fig.update_layout(
-            title=f"{skill.title} - Monthly Progress",
-            height=300,
-            margin=dict(l=40, r=40, t=50, b=40),
-            paper_bgcolor='white',
-            plot_bgcolor=colors['background'],
-            font=dict(family="Arial, sans-serif", size=11, color=colors['grey_medium']),
-            showlegend=False
-        )
-        
-        # Only include plotlyjs for the first chart
-        include_js = True if index == 0 else False
-        bar_div = plot(bar_fig, output_type='div', include_plotlyjs=include_js, config={'displayModeBar': False})
-
-        # ===== Pie Chart (Goals) =====
-        completed = skill_goals.filter(is_completed=True).count()
-        active = skill_goals.filter(is_completed=False).count()
-
-        if completed + active > 0:
-            pie_fig = go.Figure(data=[go.Pie(
-                labels=["Completed", "Active"],
-                values=[completed, active],
-                hole=0.5,
-                marker_colors=[colors['success'], colors['warning']],
-                textinfo='label+percent',
-                textposition='outside',
-                hovertemplate='<b>%{label}</b><br>Count: %{value}<br>Percentage: %{percent}<extra></extra>',
-                showlegend=False
-            )])
-        else:
-            pie_fig = go.Figure()
-            pie_fig.add_annotation(
-                text="No Goals",
-                x=0.5, y=0.5,
-                showarrow=False,
-                font=dict(size=14, color=colors['grey_light'])
-            )
-            pie_fig.update_layout(
-                xaxis=dict(showgrid=False, zeroline=False, showticklabels=False),
-                yaxis=dict(showgrid=False, zeroline=False, showticklabels=False)
-            )
-
-        pie_fig.update_layout(
-            height=250,
-            margin=dict(l=20, r=20, t=30, b=20),
-            paper_bgcolor='white',
-            plot_bgcolor=colors['background'],
-            font=dict(family="Arial, sans-serif", size=11, color=colors['grey_medium'])
-        )
-        pie_div = plot(pie_fig, output_type='div', include_plotlyjs=False, config={'displayModeBar': False})
-
-        # ===== 30 Day Line Chart =====
-        labels = []
-        data = []
-
-        for i in range(29, -1, -1):
-            day = today - timedelta(days=i)
-            total = skill_progress.filter(date=day).aggregate(
-                total=Sum('actual_time')
-            )['total'] or 0
-
-            labels.append(day.strftime("%d %b"))
-            data.append(total)
-
-        # Calculate 7-day moving average
-        moving_avg = []
-        for i in range(len(data)):
-            if i < 6:
-                moving_avg.append(None)
-            else:
-                avg = sum(data[i-6:i+1]) / 7
-                moving_avg.append(round(avg, 1))
-
-        line_fig = go.Figure()
-        line_fig.add_trace(go.Scatter(
-            x=labels,
-            y=data,
-            mode='lines+markers',
-            name='Daily',
-            line=dict(color=colors['primary'], width=2),
-            marker=dict(size=6, color=colors['primary']),
-            hovertemplate='<b>%{x}</b><br>Hours: %{y:.1f}<extra></extra>'
-        ))
-        
-        line_fig.add_trace(go.Scatter(
-            x=labels,
-            y=moving_avg,
-            mode='lines',
-            name='7-Day Avg',
-            line=dict(color=colors['grey_medium'], width=2, dash='dash'),
-            hovertemplate='<b>%{x}</b><br>Avg: %{y:.1f}h<extra></extra>'
-        ))
-
-        line_fig.update_layout(
-            title=f"{skill.title} - Last 30 Days",
-            height=300,
-            hovermode='x unified',
-            margin=dict(l=40, r=40, t=50, b=40),
-            paper_bgcolor='white',
-            plot_bgcolor=colors['background'],
-            font=dict(family="Arial, sans-serif", size=11, color=colors['grey_medium']),
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1,
-                font=dict(size=10)
-            )
-        )
-        line_div = plot(line_fig, output_type='div', include_plotlyjs=False, config={'displayModeBar': False})
-
-        # ===== Gauge Chart =====
-        total_goal = skill_goals.aggregate(
-            total=Sum('daily_study_hours')
-        )['total'] or 0
-
-        achieved = skill_progress.aggregate(
-            total=Sum('actual_time')
-        )['total'] or 0
-
-        percent = int((achieved / total_goal) * 100) if total_goal > 0 else 0
-        percent = min(percent, 100)
-
-        gauge_fig = go.Figure(go.Indicator(
-            mode="gauge+number",
-            value=percent,
-            title={'text': "Progress %"},
-            domain={'x': [0, 1], 'y': [0, 1]},
-            gauge={
-                'axis': {'range': [0, 100], 'tickcolor': colors['grey_medium']},
-                'bar': {'color': colors['primary']},
-                'bgcolor': 'white',
-                'borderwidth': 2,
-                'bordercolor': colors['grey_light'],
-                'steps': [
-                    {'range': [0, 33], 'color': colors['extra_light']},
-                    {'range': [33, 66], 'color': colors['light']},
-                    {'range': [66, 100], 'color': colors['tertiary']}
-                ]
-            }
-        ))
-
-        gauge_fig.update_layout(
-            height=150,
-            margin=dict(l=30, r=30, t=30, b=30),
-            paper_bgcolor='white',
-            font=dict(family="Arial, sans-serif", color=colors['grey_medium'])
-        )
-        gauge_div = plot(gauge_fig, output_type='div', include_plotlyjs=False, config={'displayModeBar': False})
+@login_required
+def dashboard_cache_stats(request):
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    return JsonResponse(get_dashboard_cache_stats())
 
-        skill_charts.append({
-            "skill": skill,
-            "bar_div": bar_div,
-            "pie_div": pie_div,
-            "line_div": line_div,
-            "gauge_div": gauge_div,
-            "percent": percent,
-            "total_hours": round(achieved, 1),
-            "avg_daily": round(skill_progress.aggregate(avg=Avg('actual_time'))['avg'] or 0, 1),
-            "total_days": skill_progress.count()
-        })
 
+def build_dashboard_context(user, today):
     # -----------------------------
-    # Overall Chart (Dual Axis)
+    # Summary stats & series (skill cards load via dashboard_skills)
     # -----------------------------
-    labels = []
-    daily_data = []
-    cumulative_data = []
-    cumulative = 0
-
-    for i in range(29, -1, -1):
-        day = today - timedelta(days=i)
-        total = SkillProgress.objects.filter(
-            user=user,
-            date=day
-        ).aggregate(total=Sum('actual_time'))['total'] or 0
-
-        labels.append(day.strftime("%d %b"))
-        daily_data.append(total)
-
-        cumulative += total
-        cumulative_data.append(cumulative)
-
-    overall_fig = make_subplots(specs=[[{"secondary_y": True}]])
-
-    overall_fig.add_trace(
-        go.Bar(
-            x=labels, 
-            y=daily_data, 
-            name="Daily Hours",
-            marker_color=colors['primary'],
-            opacity=0.7,
-            hovertemplate='<b>%{x}</b><br>Hours: %{y:.1f}<extra></extra>'
-        ),
-        secondary_y=False
-    )
-
-    overall_fig.add_trace(
-        go.Scatter(
-            x=labels, 
-            y=cumulative_data,
-            mode='lines+markers',
-            name="Cumulative Hours",
-            line=dict(color=colors['grey_dark'], width=3),
-            marker=dict(size=8, color=colors['grey_dark']),
-            hovertemplate='<b>%{x}</b><br>Total: %{y:.1f}h<extra></extra>'
-        ),
-        secondary_y=True
-    )
-
-    overall_fig.update_layout(
-        title="Overall Progress (Last 30 Days)",
-        height=400,
-        hovermode='x unified',
-        margin=dict(l=50, r=50, t=50, b=50),
-        paper_bgcolor='white',
-        plot_bgcolor=colors['background'],
-        font=dict(family="Arial, sans-serif", color=colors['grey_medium']),
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
-    )
-
-    overall_fig.update_xaxes(tickangle=45)
-    overall_fig.update_yaxes(title_text="Daily Hours", secondary_y=False, gridcolor=colors['grey_extra_light'])
-    overall_fig.update_yaxes(title_text="Cumulative Hours", secondary_y=True, gridcolor=colors['grey_extra_light'])
-
-    overall_div = plot(overall_fig, output_type='div', include_plotlyjs=False, config={'displayModeBar': False})
+    stats = build_dashboard_stats(user, today)
+    chart_specs = {}
 
     # -----------------------------
-    # Heatmap (Last 4 Weeks) - FIXED COLORBAR
+    # Overall, Heatmap & Weekly Charts
     # -----------------------------
-    heat_data = []
-    week_labels = []
-    day_labels = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-
-    for w in range(4):
-        week = []
-        start = today - timedelta(days=28 - w*7)
-
-        for d in range(7):
-            day = start + timedelta(days=d)
-            total = SkillProgress.objects.filter(
-                user=user,
-                date=day
-            ).aggregate(total=Sum('actual_time'))['total'] or 0
-
-            week.append(round(total, 1))
-
-        heat_data.append(week)
-        week_labels.append(f"Week {w+1}")
-
-    heat_fig = go.Figure(data=go.Heatmap(
-        z=heat_data,
-        x=day_labels,
-        y=week_labels,
-        colorscale='Blues',
-        text=[[f"{h}h" for h in row] for row in heat_data],
-        texttemplate="%{text}",
-        textfont={"size": 10, "color": "white"},
-        hoverongaps=False,
-                # Alternative colorbar configuration (if titleside still causes issues)
-        colorbar=dict(
-            title=dict(
-                text="Hours",
-                side="right"
+    chart_specs["overall"] = charts.overall_progress(
+        stats["overall"]["labels"], stats["overall"]["daily"], stats["overall"]["cumulative"]
     )
-        )
-))
-                         
-    heat_fig.update_layout(
-        title="Weekly Activity Heatmap",
-        height=300,
-        margin=dict(l=40, r=40, t=50, b=40),
-        paper_bgcolor='white',
-        plot_bgcolor=colors['background'],
-        font=dict(family="Arial, sans-serif", color=colors['grey_medium'])
+    chart_specs["heatmap"] = charts.activity_heatmap(
+        stats["heatmap"]["z"], stats["heatmap"]["x"], stats["heatmap"]["y"], stats["heatmap"]["active"]
     )
-    heatmap_div = plot(heat_fig, output_type='div', include_plotlyjs=False, config={'displayModeBar': False})
-
-    # -----------------------------
-    # Weekly Chart
-    # -----------------------------
-    weekly_labels, weekly_data = get_weekly_chart_data(user)
-
-    weekly_fig = go.Figure(data=[
-        go.Bar(
-            x=weekly_labels, 
-            y=weekly_data,
-            marker_color=colors['secondary'],
-            marker_line_color=colors['grey_dark'],
-            marker_line_width=1.5,
-            text=[f"{d:.1f}h" for d in weekly_data],
-            textposition='outside',
-            hovertemplate='<b>%{x}</b><br>Hours: %{y:.1f}<extra></extra>'
-        )
-    ])
-
-    weekly_fig.update_layout(
-        title="This Week's Progress",
-        height=300,
-        margin=dict(l=40, r=40, t=50, b=40),
-        paper_bgcolor='white',
-        plot_bgcolor=colors['background'],
-        font=dict(family="Arial, sans-serif", color=colors['grey_medium']),
-        showlegend=False
+    chart_specs["weekly"] = charts.weekly_progress(
+        stats["weekly"]["labels"], stats["weekly"]["data"]
     )
-    weekly_div = plot(weekly_fig, output_type='div', include_plotlyjs=False, config={'displayBarMode': False})
 
     # -----------------------------
     # Recent Progress
     # -----------------------------
-    recent_progress = SkillProgress.objects.filter(user=user).select_related('skill').order_by('-date', '-id')[:10]
+    recent_progress = list(SkillProgress.objects.for_user(user).with_skill().order_by('-date', '-id')[:10])
     
     # -----------------------------
     # Notes
     # -----------------------------
-    notes = NoteLibrary.objects.filter(user=user).select_related('skill').order_by('-uploaded_at')[:10]
+    notes = list(NoteLibrary.objects.for_user(user).with_skill().order_by('-uploaded_at')[:10])
 
     # -----------------------------
     # Context
     # -----------------------------
     context = {
-        "total_skills": total_skills,
-        "active_skills": active_skills,
-        "completed_skills": completed_skills,
-        "goal_total": goal_stats["total"],
-        "goal_completed": goal_stats["completed"],
-        "goal_active": goal_stats["active"],
-        "goal_completion": goal_completion,
-        "total_study_time": round(total_study_time, 1),
-        "today_progress": round(today_progress, 1),
-        "weekly_progress": round(weekly_progress, 1),
-        "monthly_progress": round(monthly_progress, 1),
-        "streak": streak,
-        "productivity_score": round(productivity_score, 1),
-        "avg_daily_time": round(avg_daily_time, 1),
-        "total_days_active": total_days_active,
-        "skill_charts": skill_charts,
-        "overall_div": overall_div,
-        "heatmap_div": heatmap_div,
-        "weekly_div": weekly_div,
-        "skill_performance": skill_performance[:5],
+        "total_skills": stats["total_skills"],
+        "active_skills": stats["active_skills"],
+        "completed_skills": stats["completed_skills"],
+        "goal_total": stats["goal_total"],
+        "goal_completed": stats["goal_completed"],
+        "goal_active": stats["goal_active"],
+        "goal_completion": stats["goal_completion"],
+        "total_study_time": round(stats["total_study_time"], 1),
+        "today_progress": round(stats["today_progress"], 1),
+        "weekly_progress": round(stats["weekly_progress"], 1),
+        "monthly_progress": round(stats["monthly_progress"], 1),
+        "streak": stats["streak"],
+        "longest_streak": stats["longest_streak"],
+        "productivity_score": round(stats["productivity_score"], 1),
+        "avg_daily_time": round(stats["avg_daily_time"], 1),
+        "total_days_active": stats["total_days_active"],
+        "chart_specs": chart_specs,
+        "chart_layout": charts.layout_template(),
+        "chart_config": charts.CHART_CONFIG,
+        "skill_performance": stats["skill_performance"][:5],
         "recent_progress": recent_progress,
         "notes": notes,
     }
 
-    return render(request, "user/dashboard.html", context)
+    return context
+
+
+def build_skill_cards_context(user, today, page):
+    offset = (page - 1) * SKILL_CARDS_PER_PAGE
+    skills = list(
+        Skill.objects.for_user(user).with_goal_hours().order_by('id')[offset:offset + SKILL_CARDS_PER_PAGE + 1]
+    )
+    has_next = len(skills) > SKILL_CARDS_PER_PAGE
+    skills = skills[:SKILL_CARDS_PER_PAGE]
+
+    chart_specs = {}
+    skill_charts = []
+
+    for series in build_skill_cards(user, skills, today):
+        skill = series["skill"]
+        chart_id = f"skill-{skill.id}"
+
+        chart_specs[f"{chart_id}-bar"] = charts.skill_monthly_bar(
+            skill.title, series["months"], series["monthly_data"]
+        )
+        chart_specs[f"{chart_id}-pie"] = charts.skill_goals_pie(
+            series["goals_completed"], series["goals_active"]
+        )
+        chart_specs[f"{chart_id}-line"] = charts.skill_daily_line(
+            skill.title, series["labels"], series["data"], series["moving_avg"]
+        )
+        chart_specs[f"{chart_id}-gauge"] = charts.skill_gauge(series["percent"])
+
+        skill_charts.append({
+            "skill": skill,
+            "chart_id": chart_id,
+            "has_goals": series["goals_completed"] + series["goals_active"] > 0,
+            "percent": series["percent"],
+            "total_hours": series["total_hours"],
+            "avg_daily": series["avg_daily"],
+            "total_days": series["total_days"]
+        })
+
+    return {
+        "skill_charts": skill_charts,
+        "chart_specs": chart_specs,
+        "next_page": page + 1 if has_next else None,
+    }
+
+
+# =====================================================
+# EXPORT / IMPORT
+# =====================================================
+
+@login_required
+def export_data(request, kind, fmt):
+    """Download all of the user's `kind` rows (progress, goals, skills, notes) as CSV or NDJSON."""
+    if kind not in EXPORTS or fmt not in EXPORT_FORMATS:
+        raise Http404("Unknown export")
+    return export_response(request.user, kind, fmt)
+
+
+@login_required
+def import_progress_view(request):
+    """Upload a CSV/JSON file of past progress entries (see imports.py)."""
+    form = ProgressImportForm(request.POST or None, request.FILES or None)
+    result = None
+
+    if request.method == 'POST' and form.is_valid():
+        upload = form.cleaned_data['file']
+        fmt = import_format(upload.name)
+        if fmt is None:
+            form.add_error('file', "Upload a .csv, .json, .ndjson or .jsonl file.")
+        else:
+            try:
+                result = import_progress(request.user, open_upload(upload), fmt, replace=form.cleaned_data['replace'])
+            except (ImportFormatError, UnicodeDecodeError, csv.Error) as error:
+                form.add_error('file', f"Could not read the file: {error}")
+
+    if result is not None:
+        messages.success(
+            request,
+            f"Imported {result.created} new entries from {result.rows} rows "
+            f"({result.updated} updated, {result.skipped} already logged, {result.error_count} invalid).",
+        )
+        if not result.error_count:
+            return redirect('skill_progress_list')
+
+    return render(request, 'user/import_progress.html', {
+        'form': form,
+        'result': result,
+    })
+
+
+# =====================================================
+# UPLOADED FILES
+# =====================================================
+
+@login_required
+def serve_media(request, name):
+    """An uploaded note, roadmap or certificate, to the user whose rows point at it."""
+    if not owns_file(request.user, name) or not default_storage.exists(name):
+        raise Http404("No such file")
+    return media_response(request, name)
+
+
+@login_required
+def note_preview(request, note_id):
+    """The preview image of a note's file, 404 until the worker has created it."""
+    note = get_object_or_404(NoteLibrary.objects.only('file'), id=note_id, user=request.user)
+    preview = preview_name(note.file.name) if note.file else None
+    if preview is None or not default_storage.exists(preview):
+        raise Http404("No preview")
+
+    response = media_response(request, preview)
+    # The URL stays the same when the note's file is replaced
+    response['Cache-Control'] = FILE_CACHE_CONTROL
+    return response
+
+
+# =====================================================
+# SEARCH
+# =====================================================
+
+@login_required
+def search(request):
+    """Full-text search over the user's skills, goals, progress entries and notes."""
+    query = request.GET.get('q', '').strip()
+    kind = request.GET.get('kind', '')
+    if kind not in dict(SearchDocument.KINDS):
+        kind = ''
+
+    return render(request, 'user/search.html', {
+        'search_query': query,
+        'kind': kind,
+        'kinds': SearchDocument.KINDS,
+        'results': search_documents(request.user, query, kind) if query else [],
+    })
 
 
 # =====================================================
@@ -1027,8 +880,6 @@ def get_skill_data_api(request, skill_id):
     user = request.user
     skill = get_object_or_404(Skill, id=skill_id, user=user)
     
-    progress_data = SkillProgress.objects.filter(skill=skill).order_by('date')
-    
     data = {
         'skill': {
             'id': skill.id,
@@ -1038,18 +889,53 @@ def get_skill_data_api(request, skill_id):
             'is_completed': skill.is_completed,
         },
         'stats': {
-            'total_hours': progress_data.aggregate(total=Sum('actual_time'))['total'] or 0,
-            'total_days': progress_data.count(),
-            'avg_daily': progress_data.aggregate(avg=Avg('actual_time'))['avg'] or 0,
+            'total_hours': skill.total_hours,
+            'total_days': skill.progress_days,
+            'avg_daily': skill.avg_hours,
         }
     }
     
     return JsonResponse(data)
 
 
+REFRESH_DEFAULT_DAYS = 30
+REFRESH_MAX_DAYS = 365
+
+
+def get_refresh_days(request):
+    try:
+        days = int(request.GET.get('days', REFRESH_DEFAULT_DAYS))
+    except ValueError:
+        days = REFRESH_DEFAULT_DAYS
+    return min(max(days, 1), REFRESH_MAX_DAYS)
+
+
+def dashboard_etag(request, *args, **kwargs):
+    """ETag from the latest skill/progress/goal modification (and row counts, so deletes count too)."""
+    if not request.user.is_authenticated:
+        return None
+
+    skills = Skill.objects.filter(user=request.user).aggregate(
+        latest=Max('updated_at'), count=Count('id')
+    )
+    progress = SkillProgress.objects.filter(user=request.user).aggregate(
+        latest=Max('updated_at'), count=Count('id')
+    )
+    goals = SkillGoal.objects.filter(user=request.user).aggregate(
+        latest=Max('updated_at'), count=Count('id')
+    )
+    raw = ":".join(str(part) for part in (
+        get_refresh_days(request), date.today(),
+        skills['latest'], skills['count'],
+        progress['latest'], progress['count'],
+        goals['latest'], goals['count'],
+    ))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=dashboard_etag)
 def refresh_dashboard_api(request):
-    """API endpoint to refresh dashboard data"""
-    days = int(request.GET.get('days', 30))
-    # Implementation for partial updates
-    return JsonResponse({'status': 'success'})
\ No newline at end of file
+    """API endpoint to refresh dashboard data for the last `days` days"""
+    return JsonResponse(build_window_stats(request.user, get_refresh_days(request)))
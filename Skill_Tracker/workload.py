@@ -0,0 +1,122 @@
+"""
+Synthetic workloads for benchmarks and query-budget tests.
+
+``seed_user`` creates one user with a configurable number of skills, goals
+per skill, days of SkillProgress history and notes, using bulk inserts.
+Bulk inserts skip the model signals, so the daily rollups, the activity
+bitmap, the skill counters and the search documents are rebuilt for the
+user afterwards.
+"""
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .activity import rebuild_activity_bitmaps
+from .models import NoteLibrary, Skill, SkillGoal, SkillProgress
+from .rollups import rebuild_rollups
+from .search import rebuild_search_index
+from .skill_stats import recount_skill_stats
+
+
+SEED_PASSWORD = 'benchmark'
+LEVELS = [level for level, _ in Skill.LEVEL_CHOICES]
+NOTE_TYPES = [note_type for note_type, _ in NoteLibrary.NOTE_TYPES]
+TOPICS = [
+    'recursion and memoization', 'decorators and closures', 'SQL window functions',
+    'async IO event loops', 'unit testing with mocks', 'binary search trees',
+    'HTTP caching headers', 'regular expressions', 'database indexing', 'dynamic programming',
+]
+
+
+@dataclass
+class Workload:
+    skills: int = 5
+    goals: int = 2
+    days: int = 90
+    notes: int = 2
+    # Share of days with a progress entry, per skill
+    activity: float = 0.6
+    # Share of goals created already completed
+    completed: float = 0.3
+
+
+@transaction.atomic
+def seed_user(username, workload, rng=None, today=None):
+    """Create (or replace) `username` and fill it with `workload`."""
+    rng = rng or random.Random(0)
+    today = today or date.today()
+
+    User.objects.filter(username=username).delete()
+    user = User.objects.create_user(
+        username,
+        f'{username}@example.com',
+        SEED_PASSWORD,
+        date_joined=timezone.now() - timedelta(days=workload.days),
+    )
+
+    skills = Skill.objects.bulk_create([
+        Skill(
+            user=user,
+            title=f'Skill {i + 1}',
+            description=f'Synthetic skill {i + 1}',
+            proficiency_level=rng.choice(LEVELS),
+            last_practiced=today,
+            is_active=rng.random() < 0.8,
+        )
+        for i in range(workload.skills)
+    ])
+
+    SkillGoal.objects.bulk_create([
+        SkillGoal(
+            user=user,
+            skill=skill,
+            goal_description=f'Goal {g + 1} for {skill.title}',
+            target_date=today + timedelta(days=rng.randint(7, 180)),
+            daily_study_hours=rng.randint(1, 4),
+            is_completed=rng.random() < workload.completed,
+        )
+        for skill in skills
+        for g in range(workload.goals)
+    ])
+
+    SkillProgress.objects.bulk_create(
+        (
+            SkillProgress(
+                user=user,
+                skill=skill,
+                date=today - timedelta(days=d),
+                planned_time=2,
+                actual_time=rng.randint(0, 5),
+                extra_time=rng.randint(0, 1),
+                confidence_level=rng.randint(1, 10),
+                marks_yourself=rng.randint(1, 10),
+                topics_done=rng.choice(TOPICS),
+            )
+            for skill in skills
+            for d in range(workload.days)
+            if rng.random() < workload.activity
+        ),
+        batch_size=1000,
+    )
+
+    NoteLibrary.objects.bulk_create([
+        NoteLibrary(
+            user=user,
+            skill=skill,
+            title=f'{skill.title} note {n + 1}',
+            note_type=rng.choice(NOTE_TYPES),
+            file=f'note_library/{username}-{skill.pk}-{n + 1}.pdf',
+        )
+        for skill in skills
+        for n in range(workload.notes)
+    ])
+
+    rebuild_rollups([user.id])
+    rebuild_activity_bitmaps([user])
+    recount_skill_stats(skill.pk for skill in skills)
+    rebuild_search_index([user.id])
+    return user
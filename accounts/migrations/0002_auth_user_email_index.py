@@ -0,0 +1,20 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    reset_password looks users up by email; auth_user belongs to
+    django.contrib.auth, so its index is created here with plain SQL.
+    """
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS accounts_auth_user_email_idx ON auth_user (email);',
+            'DROP INDEX IF EXISTS accounts_auth_user_email_idx;',
+        ),
+    ]
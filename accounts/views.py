@@ -94,7 +94,7 @@ def profile(request):
     )
     
     # Get user's goals
-    goals = SkillGoal.objects.filter(user=request.user)
+    goals = SkillGoal.objects.for_user(request.user)
     completed_goals = goals.filter(is_completed=True).count()
     
     if request.method == 'POST':
@@ -55,6 +55,14 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Opt-in per-request query counting: Server-Timing headers plus a log line
+# per view, and the most repeated SQL when a request exceeds the threshold.
+if os.environ.get('QUERY_INSTRUMENTATION'):
+    MIDDLEWARE.insert(0, 'Skill_Tracker.middleware.QueryCountMiddleware')
+
+QUERY_COUNT_THRESHOLD = int(os.environ.get('QUERY_COUNT_THRESHOLD', 50))
+QUERY_COUNT_TOP = 5
+
 ROOT_URLCONF = 'skilltracker.urls'
 
 TEMPLATES = [
@@ -75,22 +83,88 @@ TEMPLATES = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Uploaded files are served by Skill_Tracker.views.serve_media after an
+# ownership check. Behind nginx or Apache the transfer can be handed to
+# the proxy: 'x-accel-redirect' (nginx, with an `internal` location at
+# MEDIA_ACCEL_PREFIX aliasing MEDIA_ROOT) or 'x-sendfile'.
+MEDIA_OFFLOAD = os.environ.get('MEDIA_OFFLOAD', '')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# Count dashboard cache hits and misses (an extra cache write per request;
+# see /dashboard/cache-stats/)
+DASHBOARD_CACHE_STATS = DEBUG or bool(os.environ.get('DASHBOARD_CACHE_STATS'))
+
+# Threads creating note previews after an upload (0: inline, for tests)
+PREVIEW_WORKERS = int(os.environ.get('PREVIEW_WORKERS', 2))
+
 WSGI_APPLICATION = 'skilltracker.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': dj_database_url.config(
-        default=os.environ.get('DATABASE_URL'),
-        conn_max_age=600,
-        ssl_require=True
-    )
+# Without DATABASE_URL (local development, benchmarks) fall back to SQLite.
+DATABASE_URL = os.environ.get('DATABASE_URL')
+
+if DATABASE_URL:
+    DATABASES = {
+        'default': dj_database_url.parse(
+            DATABASE_URL,
+            conn_max_age=600,
+            ssl_require=DATABASE_URL.startswith(('postgres://', 'postgresql://'))
+        )
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        }
+    }
+
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Shared between gunicorn workers; set REDIS_URL to share it across instances.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', os.path.join(BASE_DIR, '.django_cache')),
+        }
+    }
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'Skill_Tracker.queries': {
+            'handlers': ['console'],
+            'level': os.environ.get('QUERY_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
 }
 
 
-
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -127,7 +201,28 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STATICFILES_FINDERS = [
+    'django.contrib.staticfiles.finders.FileSystemFinder',
+    'django.contrib.staticfiles.finders.AppDirectoriesFinder',
+    # plotly.min.js from the installed plotly package, served as plotly/plotly.min.js
+    'Skill_Tracker.finders.PlotlyJSFinder',
+]
+
+# Uploads are stored once per content under their SHA-256, computed by the
+# upload handlers while the request streams in (see Skill_Tracker/storage.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'Skill_Tracker.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+FILE_UPLOAD_HANDLERS = [
+    'Skill_Tracker.storage.HashingMemoryFileUploadHandler',
+    'Skill_Tracker.storage.HashingTemporaryFileUploadHandler',
+]
 
 
 # Default primary key field type